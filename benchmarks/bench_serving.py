@@ -0,0 +1,260 @@
+"""
+Micro-benchmarks for the prediction hot path.
+Times each serving stage (artifact load, feature building, model call, the
+end-to-end Flask /predict and /predict/batch routes with and without the
+/metrics instrumentation, and encode_many /
+predict_many over batch sizes from 1 to 100k rows) and reports p50/p99
+latency and rows/sec.
+Request payloads are sampled from visa_dataset.csv.
+
+Usage:
+    python benchmarks/bench_serving.py [--mode model compiled table student] [--quick]
+        [--student visa_processing_student.npz]
+        [--output results.json] [--baseline benchmarks/baseline_serving.json]
+        [--save-baseline] [--tolerance 0.25] [--check]
+
+Student mode serves the --student npz when given; otherwise the model is
+distilled in memory on Milestone3's split of visa_dataset.csv.
+
+--save-baseline stores the run as the baseline; later runs print the p50
+ratio against it for every stage, and with --check exit non-zero when any
+stage is slower than baseline by more than --tolerance.
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+
+import numpy as np
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+NOTEBOOKS_DIR = os.path.join(ROOT_DIR, "notebooks")
+DATASET_PATH = os.path.join(ROOT_DIR, "visa_dataset.csv")
+DEFAULT_MODEL = os.path.join(ROOT_DIR, "models", "visa_processing_model.pkl")
+DEFAULT_PREP = os.path.join(ROOT_DIR, "data", "preprocessing_info.pkl")
+DEFAULT_BASELINE = os.path.join(ROOT_DIR, "benchmarks", "baseline_serving.json")
+
+BATCH_SIZES = [1, 10, 100, 1000, 10000, 100000]
+
+warnings.filterwarnings("ignore")
+
+
+def sample_requests(n, seed=0):
+    """n request payloads drawn (with replacement) from visa_dataset.csv."""
+    with open(DATASET_PATH, newline="") as f:
+        rows = [r for r in csv.DictReader(f) if r["country"] and r["visa_type"] and r["application_date"]]
+    rng = np.random.default_rng(seed)
+    return [
+        {"country": rows[i]["country"], "visa_type": rows[i]["visa_type"], "application_date": rows[i]["application_date"]}
+        for i in rng.integers(0, len(rows), n)
+    ]
+
+
+def time_stage(func, repeat, rows=1, warmup=1):
+    """Call func repeat times and summarize per-call latency and throughput."""
+    for _ in range(warmup):
+        func()
+    times = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        times[i] = time.perf_counter() - start
+    return {
+        "repeat": repeat,
+        "rows": rows,
+        "p50_ms": round(float(np.percentile(times, 50)) * 1000, 4),
+        "p99_ms": round(float(np.percentile(times, 99)) * 1000, 4),
+        "mean_ms": round(float(times.mean()) * 1000, 4),
+        "rows_per_sec": round(rows / float(times.mean()), 1),
+    }
+
+
+def distill_student(teacher, prep):
+    """Student of teacher distilled as Milestone3 does, on its split of visa_dataset.csv."""
+    if NOTEBOOKS_DIR not in sys.path:
+        sys.path.insert(0, NOTEBOOKS_DIR)
+    from distill import distill
+    from features import build_training_features
+    from sklearn.model_selection import train_test_split
+
+    X, y, _ = build_training_features(DATASET_PATH)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
+    student, _ = distill(teacher, prep, X_train, y_train, X_test, y_test)
+    return student
+
+
+def build_predictor(mode, model_path, prep_path, student_path=None):
+    """
+    Predictor for a serving mode; compiled and table artifacts are built in
+    memory from the model, the student is loaded from student_path or distilled.
+    """
+    from lookup_table import LookupTable, build_lookup_table
+    from predictor import Predictor
+    from tree_engine import compile_model, load_compiled
+
+    base = Predictor.from_files(model_path, prep_path)
+    if mode == "model":
+        return base
+    if mode == "compiled":
+        return Predictor(compile_model(base.model), base.prep)
+    if mode == "table":
+        t = build_lookup_table(base.model, base.prep)
+        table = LookupTable(t["table"], t["countries"].tolist(), t["visa_types"].tolist(), t["offices"].tolist())
+        return Predictor(base.model, base.prep, table)
+    if mode == "student":
+        student = load_compiled(student_path) if student_path else distill_student(base.model, base.prep)
+        return Predictor(student, base.prep)
+    raise ValueError(f"Unknown serving mode: {mode}")
+
+
+def run_mode(mode, model_path, prep_path, quick=False, student_path=None):
+    import api
+    from predictor import Predictor, build_feature_vector
+
+    scale = 0.1 if quick else 1.0
+
+    def n(count):
+        return max(3, int(count * scale))
+
+    predictor = build_predictor(mode, model_path, prep_path, student_path)
+    api.load_predictor = lambda: predictor
+    client = api.app.test_client()
+    one = sample_requests(1)[0]
+    args = (one["country"], one["visa_type"], one["application_date"])
+    X_one = predictor.encoder.encode_one(*args).copy()
+
+    stages = {
+        "artifact_load": time_stage(lambda: Predictor.from_files(model_path, prep_path), n(10), warmup=0),
+        "build_feature_vector": time_stage(lambda: build_feature_vector(predictor.prep, *args), n(300)),
+        "encode_one": time_stage(lambda: predictor.encoder.encode_one(*args), n(3000)),
+        "model_predict_one": time_stage(lambda: predictor.model.predict(X_one), n(300)),
+        "predict_one": time_stage(lambda: predictor.predict_one(*args), n(300)),
+        "flask_predict": time_stage(lambda: client.post("/predict", json=one), n(300)),
+    }
+    # Cost of the /metrics instrumentation: same request with recording off
+    api.METRICS_ENABLED = False
+    stages["flask_predict_no_metrics"] = time_stage(lambda: client.post("/predict", json=one), n(300))
+    api.METRICS_ENABLED = True
+    for size in BATCH_SIZES:
+        if quick and size > 10000:
+            continue
+        rows = sample_requests(size, seed=size)
+        repeat = n(max(3, 2000 // size))
+        stages[f"encode_many_{size}"] = time_stage(lambda: predictor.encoder.encode_many(rows), repeat, rows=size)
+        stages[f"predict_many_{size}"] = time_stage(lambda: predictor.predict_many(rows), repeat, rows=size)
+        if size <= 10000:
+            body = {"applications": rows}
+            stages[f"flask_batch_{size}"] = time_stage(lambda: client.post("/predict/batch", json=body), repeat, rows=size)
+    return stages
+
+
+def environment_info(model_path):
+    import sklearn
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "machine": platform.machine(),
+        "model_path": os.path.relpath(model_path, ROOT_DIR),
+    }
+
+
+def compare_to_baseline(results, baseline, tolerance=0.25):
+    """
+    Compare p50 latency of every stage present in both runs.
+
+    Returns:
+    --------
+    list of dict : 'mode', 'stage', 'baseline_p50_ms', 'p50_ms', 'ratio'
+        and 'regressed' (ratio above 1 + tolerance)
+    """
+    rows = []
+    for mode, stages in results["modes"].items():
+        for stage, stats in stages.items():
+            base = baseline.get("modes", {}).get(mode, {}).get(stage)
+            if not base or not base["p50_ms"]:
+                continue
+            ratio = stats["p50_ms"] / base["p50_ms"]
+            rows.append({
+                "mode": mode,
+                "stage": stage,
+                "baseline_p50_ms": base["p50_ms"],
+                "p50_ms": stats["p50_ms"],
+                "ratio": round(ratio, 3),
+                "regressed": ratio > 1 + tolerance,
+            })
+    return rows
+
+
+def print_results(results):
+    for mode, stages in results["modes"].items():
+        print(f"\n=== Serving mode: {mode} ===")
+        print(f"  {'stage':<24}{'rows':>8}{'p50 ms':>12}{'p99 ms':>12}{'rows/sec':>14}")
+        for stage, s in stages.items():
+            print(f"  {stage:<24}{s['rows']:>8}{s['p50_ms']:>12.3f}{s['p99_ms']:>12.3f}{s['rows_per_sec']:>14,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", nargs="+", choices=["model", "compiled", "table", "student"], default=["model"])
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--student", help="Compiled student (.npz) for --mode student")
+    parser.add_argument("--prep", default=DEFAULT_PREP)
+    parser.add_argument("--quick", action="store_true", help="Fewer repeats, batches up to 10k")
+    parser.add_argument("--output", help="Write results JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--check", action="store_true", help="Fail when a stage regressed")
+    args = parser.parse_args()
+
+    results = {
+        "environment": environment_info(args.model),
+        "modes": {mode: run_mode(mode, args.model, args.prep, args.quick, args.student) for mode in args.mode},
+    }
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to: {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    comparison = compare_to_baseline(results, baseline, args.tolerance)
+    print(f"\n=== Against baseline {baseline['environment'].get('commit', '')} (p50) ===")
+    for row in comparison:
+        flag = "  REGRESSED" if row["regressed"] else ""
+        print(f"  {row['mode']:<9}{row['stage']:<24}{row['baseline_p50_ms']:>10.3f} -> {row['p50_ms']:>10.3f} ms  x{row['ratio']:.2f}{flag}")
+    if args.check and any(row["regressed"] for row in comparison):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
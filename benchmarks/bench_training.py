@@ -0,0 +1,208 @@
+"""
+Scaling benchmark for the Milestone3 training pipeline.
+Runs the stages of notebooks/Milestone3.py the way it runs them on synthetic
+datasets of growing size and records wall time and peak memory per stage:
+building the feature cache (streamed ingestion, feature engineering and
+encoding through feature_cache.load_or_build), loading it again as a later
+run would, the train/test split, the shared matrix of an ExperimentRunner,
+the three-model comparison on its pool and the random forest grid search.
+Each size runs in a fresh process with its own feature cache directory; peak
+memory is the highest RSS of that process and its children (pool workers)
+sampled while the stage ran, and the increase over the RSS when the stage
+started.
+
+Usage:
+    python benchmarks/bench_training.py --rows 10000 100000 1000000 10000000
+        [--data-dir benchmarks/data] [--grid-max-rows 100000] [--n-jobs 4]
+        [--timeout 3600] [--output training_scaling.json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.abspath(os.path.dirname(__file__))
+if BENCH_DIR not in sys.path:
+    sys.path.insert(0, BENCH_DIR)
+from synth_data import dataset_path, write_dataset
+from worker_memory import child_pids
+
+ROOT_DIR = os.path.abspath(os.path.join(BENCH_DIR, ".."))
+NOTEBOOKS_DIR = os.path.join(ROOT_DIR, "notebooks")
+if NOTEBOOKS_DIR not in sys.path:
+    sys.path.insert(0, NOTEBOOKS_DIR)
+from experiments import ExperimentRunner
+from feature_cache import load_or_build
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+class StageRecorder:
+    """Times stages and samples RSS (this process plus children) in a background thread."""
+
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.pid = os.getpid()
+        self.results = {}
+        self._peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def _current(self):
+        return _rss_bytes(self.pid) + sum(_rss_bytes(c) for c in child_pids(self.pid))
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self._peak = max(self._peak, self._current())
+            time.sleep(self.interval)
+
+    def run(self, name, func, *args, **kwargs):
+        start_rss = self._current()
+        self._peak = start_rss
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        peak = max(self._peak, self._current())
+        self.results[name] = {
+            "seconds": round(elapsed, 4),
+            "peak_rss_mib": round(peak / 2 ** 20, 1),
+            "peak_increase_mib": round((peak - start_rss) / 2 ** 20, 1),
+        }
+        # Stream each stage so a timeout still leaves partial results
+        print("STAGE " + json.dumps({"stage": name, **self.results[name]}), flush=True)
+        return result
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+
+# ===== Milestone3 stages =====
+
+def split(X, y):
+    from sklearn.model_selection import train_test_split
+
+    return train_test_split(X, y, test_size=0.3, random_state=42)
+
+
+def compare(runner):
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+    from sklearn.linear_model import LinearRegression
+
+    experiments = [
+        ("Linear Regression", LinearRegression()),
+        ("Random Forest", RandomForestRegressor(n_estimators=100, random_state=42)),
+        ("Gradient Boosting", GradientBoostingRegressor(n_estimators=100, random_state=42)),
+    ]
+    return runner.compare(experiments)
+
+
+def grid_search(runner):
+    from sklearn.ensemble import RandomForestRegressor
+
+    param_grid_rf = {
+        "n_estimators": [50, 100, 200],
+        "max_depth": [10, 20, None],
+        "min_samples_split": [2, 5, 10]
+    }
+    return runner.grid_search(RandomForestRegressor(random_state=42), param_grid_rf, cv=5)
+
+
+def run_pipeline(path, grid=True, n_jobs=None):
+    """Run every Milestone3 stage on one CSV; returns {stage: stats}."""
+    rec = StageRecorder()
+    cache_dir = tempfile.mkdtemp(prefix="bench_feature_cache_")
+    try:
+        rec.run("build_features", load_or_build, path, cache_dir)
+        X, y, _, _ = rec.run("load_cached_features", load_or_build, path, cache_dir)
+        X_train, X_test, y_train, y_test = rec.run("split", split, X, y)
+        runner = rec.run("share_matrix", ExperimentRunner, X_train, y_train, X_test, y_test, n_jobs=n_jobs)
+        try:
+            rec.run("compare_models", compare, runner)
+            if grid:
+                rec.run("grid_search_rf", grid_search, runner)
+        finally:
+            runner.close()
+    finally:
+        rec.close()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return rec.results
+
+
+def run_size(path, grid, n_jobs, timeout):
+    """Run one dataset in a fresh interpreter; returns (stages, status)."""
+    cmd = [sys.executable, os.path.abspath(__file__), "--run-one", path]
+    if n_jobs is not None:
+        cmd += ["--n-jobs", str(n_jobs)]
+    if not grid:
+        cmd.append("--no-grid")
+    stages, status = {}, "ok"
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        stdout = proc.stdout
+        if proc.returncode != 0:
+            status = "failed: " + (proc.stderr.strip().splitlines() or ["unknown error"])[-1]
+    except subprocess.TimeoutExpired as e:
+        stdout = e.stdout.decode() if isinstance(e.stdout, bytes) else (e.stdout or "")
+        status = f"timeout after {timeout}s"
+    for line in stdout.splitlines():
+        if line.startswith("STAGE "):
+            stage = json.loads(line[len("STAGE "):])
+            stages[stage.pop("stage")] = stage
+    return stages, status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--data-dir", default=os.path.join(BENCH_DIR, "data"))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--grid-max-rows", type=int, default=100_000, help="Skip the grid search above this size")
+    parser.add_argument("--n-jobs", type=int, help="ExperimentRunner worker processes (default: all CPUs, as Milestone3)")
+    parser.add_argument("--timeout", type=float, default=3600, help="Seconds allowed per dataset size")
+    parser.add_argument("--output", help="Write results JSON to this file")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    parser.add_argument("--no-grid", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        run_pipeline(args.run_one, grid=not args.no_grid, n_jobs=args.n_jobs)
+        return
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    results = {}
+    for n in args.rows:
+        path = dataset_path(args.data_dir, n, args.seed)
+        if not os.path.exists(path):
+            print(f"Generating {n:,} rows -> {path}")
+            write_dataset(path, n, args.seed)
+        stages, status = run_size(path, n <= args.grid_max_rows, args.n_jobs, args.timeout)
+        results[str(n)] = {"status": status, "stages": stages}
+
+        print(f"\n=== {n:,} rows ({status}) ===")
+        print(f"  {'stage':<24}{'seconds':>10}{'peak MiB':>10}{'+MiB':>10}")
+        for name, s in stages.items():
+            print(f"  {name:<24}{s['seconds']:>10.2f}{s['peak_rss_mib']:>10.1f}{s['peak_increase_mib']:>10.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
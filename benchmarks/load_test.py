@@ -0,0 +1,272 @@
+"""
+Open-loop load test of a local server: latency against offered throughput.
+Request payloads are drawn from the country / visa_type / application_date
+(and processing_office, when present) mix of visa_dataset.csv. For each
+target rate, arrivals follow a Poisson process and are sent on schedule
+whatever the state of earlier requests; a pool of --concurrency
+connections sends them. A request's latency runs from its scheduled start,
+so time spent queued for a free connection is included. This keeps a server
+that falls behind from hiding its backlog (no coordinated omission).
+
+Apps:
+    api         src/api.py, POST /predict with a JSON body (gunicorn.conf.py)
+    milestone4  notebooks/Milestone4.py APP, POST /predict with a form body
+
+Usage:
+    # Against a running server
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --app api \\
+        --rates 50 100 200 400 --duration 10
+
+    # Start gunicorn for the app, ramp until p99 passes 100 ms
+    python benchmarks/load_test.py --start --app milestone4 --workers 2 \\
+        --rates 25 50 100 200 400 800 --slo-p99-ms 100 [--output curve.json]
+
+--method get sends GET /predict (query string) instead, which for the api
+app exercises its ETag / in-memory answer cache.
+"""
+
+import argparse
+import csv
+import http.client
+import json
+import os
+import queue
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+import numpy as np
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+NOTEBOOKS_DIR = os.path.join(ROOT_DIR, "notebooks")
+DATASET_PATH = os.path.join(ROOT_DIR, "visa_dataset.csv")
+
+# app -> (gunicorn working directory, WSGI entry point, request body encoding)
+APPS = {
+    "api": (SRC_DIR, "api:app", "json"),
+    "milestone4": (NOTEBOOKS_DIR, "Milestone4:APP", "form"),
+}
+FIELDS = ("country", "visa_type", "application_date", "processing_office")
+
+
+def request_mix(n, seed=0, path=DATASET_PATH):
+    """n request payloads drawn (with replacement) from the rows of the dataset."""
+    with open(path, newline="") as f:
+        rows = [r for r in csv.DictReader(f) if r["country"] and r["visa_type"] and r["application_date"]]
+    rng = np.random.default_rng(seed)
+    return [{k: rows[i][k] for k in FIELDS if rows[i].get(k)} for i in rng.integers(0, len(rows), n)]
+
+
+def arrival_times(rate, duration, seed=0):
+    """Send offsets (seconds) of a Poisson process at rate requests/sec over duration."""
+    rng = np.random.default_rng(seed)
+    # Draw a little more than the expected count and cut at duration
+    gaps = rng.exponential(1.0 / rate, int(rate * duration * 1.2) + 10)
+    times = np.cumsum(gaps)
+    while times[-1] < duration:
+        times = np.concatenate([times, times[-1] + np.cumsum(rng.exponential(1.0 / rate, len(gaps)))])
+    return times[times < duration]
+
+
+def encode_request(payload, encoding, method="post"):
+    """(method, path, body, headers) of one /predict request."""
+    if method == "get":
+        return "GET", "/predict?" + urllib.parse.urlencode(payload), None, {}
+    if encoding == "json":
+        return "POST", "/predict", json.dumps(payload).encode(), {"Content-Type": "application/json"}
+    return "POST", "/predict", urllib.parse.urlencode(payload).encode(), {"Content-Type": "application/x-www-form-urlencoded"}
+
+
+def summarize(rate, duration, latencies, errors, elapsed):
+    """Latency percentiles (ms) and achieved throughput of one load step."""
+    lat = np.asarray(latencies) * 1000
+    completed = len(lat)
+    return {
+        "target_rps": rate,
+        "achieved_rps": round(completed / elapsed, 1) if elapsed else 0.0,
+        "sent": completed + errors,
+        "errors": errors,
+        "p50_ms": round(float(np.percentile(lat, 50)), 3) if completed else None,
+        "p90_ms": round(float(np.percentile(lat, 90)), 3) if completed else None,
+        "p99_ms": round(float(np.percentile(lat, 99)), 3) if completed else None,
+        "max_ms": round(float(lat.max()), 3) if completed else None,
+        "duration_s": duration,
+    }
+
+
+def run_step(url, rate, duration, payloads, encoding, method="post", concurrency=16, timeout=30.0, seed=0):
+    """
+    Offer rate requests/sec for duration seconds.
+
+    Parameters:
+    -----------
+    url : str
+        Server base URL (http://host:port).
+    payloads : list of dict
+        Request mix; used round-robin.
+    encoding : str
+        'json' or 'form' request body.
+    concurrency : int
+        Connections (sender threads); arrivals wait in a queue for a free one.
+
+    Returns:
+    --------
+    dict : summarize() of the step
+    """
+    parsed = urllib.parse.urlsplit(url)
+    schedule = arrival_times(rate, duration, seed)
+    requests = [encode_request(payloads[i % len(payloads)], encoding, method) for i in range(len(schedule))]
+    pending = queue.Queue()
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def sender():
+        conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=timeout)
+        while True:
+            item = pending.get()
+            if item is None:
+                break
+            due, (verb, path, body, headers) = item
+            try:
+                conn.request(verb, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                ok = resp.status < 400
+                if resp.will_close:
+                    conn.close()
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                ok = False
+            latency = time.perf_counter() - due
+            with lock:
+                if ok:
+                    latencies.append(latency)
+                else:
+                    errors[0] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=sender, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    start = time.perf_counter()
+    for offset, req in zip(schedule, requests):
+        due = start + offset
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        pending.put((due, req))
+    for _ in threads:
+        pending.put(None)
+    for t in threads:
+        t.join()
+    return summarize(rate, duration, latencies, errors[0], time.perf_counter() - start)
+
+
+def run_curve(url, rates, duration, payloads, encoding, method="post", concurrency=16, slo_p99_ms=None, warmup=1.0):
+    """
+    run_step for each rate in increasing order.
+
+    Stops after the first step whose p99 exceeds slo_p99_ms (or that had
+    errors), since higher rates only queue further.
+    """
+    if warmup:
+        run_step(url, min(rates), warmup, payloads, encoding, method, concurrency, seed=len(rates))
+    curve = []
+    for i, rate in enumerate(sorted(rates)):
+        step = run_step(url, rate, duration, payloads, encoding, method, concurrency, seed=i)
+        curve.append(step)
+        print_step(step)
+        if step["errors"] or (slo_p99_ms and (step["p99_ms"] is None or step["p99_ms"] > slo_p99_ms)):
+            break
+    return curve
+
+
+def max_rate_within(curve, slo_p99_ms):
+    """Highest achieved throughput whose p99 stayed within slo_p99_ms, or None."""
+    ok = [s["achieved_rps"] for s in curve if not s["errors"] and s["p99_ms"] is not None and s["p99_ms"] <= slo_p99_ms]
+    return max(ok) if ok else None
+
+
+def print_step(s):
+    if s["p50_ms"] is None:
+        print(f"  {s['target_rps']:>10}{s['achieved_rps']:>12}{'-':>10}{'-':>10}{'-':>10}{s['errors']:>8}")
+        return
+    print(f"  {s['target_rps']:>10}{s['achieved_rps']:>12}{s['p50_ms']:>10.2f}{s['p90_ms']:>10.2f}{s['p99_ms']:>10.2f}{s['errors']:>8}")
+
+
+def start_server(app, workers, port, env_overrides):
+    cwd, entry, _ = APPS[app]
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers))
+    env.update(env_overrides)
+    if app == "api":
+        cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"]
+    else:
+        cmd = [sys.executable, "-m", "gunicorn", "--workers", str(workers), "--bind", f"127.0.0.1:{port}", entry]
+    proc = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        if proc.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {proc.returncode}")
+        try:
+            urllib.request.urlopen(url + "/health", timeout=1)
+            return proc, url
+        except OSError:
+            time.sleep(0.1)
+    proc.send_signal(signal.SIGTERM)
+    raise RuntimeError("gunicorn did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", choices=sorted(APPS), default="api")
+    parser.add_argument("--url", help="Base URL of a running server")
+    parser.add_argument("--start", action="store_true", help="Start gunicorn for --app")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=5058)
+    parser.add_argument("--rates", type=float, nargs="+", default=[25, 50, 100, 200, 400])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per rate")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--method", choices=["post", "get"], default="post")
+    parser.add_argument("--slo-p99-ms", type=float, help="Stop ramping once p99 exceeds this")
+    parser.add_argument("--requests", type=int, default=5000, help="Size of the sampled request mix")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model", default=os.path.join(ROOT_DIR, "models", "visa_processing_model.pkl"))
+    parser.add_argument("--prep", default=os.path.join(ROOT_DIR, "data", "preprocessing_info.pkl"))
+    parser.add_argument("--output", help="Write the curve JSON to this file")
+    args = parser.parse_args()
+
+    if not args.url and not args.start:
+        parser.error("pass --url or --start")
+    payloads = request_mix(args.requests, args.seed)
+    encoding = APPS[args.app][2]
+
+    proc = None
+    url = args.url
+    if args.start:
+        proc, url = start_server(args.app, args.workers, args.port, {"MODEL_PATH": args.model, "PREPROCESS_PATH": args.prep})
+    try:
+        print(f"\n=== {args.app} at {url}, {args.method.upper()} /predict, concurrency {args.concurrency} ===")
+        print(f"  {'target/s':>10}{'achieved/s':>12}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        curve = run_curve(url, args.rates, args.duration, payloads, encoding, args.method, args.concurrency, args.slo_p99_ms)
+    finally:
+        if proc is not None:
+            proc.send_signal(signal.SIGTERM)
+            proc.wait(timeout=30)
+
+    if args.slo_p99_ms:
+        best = max_rate_within(curve, args.slo_p99_ms)
+        print(f"\n  max throughput with p99 <= {args.slo_p99_ms:g} ms: {best if best is not None else 'none'} req/s")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"app": args.app, "method": args.method, "workers": args.workers if args.start else None,
+                       "concurrency": args.concurrency, "curve": curve}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Cold-start profile of the serving process (src/api.py).
+Starts a fresh interpreter with -X importtime, imports the API, answers
+/health, then answers the first /predict in the chosen serving mode. Reports
+the wall time of every step (with the load time of each artifact inside the
+first prediction), the cumulative import time of each top-level package and
+which heavy libraries were loaded before /health.
+
+Usage:
+    python benchmarks/startup_profile.py [--mode model|compiled|table|student]
+        [--model PATH] [--prep PATH] [--table PATH] [--json OUT] [--check]
+
+With --check the script exits non-zero when /health is not ready within
+--budget-ms (or STARTUP_BUDGET_MS) or when a heavy library was imported
+before /health answered.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+
+# Libraries that must not be imported before /health answers
+HEAVY_MODULES = ("numpy", "pandas", "scipy", "sklearn", "joblib")
+DEFAULT_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", 1500))
+
+_CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+steps = {}
+
+def mark(name, since):
+    now = time.perf_counter()
+    steps[name] = round((now - since) * 1000, 2)
+    return now
+
+cfg = json.loads(sys.argv[1])
+t = time.perf_counter()
+import api
+t = mark("import_api", t)
+client = api.app.test_client()
+assert client.get("/health").status_code == 200
+t = mark("first_health", t)
+health_ready = round((t - start) * 1000, 2)
+heavy_before_health = [m for m in cfg["heavy"] if m in sys.modules]
+
+api.MODEL_PATH = api.COMPILED_MODEL_PATH = api.STUDENT_MODEL_PATH = cfg["model"]
+api.PREPROCESS_PATH, api.TABLE_PATH = cfg["prep"], cfg["table"]
+api.SERVING_MODE = cfg["mode"]
+resp = client.post("/predict", json={"country": "India", "visa_type": "Student", "application_date": "2024-06-15"})
+assert resp.status_code == 200, resp.get_json()
+t = mark("first_predict", t)
+for name, ms in api.load_predictor().load_times_ms.items():
+    steps["load_" + name] = round(ms, 2)
+
+print("STARTUP_PROFILE " + json.dumps({
+    "steps_ms": steps,
+    "health_ready_ms": health_ready,
+    "total_ms": round((t - start) * 1000, 2),
+    "heavy_before_health": heavy_before_health,
+}))
+"""
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+
+def _top_level_imports(stderr):
+    # Cumulative microseconds of each import that was not nested in another
+    totals = {}
+    for line in stderr.splitlines():
+        m = _IMPORTTIME.match(line)
+        if m and len(m.group(3)) == 1:
+            name = m.group(4)
+            totals[name] = totals.get(name, 0) + int(m.group(2))
+    return {name: round(us / 1000, 2) for name, us in sorted(totals.items(), key=lambda kv: -kv[1])}
+
+
+def profile_startup(mode="model", model_path=None, prep_path=None, table_path=None):
+    """
+    Profile a cold start of src/api.py in a fresh interpreter.
+
+    Returns:
+    --------
+    dict : 'steps_ms', 'health_ready_ms', 'total_ms', 'heavy_before_health'
+        and 'imports_ms' (top-level packages, slowest first)
+    """
+    default_model = {
+        "compiled": "visa_processing_model.npz", "student": "visa_processing_student.npz",
+    }.get(mode, "visa_processing_model.pkl")
+    cfg = {
+        "mode": mode,
+        "model": model_path or os.path.join(ROOT_DIR, "models", default_model),
+        "prep": prep_path or os.path.join(ROOT_DIR, "data", "preprocessing_info.pkl"),
+        "table": table_path or os.path.join(ROOT_DIR, "prediction_table.npz"),
+        "heavy": list(HEAVY_MODULES),
+    }
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD, json.dumps(cfg)],
+        cwd=SRC_DIR, capture_output=True, text=True,
+    )
+    result = None
+    for line in proc.stdout.splitlines():
+        if line.startswith("STARTUP_PROFILE "):
+            result = json.loads(line[len("STARTUP_PROFILE "):])
+    if proc.returncode != 0 or result is None:
+        tail = "\n".join(l for l in proc.stderr.splitlines() if not l.startswith("import time:"))
+        raise RuntimeError(f"Startup profile failed:\n{tail}")
+    result["imports_ms"] = _top_level_imports(proc.stderr)
+    return result
+
+
+def check_budget(result, budget_ms=DEFAULT_BUDGET_MS):
+    """Return a list of budget violations (empty when within budget)."""
+    problems = []
+    if result["health_ready_ms"] > budget_ms:
+        problems.append(f"/health ready after {result['health_ready_ms']} ms > budget {budget_ms} ms")
+    if result["heavy_before_health"]:
+        problems.append(f"Imported before /health: {', '.join(result['heavy_before_health'])}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["model", "compiled", "table", "student"], default="model")
+    parser.add_argument("--model")
+    parser.add_argument("--prep")
+    parser.add_argument("--table")
+    parser.add_argument("--json", help="Write the profile to this file")
+    parser.add_argument("--top", type=int, default=15, help="Number of imports to print")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--check", action="store_true", help="Fail when the budget is exceeded")
+    args = parser.parse_args()
+
+    result = profile_startup(args.mode, args.model, args.prep, args.table)
+
+    print(f"Serving mode: {args.mode}")
+    print(f"/health ready after {result['health_ready_ms']} ms, first prediction after {result['total_ms']} ms")
+    print("\nSteps (ms):")
+    for name, ms in result["steps_ms"].items():
+        print(f"  {name:<26}{ms:>10.2f}")
+    print("\nSlowest imports (ms, cumulative):")
+    for name, ms in list(result["imports_ms"].items())[:args.top]:
+        print(f"  {name:<26}{ms:>10.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+    problems = check_budget(result, args.budget_ms)
+    for p in problems:
+        print(f"BUDGET EXCEEDED: {p}")
+    if args.check and problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Synthetic visa application datasets shaped like visa_dataset.csv.
+Learns the empirical distributions of the real data (joint country/visa type
+frequencies, application year and month, and processing days as an additive
+country + visa type + month effect plus an empirical residual) and samples
+datasets of any size, written in chunks so 10M rows never sit in memory.
+
+Usage:
+    python benchmarks/synth_data.py --rows 10000 100000 1000000 --out-dir /tmp/visa_synth
+        [--seed 42] [--missing-rate 0.0] [--chunk-size 1000000]
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATASET_PATH = os.path.join(ROOT_DIR, "visa_dataset.csv")
+COLUMNS = ["application_date", "decision_date", "country", "visa_type"]
+
+
+class VisaDataModel:
+    """Empirical distributions of visa_dataset.csv used for sampling."""
+
+    def __init__(self, csv_path=DATASET_PATH):
+        df = pd.read_csv(csv_path)
+        app = pd.to_datetime(df["application_date"], errors="coerce")
+        dec = pd.to_datetime(df["decision_date"], errors="coerce")
+        df = df.assign(
+            application_date=app,
+            processing_days=(dec - app).dt.days,
+            month=app.dt.month,
+            year=app.dt.year,
+        ).dropna(subset=["application_date", "processing_days", "country", "visa_type"])
+        df = df[df["processing_days"] >= 0]
+
+        pairs = df.groupby(["country", "visa_type"]).size()
+        self.pairs = list(pairs.index)
+        self.pair_p = (pairs / pairs.sum()).to_numpy()
+
+        years = df["year"].value_counts(normalize=True).sort_index()
+        self.years, self.year_p = years.index.to_numpy(), years.to_numpy()
+        months = df["month"].value_counts(normalize=True).reindex(range(1, 13), fill_value=0)
+        self.month_p = (months / months.sum()).to_numpy()
+
+        mean = df["processing_days"].mean()
+        self.mean = mean
+        self.country_effect = (df.groupby("country")["processing_days"].mean() - mean).to_dict()
+        self.visa_effect = (df.groupby("visa_type")["processing_days"].mean() - mean).to_dict()
+        self.month_effect = (df.groupby("month")["processing_days"].mean() - mean).reindex(range(1, 13), fill_value=0).to_numpy()
+        fitted = (
+            mean
+            + df["country"].map(self.country_effect)
+            + df["visa_type"].map(self.visa_effect)
+            + self.month_effect[df["month"].to_numpy() - 1]
+        )
+        self.residuals = (df["processing_days"] - fitted).to_numpy()
+
+    def sample(self, n, rng, missing_rate=0.0):
+        """Sample n rows as a DataFrame with the columns of visa_dataset.csv."""
+        pair_idx = rng.choice(len(self.pairs), size=n, p=self.pair_p)
+        countries = np.array([c for c, _ in self.pairs], dtype=object)[pair_idx]
+        visa_types = np.array([v for _, v in self.pairs], dtype=object)[pair_idx]
+
+        years = rng.choice(self.years, size=n, p=self.year_p)
+        months = rng.choice(np.arange(1, 13), size=n, p=self.month_p)
+        month_start = (years - 1970) * 12 + (months - 1)
+        first = month_start.astype("datetime64[M]").astype("datetime64[D]")
+        days_in_month = ((month_start + 1).astype("datetime64[M]").astype("datetime64[D]") - first).astype(int)
+        app = first + (rng.random(n) * days_in_month).astype(int)
+
+        country_eff = np.array([self.country_effect[c] for c, _ in self.pairs])[pair_idx]
+        visa_eff = np.array([self.visa_effect[v] for _, v in self.pairs])[pair_idx]
+        days = self.mean + country_eff + visa_eff + self.month_effect[months - 1] + rng.choice(self.residuals, size=n)
+        dec = app + np.maximum(np.rint(days), 0).astype(int)
+
+        df = pd.DataFrame({
+            "application_date": np.datetime_as_string(app, unit="D").astype(object),
+            "decision_date": np.datetime_as_string(dec, unit="D").astype(object),
+            "country": countries,
+            "visa_type": visa_types,
+        })
+        if missing_rate > 0:
+            for col in COLUMNS:
+                df.loc[rng.random(n) < missing_rate, col] = np.nan
+        return df
+
+
+def write_dataset(path, n_rows, seed=42, missing_rate=0.0, chunk_size=1_000_000, model=None):
+    """Write an n_rows synthetic dataset to path in chunks; returns path."""
+    model = model or VisaDataModel()
+    rng = np.random.default_rng(seed)
+    written = 0
+    with open(path, "w", newline="") as f:
+        f.write(",".join(COLUMNS) + "\n")
+        while written < n_rows:
+            n = min(chunk_size, n_rows - written)
+            model.sample(n, rng, missing_rate).to_csv(f, header=False, index=False)
+            written += n
+    return path
+
+
+def dataset_path(out_dir, n_rows, seed=42, missing_rate=0.0):
+    suffix = f"_m{missing_rate:g}" if missing_rate else ""
+    return os.path.join(out_dir, f"visa_synth_{n_rows}_s{seed}{suffix}.csv")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--out-dir", default=os.path.join(ROOT_DIR, "benchmarks", "data"))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--missing-rate", type=float, default=0.0, help="Fraction of cells blanked per column")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    model = VisaDataModel()
+    for n in args.rows:
+        path = dataset_path(args.out_dir, n, args.seed, args.missing_rate)
+        write_dataset(path, n, args.seed, args.missing_rate, args.chunk_size, model)
+        print(f"Wrote {n:,} rows to {path}")
+
+
+if __name__ == "__main__":
+    main()
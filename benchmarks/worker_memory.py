@@ -0,0 +1,144 @@
+"""
+Per-worker memory report for a gunicorn deployment of src/api.py (Linux only).
+For the master and each worker it reads /proc/<pid>/smaps_rollup and reports
+RSS, PSS and USS (unique set size: pages only that process holds). USS is
+what each extra worker really costs.
+
+Usage:
+    # Report on a running server
+    python benchmarks/worker_memory.py --pid <gunicorn master pid>
+
+    # Start gunicorn with and without preloading and compare
+    python benchmarks/worker_memory.py --start --workers 4 [--requests 200]
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+
+SAMPLE_BODY = json.dumps({"country": "India", "visa_type": "Student", "application_date": "2024-06-15"}).encode()
+
+
+def read_memory(pid):
+    """RSS, PSS and USS of one process in MiB."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    uss = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return {
+        "rss_mib": round(fields.get("Rss", 0) / 1024, 1),
+        "pss_mib": round(fields.get("Pss", 0) / 1024, 1),
+        "uss_mib": round(uss / 1024, 1),
+    }
+
+
+def child_pids(pid):
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; ppid follows the closing paren
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def memory_report(master_pid):
+    workers = [{"pid": pid, **read_memory(pid)} for pid in child_pids(master_pid)]
+    return {
+        "master": {"pid": master_pid, **read_memory(master_pid)},
+        "workers": workers,
+        "total_pss_mib": round(read_memory(master_pid)["pss_mib"] + sum(w["pss_mib"] for w in workers), 1),
+        "mean_worker_uss_mib": round(sum(w["uss_mib"] for w in workers) / max(1, len(workers)), 1),
+    }
+
+
+def _post(url):
+    req = urllib.request.Request(url, data=SAMPLE_BODY, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return resp.status
+
+
+def run_server(workers, preload, port, n_requests, env_overrides):
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers), PRELOAD_MODEL="1" if preload else "0")
+    env.update(env_overrides)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"],
+        cwd=SRC_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}"
+        for _ in range(300):
+            try:
+                urllib.request.urlopen(url + "/health", timeout=1)
+                break
+            except OSError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError("gunicorn did not start")
+        # Spread enough requests that every worker has loaded and used the model
+        for _ in range(n_requests):
+            _post(url + "/predict")
+        return memory_report(proc.pid)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+
+
+def print_report(title, report):
+    print(f"\n{title}")
+    print(f"  {'process':<14}{'pid':>8}{'RSS MiB':>10}{'PSS MiB':>10}{'USS MiB':>10}")
+    rows = [("master", report["master"])] + [(f"worker {i}", w) for i, w in enumerate(report["workers"])]
+    for name, m in rows:
+        print(f"  {name:<14}{m['pid']:>8}{m['rss_mib']:>10}{m['pss_mib']:>10}{m['uss_mib']:>10}")
+    print(f"  total PSS: {report['total_pss_mib']} MiB, mean worker USS: {report['mean_worker_uss_mib']} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pid", type=int, help="PID of a running gunicorn master")
+    parser.add_argument("--start", action="store_true", help="Start gunicorn with and without preloading")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=5057)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--model", default=os.path.join(ROOT_DIR, "models", "visa_processing_model.pkl"))
+    parser.add_argument("--prep", default=os.path.join(ROOT_DIR, "data", "preprocessing_info.pkl"))
+    parser.add_argument("--json", help="Write the report(s) to this file")
+    args = parser.parse_args()
+
+    if args.pid:
+        reports = {"running": memory_report(args.pid)}
+    elif args.start:
+        paths = {"MODEL_PATH": args.model, "PREPROCESS_PATH": args.prep}
+        reports = {
+            "per_worker_load": run_server(args.workers, False, args.port, args.requests, paths),
+            "preloaded": run_server(args.workers, True, args.port, args.requests, paths),
+        }
+    else:
+        parser.error("pass --pid or --start")
+
+    for title, report in reports.items():
+        print_report(title, report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
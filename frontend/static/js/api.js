@@ -18,23 +18,34 @@ function setBackendUrl(url) {
 }
 
 // API call function
+// Uses the cacheable GET /predict: the browser (and any proxy) keeps the
+// answer for its Cache-Control max-age and revalidates it with the ETag, so
+// repeating a query costs at most a 304. Backends without GET /predict
+// (405) get the original POST.
 async function predictVisa(country, visa_type, application_date, processing_office = null) {
   try {
     console.log('Calling backend at:', BACKEND_API_URL);
     console.log('Request data:', { country, visa_type, application_date, processing_office });
-    
-    const response = await fetch(`${BACKEND_API_URL}/predict`, {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify({
-        country,
-        visa_type,
-        application_date,
-        processing_office
-      })
-    });
+
+    const params = new URLSearchParams({ country, visa_type, application_date });
+    if (processing_office) {
+      params.set('processing_office', processing_office);
+    }
+    let response = await fetch(`${BACKEND_API_URL}/predict?${params}`);
+    if (response.status === 405) {
+      response = await fetch(`${BACKEND_API_URL}/predict`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+          country,
+          visa_type,
+          application_date,
+          processing_office
+        })
+      });
+    }
 
     console.log('Response status:', response.status);
     const data = await response.json();
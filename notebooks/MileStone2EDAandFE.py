@@ -5,84 +5,21 @@ import pandas as pd
 from sklearn.linear_model import LinearRegression
 import matplotlib.pyplot as plt
 import seaborn as sns
+from feature_cache import load_or_build
 
 pd.set_option("display.max_columns", None)
 
 # LOAD FULL VISA DATASET FROM CSV (visa_dataset.csv created in Milestone 1)
 csv_path = os.path.join(os.path.dirname(__file__), "..", "visa_dataset.csv")
-df = pd.read_csv(csv_path)
-print("Original DataFrame loaded from visa_dataset.csv:\n", df.head())
-
-# HANDLE MISSING VALUES
-# Fill missing dates with mode
-df["application_date"] = pd.to_datetime(df["application_date"])
-df["decision_date"] = pd.to_datetime(df["decision_date"])
-df["application_date"] = df["application_date"].fillna(df["application_date"].mode()[0])
-df["decision_date"] = df["decision_date"].fillna(df["decision_date"].mode()[0])
-
-# Fill missing categorical values with 'Unknown'
-df["country"] = df["country"].fillna("Unknown")
-df["visa_type"] = df["visa_type"].fillna("Unknown")
-
-# CALCULATE PROCESSING DAYS
-df["processing_days"] = (df["decision_date"] - df["application_date"]).dt.days
-# Any negative processing days → set as NaN
-df.loc[df["processing_days"] < 0, "processing_days"] = np.nan
-
-
-# ADD PROCESSING OFFICE (based on country)
-office_map = {
-    "India": "New Delhi",
-    "United States": "Washington DC",
-    "United Kingdom": "London",
-    "Canada": "Ottawa",
-    "Australia": "Canberra",
-    "Germany": "Berlin",
-    "France": "Paris",
-    "Japan": "Tokyo",
-    "Brazil": "Brasilia",
-    "Unknown": "Unknown"
-}
-df["processing_office"] = df["country"].map(office_map)
-
-
-# FEATURE ENGINEERING
-
-# Application month
-df["application_month"] = df["application_date"].dt.month
-
-# Season: Peak vs Off-Peak
-df["season"] = df["application_month"].apply(lambda x: "Peak" if x in [1,2,12] else "Off-Peak")
-
-# Country average processing days
-country_avg = df.groupby("country")["processing_days"].mean()
-df["country_avg"] = df["country"].map(country_avg)
-# Fill NaN in country_avg with overall mean
-df["country_avg"] = df["country_avg"].fillna(df["processing_days"].mean())
-
-# Visa type average processing days
-visa_avg = df.groupby("visa_type")["processing_days"].mean()
-df["visa_avg"] = df["visa_type"].map(visa_avg)
-# Fill NaN in visa_avg with overall mean
-df["visa_avg"] = df["visa_avg"].fillna(df["processing_days"].mean())
-
-print("\nDataFrame after feature engineering:\n", df)
-
-# ENCODING CATEGORICAL FEATURES
-df_encoded = pd.get_dummies(df, columns=["country", "visa_type", "season", "processing_office"])
-print("\nEncoded DataFrame ready for ML:\n", df_encoded)
+# Same features as Milestone3 (features.py): ingestion, office map, month,
+# season, country / visa averages and one-hot encoding, built once per CSV
+# and shared with Milestone3 through the feature cache
+X, y, feature_meta, cache_hit = load_or_build(csv_path)
+print(f"Features {'loaded from cache' if cache_hit else 'built and cached'}: {X.shape[0]} rows, {X.shape[1]} columns")
+print("\nEncoded DataFrame ready for ML:\n", X)
 
 
 # MACHINE LEARNING
-# Drop rows with missing processing_days (target variable)
-df_ml = df_encoded.dropna(subset=["processing_days"])
-
-X = df_ml.drop(columns=["processing_days", "application_date", "decision_date"])
-y = df_ml["processing_days"]
-
-# Fill any remaining NaN values in features with 0 (shouldn't happen, but safety check)
-X = X.fillna(0)
-
 model = LinearRegression()
 model.fit(X, y)
 
@@ -110,7 +47,7 @@ print("\nPredicted Processing Time (India + Student + Peak + New Delhi):", round
 
 # VISUALIZATIONS
 # Filter df to exclude NaN processing_days for visualizations
-df_clean = df.dropna(subset=["processing_days"])
+df_clean = X[["application_month"]].assign(processing_days=y)
 
 sns.histplot(df_clean["processing_days"], kde=True)
 plt.title("Distribution of Visa Processing Days")
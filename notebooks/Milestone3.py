@@ -6,91 +6,44 @@ from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from sklearn.model_selection import GridSearchCV
 import matplotlib.pyplot as plt
 import seaborn as sns
 import joblib
 import pickle
+import sys
+
+# Serving helpers (feature encoder, prediction table) live in src/
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..", "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+from lookup_table import build_lookup_table, save_lookup_table
+from model_registry import ModelRegistry
+from tree_engine import compile_model, save_compiled
+from features import OFFICE_MAP
+from feature_cache import load_or_build
+from online_update import linear_sufficient_stats
+from experiments import ExperimentRunner
+from distill import DEFAULT_MAX_GAP, distill
+from compaction import DEFAULT_MAX_BYTES, DEFAULT_MAX_NODES, DEFAULT_MIN_GAIN, compact_model, print_report
+from tuning import TrialStore, successive_halving
 
 pd.set_option("display.max_columns", None)
 
+# Hyperparameter search: "grid" (every combination, 5 folds) or "halving"
+# (successive halving, resumable from the trial store below)
+TUNING_MODE = os.environ.get("TUNING_MODE", "grid")
+TUNING_RESOURCE = os.environ.get("TUNING_RESOURCE", "n_samples")  # or "n_estimators"
+TUNING_STORE = os.environ.get("TUNING_STORE", os.path.join(os.path.dirname(__file__), "..", "tuning_trials.sqlite"))
+
 # LOAD FULL VISA DATASET FROM CSV (visa_dataset.csv created in Milestone 1)
 print("\n===== MILESTONE 3: PREDICTIVE MODELING =====\n")
 csv_path = os.path.join(os.path.dirname(__file__), "..", "visa_dataset.csv")
-df = pd.read_csv(csv_path)
-print("Original DataFrame loaded from visa_dataset.csv:\n", df.head())
-
-# HANDLE MISSING VALUES
-# Fill missing dates with mode
-df["application_date"] = pd.to_datetime(df["application_date"])
-df["decision_date"] = pd.to_datetime(df["decision_date"])
-df["application_date"] = df["application_date"].fillna(df["application_date"].mode()[0])
-df["decision_date"] = df["decision_date"].fillna(df["decision_date"].mode()[0])
-
-# Fill missing categorical values with 'Unknown'
-df["country"] = df["country"].fillna("Unknown")
-df["visa_type"] = df["visa_type"].fillna("Unknown")
-
-# CALCULATE PROCESSING DAYS
-df["processing_days"] = (df["decision_date"] - df["application_date"]).dt.days
-# Any negative processing days -> set as NaN
-df.loc[df["processing_days"] < 0, "processing_days"] = np.nan
-
-# ADD PROCESSING OFFICE (based on country)
-office_map = {
-    "India": "New Delhi",
-    "United States": "Washington DC",
-    "United Kingdom": "London",
-    "Canada": "Ottawa",
-    "Australia": "Canberra",
-    "Germany": "Berlin",
-    "France": "Paris",
-    "Japan": "Tokyo",
-    "Brazil": "Brasilia",
-    "Italy": "Rome",
-    "China": "Beijing",
-    "Netherlands": "Amsterdam",
-    "Spain": "Madrid",
-    "Mexico": "Mexico City",
-    "South Korea": "Seoul",
-    "Unknown": "Unknown"
-}
-df["processing_office"] = df["country"].map(office_map).fillna("Unknown")
-
-# FEATURE ENGINEERING
-# Application month
-df["application_month"] = df["application_date"].dt.month
-
-# Season: Peak vs Off-Peak
-df["season"] = df["application_month"].apply(lambda x: "Peak" if x in [1,2,12] else "Off-Peak")
-
-# Country average processing days
-country_avg = df.groupby("country")["processing_days"].mean()
-df["country_avg"] = df["country"].map(country_avg)
-# Fill NaN in country_avg with overall mean
-df["country_avg"] = df["country_avg"].fillna(df["processing_days"].mean())
-
-# Visa type average processing days
-visa_avg = df.groupby("visa_type")["processing_days"].mean()
-df["visa_avg"] = df["visa_type"].map(visa_avg)
-# Fill NaN in visa_avg with overall mean
-df["visa_avg"] = df["visa_avg"].fillna(df["processing_days"].mean())
-
-print("\nDataFrame after feature engineering:\n", df.head())
-
-# ENCODING CATEGORICAL FEATURES
-df_encoded = pd.get_dummies(df, columns=["country", "visa_type", "season", "processing_office"], drop_first=True)
-print("\nEncoded DataFrame ready for ML:\n", df_encoded.head())
-
-# PREPARE DATA FOR MODELING
-# Drop rows with missing processing_days (target variable)
-df_ml = df_encoded.dropna(subset=["processing_days"])
-
-X = df_ml.drop(columns=["processing_days", "application_date", "decision_date"])
-y = df_ml["processing_days"]
-
-# Fill any remaining NaN values in features with 0
-X = X.fillna(0)
+# Ingestion, feature engineering and one-hot encoding (features.py) run once
+# per CSV; later runs memory-map X / y from the feature cache
+X, y, feature_meta, cache_hit = load_or_build(csv_path)
+print(f"Features {'loaded from cache' if cache_hit else 'built and cached'}: {X.shape[0]} rows, {X.shape[1]} columns")
+print("\nEncoded features ready for ML:\n", X.head())
+office_map = OFFICE_MAP
 
 # TRAIN-TEST SPLIT
 X_train, X_test, y_train, y_test = train_test_split(
@@ -101,64 +54,26 @@ print(f"\nTraining set size: {len(X_train)}")
 print(f"Test set size: {len(X_test)}")
 
 
-# MODEL 1: LINEAR REGRESSION (BASELINE)
-
-print("\n" + "="*50)
-print("MODEL 1: LINEAR REGRESSION (BASELINE)")
-print("="*50)
-
-lr_model = LinearRegression()
-lr_model.fit(X_train, y_train)
-
-y_pred_lr = lr_model.predict(X_test)
-
-mae_lr = mean_absolute_error(y_test, y_pred_lr)
-rmse_lr = np.sqrt(mean_squared_error(y_test, y_pred_lr))
-r2_lr = r2_score(y_test, y_pred_lr)
-
-print(f"MAE: {mae_lr:.2f}")
-print(f"RMSE: {rmse_lr:.2f}")
-print(f"R² Score: {r2_lr:.4f}")
-
-
-# MODEL 2: RANDOM FOREST REGRESSOR
-
-print("\n" + "="*50)
-print("MODEL 2: RANDOM FOREST REGRESSOR")
-print("="*50)
-
-rf_model = RandomForestRegressor(n_estimators=100, random_state=42)
-rf_model.fit(X_train, y_train)
-
-y_pred_rf = rf_model.predict(X_test)
-
-mae_rf = mean_absolute_error(y_test, y_pred_rf)
-rmse_rf = np.sqrt(mean_squared_error(y_test, y_pred_rf))
-r2_rf = r2_score(y_test, y_pred_rf)
-
-print(f"MAE: {mae_rf:.2f}")
-print(f"RMSE: {rmse_rf:.2f}")
-print(f"R² Score: {r2_rf:.4f}")
-
-
-# MODEL 3: GRADIENT BOOSTING REGRESSOR
-
-print("\n" + "="*50)
-print("MODEL 3: GRADIENT BOOSTING REGRESSOR")
-print("="*50)
-
-gb_model = GradientBoostingRegressor(n_estimators=100, random_state=42)
-gb_model.fit(X_train, y_train)
-
-y_pred_gb = gb_model.predict(X_test)
-
-mae_gb = mean_absolute_error(y_test, y_pred_gb)
-rmse_gb = np.sqrt(mean_squared_error(y_test, y_pred_gb))
-r2_gb = r2_score(y_test, y_pred_gb)
-
-print(f"MAE: {mae_gb:.2f}")
-print(f"RMSE: {rmse_gb:.2f}")
-print(f"R² Score: {r2_gb:.4f}")
+# MODELS: LINEAR REGRESSION (BASELINE), RANDOM FOREST, GRADIENT BOOSTING
+# All three fit at once in a process pool sharing one memory-mapped X_train
+experiments = [
+    ("Linear Regression", LinearRegression()),
+    ("Random Forest", RandomForestRegressor(n_estimators=100, random_state=42)),
+    ("Gradient Boosting", GradientBoostingRegressor(n_estimators=100, random_state=42)),
+]
+runner = ExperimentRunner(X_train, y_train, X_test, y_test)
+comparison_df, fitted = runner.compare(experiments)
+lr_model, y_pred_lr = fitted["Linear Regression"]
+rf_model, y_pred_rf = fitted["Random Forest"]
+gb_model, y_pred_gb = fitted["Gradient Boosting"]
+
+for i, row in comparison_df.iterrows():
+    print("\n" + "="*50)
+    print(f"MODEL {i + 1}: {row['Model'].upper()}")
+    print("="*50)
+    print(f"MAE: {row['MAE']:.2f}")
+    print(f"RMSE: {row['RMSE']:.2f}")
+    print(f"R² Score: {row['R² Score']:.4f}")
 
 
 # MODEL COMPARISON
@@ -167,13 +82,6 @@ print("\n" + "="*50)
 print("MODEL COMPARISON SUMMARY")
 print("="*50)
 
-comparison_df = pd.DataFrame({
-    'Model': ['Linear Regression', 'Random Forest', 'Gradient Boosting'],
-    'MAE': [mae_lr, mae_rf, mae_gb],
-    'RMSE': [rmse_lr, rmse_rf, rmse_gb],
-    'R² Score': [r2_lr, r2_rf, r2_gb]
-})
-
 print(comparison_df.to_string(index=False))
 
 # Select best model based on lowest RMSE (or highest R²)
@@ -195,14 +103,17 @@ if best_model_name == "Random Forest":
         'max_depth': [10, 20, None],
         'min_samples_split': [2, 5, 10]
     }
-    grid_search_rf = GridSearchCV(
-        RandomForestRegressor(random_state=42),
-        param_grid_rf,
-        cv=5,
-        scoring='neg_mean_squared_error',
-        n_jobs=-1
-    )
-    grid_search_rf.fit(X_train, y_train)
+    if TUNING_MODE == "halving":
+        with TrialStore(TUNING_STORE) as store:
+            grid_search_rf = successive_halving(
+                runner, RandomForestRegressor(random_state=42), param_grid_rf, store, resource=TUNING_RESOURCE, cv=5
+            )
+        print(f"Trials run: {grid_search_rf.n_trials_run}, reused from {TUNING_STORE}: {grid_search_rf.n_trials_reused}")
+    else:
+        # Same search as GridSearchCV(cv=5, scoring='neg_mean_squared_error'),
+        # spread over the runner's pool; the n_estimators values share one
+        # growing ensemble per (other parameters, fold)
+        grid_search_rf = runner.grid_search(RandomForestRegressor(random_state=42), param_grid_rf, cv=5)
     
     best_rf_model = grid_search_rf.best_estimator_
     y_pred_tuned = best_rf_model.predict(X_test)
@@ -216,14 +127,17 @@ elif best_model_name == "Gradient Boosting":
         'learning_rate': [0.01, 0.1, 0.2],
         'max_depth': [3, 5, 7]
     }
-    grid_search_gb = GridSearchCV(
-        GradientBoostingRegressor(random_state=42),
-        param_grid_gb,
-        cv=5,
-        scoring='neg_mean_squared_error',
-        n_jobs=-1
-    )
-    grid_search_gb.fit(X_train, y_train)
+    if TUNING_MODE == "halving":
+        with TrialStore(TUNING_STORE) as store:
+            grid_search_gb = successive_halving(
+                runner, GradientBoostingRegressor(random_state=42), param_grid_gb, store, resource=TUNING_RESOURCE, cv=5
+            )
+        print(f"Trials run: {grid_search_gb.n_trials_run}, reused from {TUNING_STORE}: {grid_search_gb.n_trials_reused}")
+    else:
+        # Same search as GridSearchCV(cv=5, scoring='neg_mean_squared_error'),
+        # spread over the runner's pool; the n_estimators values share one
+        # growing ensemble per (other parameters, fold)
+        grid_search_gb = runner.grid_search(GradientBoostingRegressor(random_state=42), param_grid_gb, cv=5)
     
     best_gb_model = grid_search_gb.best_estimator_
     y_pred_tuned = best_gb_model.predict(X_test)
@@ -236,6 +150,8 @@ else:
     y_pred_tuned = y_pred_lr
     print("Linear Regression - No hyperparameters to tune")
 
+runner.close()
+
 # Evaluate tuned model
 mae_tuned = mean_absolute_error(y_test, y_pred_tuned)
 rmse_tuned = np.sqrt(mean_squared_error(y_test, y_pred_tuned))
@@ -261,26 +177,93 @@ elif best_model_name == "Gradient Boosting":
 else:
     final_model = lr_model
 
+# Compact it: prune splits gaining less than MODEL_MIN_GAIN, tightening the
+# threshold until the model fits MODEL_MAX_NODES nodes and MODEL_MAX_MB of pickle
+final_model, compaction_report = compact_model(
+    final_model, X_test, y_test,
+    min_gain=float(os.environ.get("MODEL_MIN_GAIN", DEFAULT_MIN_GAIN)),
+    max_nodes=int(os.environ.get("MODEL_MAX_NODES", DEFAULT_MAX_NODES)),
+    max_bytes=int(float(os.environ.get("MODEL_MAX_MB", DEFAULT_MAX_BYTES / 2**20)) * 2**20),
+)
+print("\nModel compaction:")
+print_report(compaction_report)
+# The published metrics describe the compacted model that is saved
+y_pred_final = final_model.predict(X_test)
+
 # Save the model
 model_path = os.path.join(os.path.dirname(__file__), "..", "visa_processing_model.pkl")
 joblib.dump(final_model, model_path)
 print(f"Model saved to: {model_path}")
 
+# Save a numpy-only copy of the model for serving without scikit-learn,
+# thresholds and leaf values in float32 (split decisions stay exact)
+compiled_path = os.path.join(os.path.dirname(__file__), "..", "visa_processing_model.npz")
+save_compiled(compiled_path, compile_model(final_model, dtype=np.float32))
+print(f"Compiled model saved to: {compiled_path}")
+
 # Save preprocessing information (feature names, office map, etc.)
 preprocessing_info = {
     'feature_names': list(X.columns),
     'office_map': office_map,
     'model_type': best_model_name,
-    'mean_processing_days': df['processing_days'].mean(),
-    'country_avg': country_avg.to_dict(),
-    'visa_avg': visa_avg.to_dict()
+    'mean_processing_days': feature_meta['mean_processing_days'],
+    'country_avg': feature_meta['country_avg'],
+    'visa_avg': feature_meta['visa_avg'],
+    # Counts behind the averages, so notebooks/online_update.py can fold in new rows
+    'country_count': feature_meta['country_count'],
+    'visa_count': feature_meta['visa_count'],
+    'processing_days_count': feature_meta['processing_days_count']
 }
+if final_model is lr_model:
+    preprocessing_info['linear_stats'] = linear_sufficient_stats(X_train, y_train)
 
 preprocessing_path = os.path.join(os.path.dirname(__file__), "..", "preprocessing_info.pkl")
 with open(preprocessing_path, 'wb') as f:
     pickle.dump(preprocessing_info, f)
 print(f"Preprocessing info saved to: {preprocessing_path}")
 
+# Export the final model evaluated over every (country, visa type, month, office)
+# combination, so src/api.py can serve it with SERVING_MODE=table
+lookup = build_lookup_table(final_model, preprocessing_info)
+table_path = os.path.join(os.path.dirname(__file__), "..", "prediction_table.npz")
+save_lookup_table(table_path, lookup)
+print(f"Prediction table {lookup['table'].shape} saved to: {table_path}")
+
+# Distill the final model into a small compiled student (SERVING_MODE=student)
+# fit to its predictions over the whole input domain; the smallest candidate
+# within STUDENT_MAX_GAP days of the teacher's MAE on a validation slice of
+# the training rows is kept (the test split is only reported)
+student_max_gap = float(os.environ.get("STUDENT_MAX_GAP", DEFAULT_MAX_GAP))
+student, student_report = distill(final_model, preprocessing_info, X_train, y_train, X_test, y_test, max_gap=student_max_gap)
+student_path = os.path.join(os.path.dirname(__file__), "..", "visa_processing_student.npz")
+save_compiled(student_path, student)
+student_row = student_report[student_report["Chosen"]].iloc[0]
+print("\nDistilled students:\n", student_report.to_string(index=False))
+print(f"Student '{student_row['Model']}' saved to: {student_path} "
+      f"({student_row['Size KB']} KB vs {student_report['Size KB'][0]} KB, "
+      f"validation gap {student_row['Val gap']:+.3f}, test gap {student_row['Gap']:+.3f} days)")
+
+# Publish this run's artifacts together as one immutable registry version.
+# An API started with MODEL_REGISTRY=<registry dir> swaps to it without a
+# restart (and can roll back to the previous version).
+registry_dir = os.environ.get("MODEL_REGISTRY", os.path.join(os.path.dirname(__file__), "..", "model_registry"))
+registry = ModelRegistry(registry_dir)
+model_version = registry.publish(
+    {"model": model_path, "compiled": compiled_path, "student": student_path, "table": table_path, "prep": preprocessing_path},
+    metadata={
+        "model_type": best_model_name,
+        "mae": compaction_report["mae_after"],
+        "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred_final))),
+        "r2": float(r2_score(y_test, y_pred_final)),
+        "compaction": compaction_report,
+        "student_type": student_row["Model"],
+        "student_mae": float(student_row["MAE"]),
+        "n_train": int(len(X_train)),
+        "n_test": int(len(X_test)),
+    },
+)
+print(f"Published model version {model_version} to: {registry.root}")
+
 # ============================================
 # VISUALIZATIONS
 # ============================================
@@ -1,77 +1,29 @@
 import os
-import pickle
-import joblib
+import sys
 from datetime import datetime
 try:
-    from flask import Flask, request, render_template_string, redirect, url_for
+    from flask import Flask, make_response, request, render_template_string, redirect, url_for
     HAS_FLASK = True
 except Exception:
     HAS_FLASK = False
-import pandas as pd
 
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-MODEL_PATH = os.path.join(BASE_DIR, "visa_processing_model.pkl")
-PREPROCESS_PATH = os.path.join(BASE_DIR, "preprocessing_info.pkl")
+MODEL_PATH = os.environ.get("MODEL_PATH", os.path.join(BASE_DIR, "visa_processing_model.pkl"))
+PREPROCESS_PATH = os.environ.get("PREPROCESS_PATH", os.path.join(BASE_DIR, "preprocessing_info.pkl"))
+# Cache-Control max-age (seconds) of GET /predict result pages
+PREDICT_CACHE_MAX_AGE = int(os.environ.get("PREDICT_CACHE_MAX_AGE", 300))
+
+# Share the serving code (and its per-process artifact cache) with src/api.py
+SRC_DIR = os.path.join(BASE_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+from predictor import build_feature_vector, get_predictor
 
 
 def load_artifacts():
-    if not os.path.exists(MODEL_PATH) or not os.path.exists(PREPROCESS_PATH):
-        raise FileNotFoundError("Model or preprocessing info not found. Run Milestone3 first.")
-    model = joblib.load(MODEL_PATH)
-    with open(PREPROCESS_PATH, "rb") as f:
-        prep = pickle.load(f)
-    return model, prep
-
-
-def build_feature_vector(prep, country, visa_type, application_date_str, processing_office=None):
-    feature_names = prep["feature_names"]
-
-    # Base row: zeros
-    row = {c: 0 for c in feature_names}
-
-    # Parse date
-    try:
-        app_date = pd.to_datetime(application_date_str)
-    except Exception:
-        app_date = pd.to_datetime("today")
-
-    application_month = int(app_date.month)
-    season = "Peak" if application_month in [1, 2, 12] else "Off-Peak"
-
-    # Numeric features
-    if "application_month" in row:
-        row["application_month"] = application_month
-    if "country_avg" in row:
-        row["country_avg"] = float(prep.get("country_avg", {}).get(country, prep.get("mean_processing_days", 0)))
-    if "visa_avg" in row:
-        row["visa_avg"] = float(prep.get("visa_avg", {}).get(visa_type, prep.get("mean_processing_days", 0)))
-
-    # One-hot country
-    country_col = f"country_{country}"
-    if country_col in row:
-        row[country_col] = 1
-
-    # One-hot visa type
-    visa_col = f"visa_type_{visa_type}"
-    if visa_col in row:
-        row[visa_col] = 1
-
-    # Season
-    season_col = f"season_{season}"
-    if season_col in row:
-        row[season_col] = 1
-
-    # Processing office (use mapping if not provided)
-    office_map = prep.get("office_map", {})
-    mapped_office = processing_office or office_map.get(country, "Unknown")
-    office_col = f"processing_office_{mapped_office}"
-    if office_col in row:
-        row[office_col] = 1
-
-    # Ensure order and return DataFrame
-    df = pd.DataFrame([row], columns=feature_names).fillna(0)
-    return df
+    predictor = get_predictor(MODEL_PATH, PREPROCESS_PATH)
+    return predictor.model, predictor.prep
 
 
 def predict(model, prep, country, visa_type, application_date_str, processing_office=None):
@@ -120,16 +72,28 @@ if HAS_FLASK:
             application_date = request.form.get("application_date") or request.args.get("application_date", datetime.today().strftime("%Y-%m-%d"))
             processing_office = request.form.get("processing_office") or request.args.get("processing_office", None)
             
-            model, prep = load_artifacts()
-            days = predict(model, prep, country, visa_type, application_date, processing_office)
+            predictor = get_predictor(MODEL_PATH, PREPROCESS_PATH)
+            # GET result pages with an explicit date are cacheable: the ETag
+            # covers the model version and the normalized inputs
+            etag = None
+            if request.method == "GET" and "application_date" in request.args:
+                etag = predictor.etag(country, visa_type, application_date, processing_office)
+            if etag is not None and request.if_none_match.contains_weak(etag):
+                response = make_response("", 304)
+            else:
+                days = predictor.predict_one(country, visa_type, application_date, processing_office)
+                response = make_response(render_template_string(f"<html><body style='font-family:Inter, Poppins, sans-serif;background:#07104a;color:#eaf0ff;display:flex;align-items:center;justify-content:center;height:100vh'><div style='background:rgba(255,255,255,0.02);padding:24px;border-radius:12px;box-shadow:0 20px 40px rgba(0,0,0,0.6)'><h2>Estimated processing days: {days}</h2><p><a href='/'>Back</a></p></div></body></html>"))
         except Exception as e:
             return f"<html><body style='font-family:Inter, Poppins, sans-serif;background:#07104a;color:#eaf0ff;padding:20px'><h2>Error during prediction:</h2><p>{str(e)}</p><p><a href='/'>Back</a></p></body></html>", 500
         
-        return render_template_string(f"<html><body style='font-family:Inter, Poppins, sans-serif;background:#07104a;color:#eaf0ff;display:flex;align-items:center;justify-content:center;height:100vh'><div style='background:rgba(255,255,255,0.02);padding:24px;border-radius:12px;box-shadow:0 20px 40px rgba(0,0,0,0.6)'><h2>Estimated processing days: {days}</h2><p><a href='/'>Back</a></p></div></body></html>")
+        if etag is not None:
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = f"public, max-age={PREDICT_CACHE_MAX_AGE}"
+        return response
 
 
 def run_tests():
-    model, prep = load_artifacts()
+    predictor = get_predictor(MODEL_PATH, PREPROCESS_PATH)
     samples = [
         {"country": "India", "visa_type": "Student", "application_date": "2024-09-02", "office": "New Delhi"},
         {"country": "United Kingdom", "visa_type": "Work", "application_date": "2024-04-29", "office": "London"},
@@ -138,7 +102,7 @@ def run_tests():
     ]
     print("Running sample predictions:")
     for s in samples:
-        days = predict(model, prep, s["country"], s["visa_type"], s["application_date"], s.get("office"))
+        days = predictor.predict_one(s["country"], s["visa_type"], s["application_date"], s.get("office"))
         print(f"{s['country']} | {s['visa_type']} | {s['application_date']} -> {days} days")
 
 
@@ -0,0 +1,239 @@
+"""
+Post-training compaction of tree models under a size budget.
+Milestone3's search may pick max_depth=None, and fully grown trees keep
+growing with the data. compact_model() prunes, bottom-up, every split whose
+weighted impurity decrease (the quantity scikit-learn's
+min_impurity_decrease bounds) is below min_gain and whose children are both
+leaves. A pruned node becomes a leaf holding its training mean, which is
+only the right leaf value for squared-error trees: models fitted with
+another criterion or loss are left unpruned (see pruning_blocker). When
+max_nodes or max_bytes are set, the threshold is raised to the smallest
+split gain that meets both budgets. The result is still a scikit-learn
+model, so model.pkl and the compiled .npz (stored in float32 by
+tree_engine) shrink together.
+
+    model, report = compact_model(final_model, X_test, y_test, min_gain=1e-3, max_nodes=200_000)
+    print_report(report)
+"""
+
+import copy
+import os
+import pickle
+import sys
+
+import numpy as np
+from sklearn.metrics import mean_absolute_error
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+from tree_engine import compile_model
+
+DEFAULT_MIN_GAIN = 1e-3
+DEFAULT_MAX_NODES = 500_000
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def tree_estimators(model):
+    """The DecisionTreeRegressors inside model; empty for models without trees."""
+    name = type(model).__name__
+    if name in ("RandomForestRegressor", "ExtraTreesRegressor"):
+        return list(model.estimators_)
+    if name == "GradientBoostingRegressor":
+        return [stage[0] for stage in model.estimators_]
+    if name == "DecisionTreeRegressor":
+        return [model]
+    return []
+
+
+# Criteria whose node value is the mean target and impurity its variance
+SQUARED_CRITERIA = ("squared_error", "friedman_mse")
+
+
+def pruning_blocker(model):
+    """Why model's trees cannot be pruned, or None when they can."""
+    trees = tree_estimators(model)
+    if not trees:
+        return f"{type(model).__name__} has no trees"
+    # Other losses fit trees to gradients and re-fit their leaf values
+    loss = getattr(model, "loss", "squared_error") if type(model).__name__ == "GradientBoostingRegressor" else "squared_error"
+    if loss != "squared_error":
+        return f"loss={loss!r}: node values are gradient means, not leaf values"
+    criterion = trees[0].criterion
+    if criterion not in SQUARED_CRITERIA:
+        return f"criterion={criterion!r}: node values are not the mean target"
+    return None
+
+
+def split_gains(nodes):
+    """Weighted impurity decrease of every node, as a fraction of the root weight; NaN for leaves."""
+    left, right = nodes["left_child"], nodes["right_child"]
+    w, imp = nodes["weighted_n_node_samples"], nodes["impurity"]
+    split = left != -1
+    gains = np.full(len(nodes), np.nan)
+    gains[split] = (w[split] * imp[split] - w[left[split]] * imp[left[split]] - w[right[split]] * imp[right[split]]) / w[0]
+    return gains
+
+
+def _pruned_splits(nodes, gains, min_gain):
+    # Children always come after their parent, so one reverse pass is bottom-up
+    left, right = nodes["left_child"], nodes["right_child"]
+    keep = left != -1
+    for i in np.flatnonzero(keep)[::-1]:
+        if gains[i] < min_gain and not keep[left[i]] and not keep[right[i]]:
+            keep[i] = False
+    return keep
+
+
+def prune_tree(tree, min_gain, gains=None):
+    """Collapse tree's weak splits into leaves in place; returns the new node count."""
+    state = tree.tree_.__getstate__()
+    nodes, values = state["nodes"], state["values"]
+    if gains is None:
+        gains = split_gains(nodes)
+    keep = _pruned_splits(nodes, gains, min_gain)
+
+    # Renumber the nodes still reachable, in pre-order like scikit-learn
+    order, depth = [], []
+    stack = [(0, 0)]
+    while stack:
+        i, d = stack.pop()
+        order.append(i)
+        depth.append(d)
+        if keep[i]:
+            stack.append((nodes["right_child"][i], d + 1))
+            stack.append((nodes["left_child"][i], d + 1))
+    order = np.array(order)
+    new_index = np.full(len(nodes), -1)
+    new_index[order] = np.arange(len(order))
+
+    new_nodes = nodes[order].copy()
+    leaf = ~keep[order]
+    new_nodes["left_child"] = np.where(leaf, -1, new_index[nodes["left_child"][order]])
+    new_nodes["right_child"] = np.where(leaf, -1, new_index[nodes["right_child"][order]])
+    new_nodes["feature"][leaf] = -2
+    new_nodes["threshold"][leaf] = -2.0
+    new_nodes["missing_go_to_left"][leaf] = 0
+    tree.tree_.__setstate__({
+        "max_depth": int(max(depth)),
+        "node_count": len(order),
+        "nodes": new_nodes,
+        "values": np.ascontiguousarray(values[order]),
+    })
+    return len(order)
+
+
+def node_count(model):
+    return sum(t.tree_.node_count for t in tree_estimators(model))
+
+
+def pickled_size(model):
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def compiled_size(model, dtype=np.float32):
+    return int(sum(np.asarray(a).nbytes for a in compile_model(model, dtype=dtype).arrays.values()))
+
+
+def _prune_all(model, min_gain, gains):
+    pruned = copy.deepcopy(model)
+    for tree, g in zip(tree_estimators(pruned), gains):
+        prune_tree(tree, min_gain, g)
+    return pruned
+
+
+def compact_model(model, X_test, y_test, min_gain=0.0, max_nodes=None, max_bytes=None):
+    """
+    Prune model's weak splits, tightening min_gain until it fits the budgets.
+    Raises ValueError when even one leaf per tree exceeds them.
+
+    Parameters:
+    -----------
+    model : fitted estimator
+        Squared-error tree ensembles are pruned on a copy; other models are
+        returned as is, with the reason in report['note'].
+    X_test, y_test : array-like
+        Held-out rows for the accuracy delta.
+    min_gain : float
+        Splits whose weighted impurity decrease (squared days, as a fraction
+        of the tree's training weight) is below this are pruned.
+    max_nodes : int, optional
+        Budget for the total node count over all trees.
+    max_bytes : int, optional
+        Budget for the pickled model (model.pkl, the largest artifact).
+
+    Returns:
+    --------
+    model : fitted estimator
+        The compacted copy.
+    report : dict
+        Node count, pickled and compiled (float32) sizes and test MAE
+        before / after, the min_gain finally used and a note (None when
+        the model was pruned).
+    """
+    X_test = np.asarray(X_test, dtype=np.float64)
+    y_test = np.asarray(y_test, dtype=np.float64)
+    mae_before = mean_absolute_error(y_test, model.predict(X_test))
+    report = {
+        "nodes_before": node_count(model),
+        "pickle_bytes_before": pickled_size(model),
+        # Both sizes in float32, the dtype Milestone3 saves the .npz in, so
+        # the difference is pruning alone
+        "compiled_bytes_before": compiled_size(model, np.float32),
+        "mae_before": float(mae_before),
+    }
+
+    note = pruning_blocker(model)
+    if note is None:
+        trees = tree_estimators(model)
+        gains = [split_gains(t.tree_.__getstate__()["nodes"]) for t in trees]
+
+        def within_budget(candidate):
+            return (max_nodes is None or node_count(candidate) <= max_nodes) and (
+                max_bytes is None or pickled_size(candidate) <= max_bytes
+            )
+
+        compact = _prune_all(model, min_gain, gains)
+        if not within_budget(compact):
+            # Pruning only grows with the threshold: binary search the split gains above min_gain
+            levels = np.unique(np.concatenate([g[~np.isnan(g)] for g in gains]))
+            levels = np.append(levels[levels > min_gain], np.inf)
+            lo, hi = 0, len(levels) - 1
+            best = _prune_all(model, np.inf, gains)
+            if not within_budget(best):
+                raise ValueError(
+                    f"Model cannot meet the budget (max_nodes={max_nodes}, max_bytes={max_bytes}) "
+                    f"even with one leaf per tree: {node_count(best)} nodes, {pickled_size(best)} bytes"
+                )
+            min_gain = np.inf
+            while lo < hi:
+                mid = (lo + hi) // 2
+                candidate = _prune_all(model, np.nextafter(levels[mid], np.inf), gains)
+                if within_budget(candidate):
+                    best, min_gain, hi = candidate, float(np.nextafter(levels[mid], np.inf)), mid
+                else:
+                    lo = mid + 1
+            compact = best
+        model = compact
+
+    mae_after = mean_absolute_error(y_test, model.predict(X_test))
+    report.update({
+        "min_gain": float(min_gain),
+        "nodes_after": node_count(model),
+        "pickle_bytes_after": pickled_size(model),
+        "compiled_bytes_after": compiled_size(model, np.float32),
+        "mae_after": float(mae_after),
+        "mae_delta": float(mae_after - mae_before),
+        "note": note,
+    })
+    return model, report
+
+
+def print_report(report):
+    print(f"Nodes:          {report['nodes_before']:>12,} -> {report['nodes_after']:>12,}")
+    print(f"model.pkl:      {report['pickle_bytes_before'] / 1024:>11,.1f}K -> {report['pickle_bytes_after'] / 1024:>11,.1f}K")
+    print(f"compiled .npz:  {report['compiled_bytes_before'] / 1024:>11,.1f}K -> {report['compiled_bytes_after'] / 1024:>11,.1f}K (float32)")
+    print(f"Test MAE:       {report['mae_before']:>12.4f} -> {report['mae_after']:>12.4f} ({report['mae_delta']:+.4f} days)")
+    print(f"min_gain used:  {report['min_gain']:g}")
+    if report["note"] is not None:
+        print(f"Not pruned:     {report['note']}")
@@ -0,0 +1,175 @@
+"""
+Distillation of the Milestone3 model into a small student for serving.
+The model only sees a finite input domain (country, visa type, month,
+office; see lookup_table.domain_rows), so a student can be fit to the
+teacher's own predictions over that whole domain plus the training rows,
+weighted by how often each input occurs. Each candidate student below is
+compiled with tree_engine (float32 storage). A validation slice of the
+training rows is held out of the students' fit; the smallest student whose
+MAE there is within max_gap days of the teacher's is kept. The teacher was
+fit on those rows, so its validation MAE is optimistic and the choice errs
+towards larger students. The test split is only used for the report.
+
+    student, report = distill(final_model, preprocessing_info, X_train, y_train, X_test, y_test)
+    save_compiled("visa_processing_student.npz", student)
+
+report has one row per model (teacher first): node count, compiled size,
+single-row latency, MAE against the teacher over the domain and the test
+rows, the validation gap to the teacher used for selection, and MAE against
+y_test with its gap to the teacher's test MAE.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import train_test_split
+from sklearn.tree import DecisionTreeRegressor
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+from feature_encoder import FeatureEncoder
+from lookup_table import domain_rows
+from tree_engine import compile_model
+
+# Accepted loss in validation MAE (days) against the teacher
+DEFAULT_MAX_GAP = 0.1
+# Share of the training rows held out of the students' fit for selection
+DEFAULT_VAL_SIZE = 0.2
+
+
+def default_students():
+    """Candidate students, roughly smallest first."""
+    return [
+        # One-hot linear model: an additive per-category table
+        ("Additive", LinearRegression()),
+        ("Tree depth 6", DecisionTreeRegressor(max_depth=6, random_state=42)),
+        ("Tree depth 10", DecisionTreeRegressor(max_depth=10, random_state=42)),
+        ("GB 50x3", GradientBoostingRegressor(n_estimators=50, max_depth=3, learning_rate=0.2, random_state=42)),
+        ("GB 100x4", GradientBoostingRegressor(n_estimators=100, max_depth=4, learning_rate=0.1, random_state=42)),
+    ]
+
+
+def compiled_size(compiled):
+    """Bytes of the arrays a compiled model is saved with."""
+    return int(sum(np.asarray(a).nbytes for a in compiled.arrays.values()))
+
+
+def node_count(compiled):
+    return len(compiled.left) if compiled.kind == "trees" else len(compiled.coef)
+
+
+def single_row_us(model, x, repeat=200):
+    model.predict(x)
+    times = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        model.predict(x)
+        times[i] = time.perf_counter() - start
+    return float(np.median(times)) * 1e6
+
+
+def distillation_set(teacher, prep, X_train):
+    """
+    Inputs and teacher targets the students are fit on.
+
+    Returns:
+    --------
+    X : np.ndarray
+        The full input domain followed by the distinct training rows
+    y : np.ndarray
+        teacher.predict(X)
+    weight : np.ndarray
+        1 per domain row, occurrence count per training row
+    X_domain : np.ndarray
+    """
+    X_domain = FeatureEncoder(prep, dtype=np.float64).encode_many(domain_rows(prep)[3])
+    X_seen, counts = np.unique(np.asarray(X_train, dtype=np.float64), axis=0, return_counts=True)
+    X = np.vstack([X_domain, X_seen])
+    weight = np.concatenate([np.ones(len(X_domain)), counts.astype(np.float64)])
+    return X, np.asarray(teacher.predict(X), dtype=np.float64), weight, X_domain
+
+
+def distill(teacher, prep, X_train, y_train, X_test, y_test, students=None, max_gap=DEFAULT_MAX_GAP,
+            val_size=DEFAULT_VAL_SIZE, random_state=42):
+    """
+    Fit candidate students to teacher and keep the smallest accurate one.
+
+    Parameters:
+    -----------
+    teacher : fitted estimator
+        Model trained on prep['feature_names'] (any model compile_model supports).
+    prep : dict
+        Preprocessing info saved by Milestone3.
+    X_train, y_train : array-like
+        Milestone3's training rows. A val_size share (with its labels) is held
+        out for selection; the students fit the teacher's predictions on the rest.
+    X_test, y_test : array-like
+        Milestone3's test rows, only reported on.
+    students : list of (name, unfitted estimator), optional
+        Defaults to default_students().
+    max_gap : float
+        Largest accepted increase in validation MAE (days) over the teacher.
+    val_size : float
+        Share of the training rows held out for selection.
+    random_state : int
+        Seed of the validation split.
+
+    Returns:
+    --------
+    student : CompiledModel
+        The smallest candidate within max_gap, or the one with the lowest
+        validation MAE when none is.
+    report : pd.DataFrame
+        One row per model, teacher first; 'Chosen' marks the student.
+    """
+    X_fit_rows, X_val, _, y_val = train_test_split(
+        np.asarray(X_train, dtype=np.float64), np.asarray(y_train, dtype=np.float64),
+        test_size=val_size, random_state=random_state,
+    )
+    X_fit, y_fit, weight, X_domain = distillation_set(teacher, prep, X_fit_rows)
+    X_test = np.asarray(X_test, dtype=np.float64)
+    y_test = np.asarray(y_test, dtype=np.float64)
+    teacher_domain = y_fit[:len(X_domain)]
+    teacher_test = np.asarray(teacher.predict(X_test), dtype=np.float64)
+    teacher_val_mae = mean_absolute_error(y_val, teacher.predict(X_val))
+    teacher_mae = mean_absolute_error(y_test, teacher_test)
+    x_one = X_test[:1]
+
+    def row(name, compiled):
+        pred_domain = compiled.predict(X_domain)
+        pred_test = compiled.predict(X_test)
+        mae = mean_absolute_error(y_test, pred_test)
+        return {
+            "Model": name,
+            "Nodes": node_count(compiled),
+            "Size KB": round(compiled_size(compiled) / 1024, 1),
+            "Predict us": round(single_row_us(compiled, x_one), 1),
+            "MAE vs teacher (domain)": mean_absolute_error(teacher_domain, pred_domain),
+            "MAE vs teacher (test)": mean_absolute_error(teacher_test, pred_test),
+            "Val gap": mean_absolute_error(y_val, compiled.predict(X_val)) - teacher_val_mae,
+            "MAE": mae,
+            "Gap": mae - teacher_mae,
+        }
+
+    teacher_compiled = compile_model(teacher)
+    rows = [row(f"Teacher ({type(teacher).__name__})", teacher_compiled)]
+    compiled = []
+    for name, estimator in students or default_students():
+        estimator.fit(X_fit, y_fit, sample_weight=weight)
+        student = compile_model(estimator, dtype=np.float32)
+        compiled.append(student)
+        rows.append(row(name, student))
+
+    report = pd.DataFrame(rows)
+    candidates = report.iloc[1:]
+    within = candidates[candidates["Val gap"] <= max_gap]
+    chosen = within["Size KB"].idxmin() if len(within) else candidates["Val gap"].idxmin()
+    report["Chosen"] = report.index == chosen
+    return compiled[chosen - 1], report
@@ -0,0 +1,291 @@
+"""
+Parallel experiment runner for Milestone3 model selection.
+Candidate models and the cross-validation fits of a grid search run as
+independent tasks in one process pool. The training matrix is written once to
+a .npy file (on /dev/shm when available) and every worker memory-maps it, so
+tasks carry only row indices and an unfitted estimator instead of a pickled
+copy of X_train. Results come back in the same shape Milestone3 uses:
+comparison_df for the model comparison and GridSearchCV-style attributes
+(best_params_, best_estimator_, cv_results_) for the search.
+
+    with ExperimentRunner(X_train, y_train, X_test, y_test) as runner:
+        comparison_df, fitted = runner.compare([("Linear Regression", LinearRegression()), ...])
+        search = runner.grid_search(RandomForestRegressor(random_state=42), param_grid, cv=5)
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+# Memory-mapped matrices already opened by this worker, by path
+_MATRICES = {}
+
+
+def _init_worker():
+    # One BLAS/OpenMP thread per worker; the pool provides the parallelism
+    try:
+        from threadpoolctl import threadpool_limits
+
+        threadpool_limits(1)
+    except ImportError:
+        pass
+
+
+def _matrix(path):
+    if path not in _MATRICES:
+        _MATRICES[path] = np.load(path, mmap_mode="r")
+    return _MATRICES[path]
+
+
+def _fit_task(x_path, y_path, feature_names, estimator, train_idx, test_idx, return_model):
+    """Fit estimator on train_idx rows of the shared matrix and predict test_idx rows."""
+    X, y = _matrix(x_path), _matrix(y_path)
+    # Row selection copies just the rows this fit needs; wrapping keeps the feature names
+    X_fit = pd.DataFrame(X[train_idx], columns=feature_names, copy=False)
+    estimator.fit(X_fit, y[train_idx])
+    if len(test_idx):
+        y_pred = estimator.predict(pd.DataFrame(X[test_idx], columns=feature_names, copy=False))
+    else:
+        y_pred = np.empty(0)
+    return y_pred, estimator if return_model else None
+
+
+def _fit_staged_task(x_path, y_path, feature_names, estimator, n_estimators, train_idx, test_idx):
+    """
+    Predictions of one ensemble at each size in n_estimators (ascending).
+
+    Boosting fits the largest size once and reads the smaller ones from
+    staged_predict; other ensembles grow with warm_start. Either way each
+    size predicts exactly as a model fitted from scratch with that size.
+    """
+    X, y = _matrix(x_path), _matrix(y_path)
+    X_fit = pd.DataFrame(X[train_idx], columns=feature_names, copy=False)
+    X_test = pd.DataFrame(X[test_idx], columns=feature_names, copy=False)
+    if hasattr(estimator, "staged_predict"):
+        estimator.set_params(n_estimators=n_estimators[-1]).fit(X_fit, y[train_idx])
+        wanted = set(n_estimators)
+        return [y_pred for stage, y_pred in enumerate(estimator.staged_predict(X_test), 1) if stage in wanted]
+    preds = []
+    estimator.set_params(warm_start=True)
+    for n in n_estimators:
+        estimator.set_params(n_estimators=n).fit(X_fit, y[train_idx])
+        preds.append(estimator.predict(X_test))
+    return preds
+
+
+def _can_stage(estimator, param_grid):
+    params = estimator.get_params()
+    return (
+        isinstance(param_grid, dict)
+        and len(param_grid.get("n_estimators", [])) > 1
+        and "n_estimators" in params
+        and (hasattr(estimator, "staged_predict") or "warm_start" in params)
+    )
+
+
+def _pool_context():
+    # Forked workers inherit sys.path and never re-run the calling script;
+    # spawn would re-execute Milestone3.py (a top-level script) in every worker
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
+
+
+class GridSearchResult:
+    """The GridSearchCV attributes Milestone3 reads, from ExperimentRunner.grid_search."""
+
+    def __init__(self, best_params_, best_score_, best_estimator_, cv_results_):
+        self.best_params_ = best_params_
+        self.best_score_ = best_score_
+        self.best_estimator_ = best_estimator_
+        self.cv_results_ = cv_results_
+
+
+class ExperimentRunner:
+    """
+    Process pool plus a shared, memory-mapped copy of the train (and test) matrix.
+
+    Parameters:
+    -----------
+    X_train, y_train : DataFrame / Series or arrays
+        Training data, used by compare() and grid_search().
+    X_test, y_test : optional
+        Held-out data scored by compare().
+    n_jobs : int, optional
+        Worker processes (default: all CPUs). 1 runs every task in-process.
+    temp_dir : str, optional
+        Where the shared matrix is written (default: /dev/shm, else the system temp dir).
+    """
+
+    def __init__(self, X_train, y_train, X_test=None, y_test=None, n_jobs=None, temp_dir=None):
+        self.feature_names = list(X_train.columns) if hasattr(X_train, "columns") else None
+        n_train = len(X_train)
+        blocks = [np.asarray(X_train, dtype=np.float64)]
+        targets = [np.asarray(y_train, dtype=np.float64)]
+        if X_test is not None:
+            blocks.append(np.asarray(X_test, dtype=np.float64))
+            targets.append(np.asarray(y_test, dtype=np.float64))
+        self.train_idx = np.arange(n_train)
+        self.test_idx = np.arange(n_train, n_train + (len(X_test) if X_test is not None else 0))
+        self.y_test = targets[1] if X_test is not None else None
+
+        if temp_dir is None and os.path.isdir("/dev/shm"):
+            temp_dir = "/dev/shm"
+        self._dir = tempfile.mkdtemp(prefix="visa_experiments_", dir=temp_dir)
+        self.x_path = os.path.join(self._dir, "X.npy")
+        self.y_path = os.path.join(self._dir, "y.npy")
+        np.save(self.x_path, np.vstack(blocks))
+        np.save(self.y_path, np.concatenate(targets))
+
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        context = _pool_context()
+        if self.n_jobs > 1 and context is not None:
+            self._pool = ProcessPoolExecutor(self.n_jobs, mp_context=context, initializer=_init_worker)
+        else:
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def map(self, tasks, callback=None):
+        """
+        Run (estimator, train_idx, test_idx, return_model) tasks.
+
+        Parameters:
+        -----------
+        tasks : list of tuple
+        callback : callable, optional
+            Called as callback(i, result) in this process as each task
+            finishes, e.g. to persist results before the rest complete.
+
+        Returns:
+        --------
+        list of (y_pred, fitted estimator or None), in task order
+        """
+        return self._run(_fit_task, tasks, callback)
+
+    def _run(self, func, tasks, callback=None):
+        args = [(self.x_path, self.y_path, self.feature_names, *task) for task in tasks]
+        results = [None] * len(args)
+        if self._pool is None:
+            for i, a in enumerate(args):
+                results[i] = func(*a)
+                if callback is not None:
+                    callback(i, results[i])
+            return results
+        futures = {self._pool.submit(func, *a): i for i, a in enumerate(args)}
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            if callback is not None:
+                callback(i, results[i])
+        return results
+
+    def train_arrays(self):
+        """Memory-mapped training rows and targets, as the workers see them."""
+        return _matrix(self.x_path)[self.train_idx], _matrix(self.y_path)[self.train_idx]
+
+    def compare(self, experiments):
+        """
+        Fit each (name, estimator) on the training rows and score it on the test rows.
+
+        Returns:
+        --------
+        comparison_df : pd.DataFrame
+            Model, MAE, RMSE and R² Score per experiment, in order
+        fitted : dict
+            name -> (fitted estimator, test predictions)
+        """
+        from sklearn.base import clone
+        from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+        if self.y_test is None:
+            raise ValueError("compare() needs X_test and y_test")
+        results = self.map([(clone(est), self.train_idx, self.test_idx, True) for _, est in experiments])
+        fitted, rows = {}, []
+        for (name, _), (y_pred, model) in zip(experiments, results):
+            fitted[name] = (model, y_pred)
+            rows.append({
+                "Model": name,
+                "MAE": mean_absolute_error(self.y_test, y_pred),
+                "RMSE": np.sqrt(mean_squared_error(self.y_test, y_pred)),
+                "R² Score": r2_score(self.y_test, y_pred),
+            })
+        return pd.DataFrame(rows), fitted
+
+    def grid_search(self, estimator, param_grid, cv=5, reuse_n_estimators=True):
+        """
+        Exhaustive search scored by negative MSE, like GridSearchCV(scoring='neg_mean_squared_error').
+
+        Every (parameters, fold) fit is its own task. Folds are KFold(cv)
+        over the training rows and the best parameters are refitted on all
+        of them, so the result matches GridSearchCV with the same cv.
+
+        With reuse_n_estimators, a grid sweeping n_estimators over an
+        ensemble fits one model per (other parameters, fold) at the largest
+        size and scores the smaller sizes as its prefixes (staged_predict or
+        warm_start). The scores are identical; only the larger fit is paid.
+
+        Returns:
+        --------
+        GridSearchResult
+        """
+        from sklearn.base import clone
+        from sklearn.metrics import mean_squared_error
+        from sklearn.model_selection import KFold, ParameterGrid
+
+        candidates = list(ParameterGrid(param_grid))
+        folds = list(KFold(cv).split(self.train_idx))
+        _, y_train = self.train_arrays()
+        scores = np.empty((len(candidates), len(folds)))
+
+        if reuse_n_estimators and _can_stage(estimator, param_grid):
+            # Candidates that differ only in n_estimators share one growing ensemble
+            groups = {}
+            for i, params in enumerate(candidates):
+                rest = tuple(sorted((k, repr(v)) for k, v in params.items() if k != "n_estimators"))
+                groups.setdefault(rest, []).append(i)
+            tasks, keys = [], []
+            for members in groups.values():
+                members = sorted(members, key=lambda i: candidates[i]["n_estimators"])
+                rest = {k: v for k, v in candidates[members[0]].items() if k != "n_estimators"}
+                sizes = [candidates[i]["n_estimators"] for i in members]
+                for f, (tr, te) in enumerate(folds):
+                    tasks.append((clone(estimator).set_params(**rest), sizes, self.train_idx[tr], self.train_idx[te]))
+                    keys.append((members, f))
+            for (members, f), preds in zip(keys, self._run(_fit_staged_task, tasks)):
+                for i, y_pred in zip(members, preds):
+                    scores[i, f] = -mean_squared_error(y_train[folds[f][1]], y_pred)
+        else:
+            tasks = [
+                (clone(estimator).set_params(**params), self.train_idx[tr], self.train_idx[te], False)
+                for params in candidates for tr, te in folds
+            ]
+            for k, (y_pred, _) in enumerate(self.map(tasks)):
+                i, f = divmod(k, len(folds))
+                scores[i, f] = -mean_squared_error(y_train[folds[f][1]], y_pred)
+        mean_scores = scores.mean(axis=1)
+        # GridSearchCV keeps the first candidate among equal mean scores
+        best = int(np.argmax(mean_scores))
+
+        refit_tasks = [(clone(estimator).set_params(**candidates[best]), self.train_idx, self.train_idx[:0], True)]
+        best_estimator = self.map(refit_tasks)[0][1]
+
+        cv_results = pd.DataFrame({"params": candidates, "mean_test_score": mean_scores, "std_test_score": scores.std(axis=1)})
+        for i in range(len(folds)):
+            cv_results[f"split{i}_test_score"] = scores[:, i]
+        return GridSearchResult(candidates[best], float(mean_scores[best]), best_estimator, cv_results)
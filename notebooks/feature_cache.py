@@ -0,0 +1,182 @@
+"""
+On-disk cache of engineered feature matrices.
+Ingestion, feature engineering and one-hot encoding run once per input CSV:
+build_features streams the file chunk by chunk (features.iter_training_features)
+straight into one .npy file per column, so building an entry needs about one
+chunk of memory whatever the size of the CSV. Every run, the first included,
+then memory-maps X and y instead of recomputing them. Entries
+are keyed by a hash of the CSV contents, of the feature-engineering source
+(features.py, ingestion.py, src/feature_encoder.py), FE_VERSION and the
+pandas / numpy versions, so changing the data or the code never returns
+stale features.
+
+    X, y, meta, hit = load_or_build(csv_path)
+
+Layout of one entry (<cache dir>/<key>/):
+    columns.json   column names and dtypes of X, name of y
+    X_<i>.npy      one file per column of X
+    y.npy, index.npy
+    meta.json      statistics returned by build_training_features
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from features import iter_training_features
+
+NOTEBOOKS_DIR = os.path.abspath(os.path.dirname(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(NOTEBOOKS_DIR, ".."))
+DEFAULT_CACHE_DIR = os.environ.get("FEATURE_CACHE_DIR", os.path.join(ROOT_DIR, ".feature_cache"))
+# Bump when the features change in a way the source hash cannot see
+FE_VERSION = "1"
+CODE_FILES = [
+    os.path.join(NOTEBOOKS_DIR, "features.py"),
+    os.path.join(NOTEBOOKS_DIR, "ingestion.py"),
+    os.path.join(ROOT_DIR, "src", "feature_encoder.py"),
+]
+
+
+def file_hash(path, block_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def cache_key(csv_path, version=FE_VERSION):
+    """Key for csv_path under the current feature-engineering code."""
+    h = hashlib.sha1()
+    for part in [file_hash(csv_path), *(file_hash(p) for p in CODE_FILES), version, pd.__version__, np.__version__]:
+        h.update(part.encode())
+    return h.hexdigest()[:16]
+
+
+def save_features(path, X, y, meta):
+    """Write one entry to directory path (replaced atomically if it exists)."""
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".tmp_", dir=parent)
+    try:
+        for i, col in enumerate(X.columns):
+            np.save(os.path.join(tmp, f"X_{i}.npy"), X[col].to_numpy())
+        np.save(os.path.join(tmp, "y.npy"), y.to_numpy())
+        np.save(os.path.join(tmp, "index.npy"), X.index.to_numpy())
+        with open(os.path.join(tmp, "columns.json"), "w") as f:
+            json.dump({"columns": list(X.columns), "dtypes": [str(d) for d in X.dtypes], "y_name": y.name}, f)
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def build_features(csv_path, path, chunk_size=None):
+    """
+    Stream the features of csv_path into a new entry at path (replaced atomically).
+
+    Returns:
+    --------
+    dict : meta, as build_training_features
+    """
+    columns, n_rows, y_dtype, meta, chunks = iter_training_features(csv_path, chunk_size)
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".tmp_", dir=parent)
+    files = []
+    try:
+        y_file = _open_npy(os.path.join(tmp, "y.npy"), y_dtype, n_rows, files)
+        index_file = _open_npy(os.path.join(tmp, "index.npy"), np.int64, n_rows, files)
+        X_files, dtypes = None, None
+        written = 0
+        for X, y in chunks:
+            if X_files is None:
+                # Column dtypes are only known once the first chunk is encoded
+                dtypes = [X[col].dtype for col in columns]
+                X_files = [_open_npy(os.path.join(tmp, f"X_{i}.npy"), dtypes[i], n_rows, files) for i in range(len(columns))]
+            # Appending keeps written rows out of this process's memory
+            for f, col, dtype in zip(X_files, columns, dtypes):
+                f.write(np.ascontiguousarray(X[col].to_numpy(), dtype=dtype).tobytes())
+            y_file.write(np.ascontiguousarray(y.to_numpy(), dtype=y_dtype).tobytes())
+            index_file.write(np.ascontiguousarray(X.index.to_numpy(), dtype=np.int64).tobytes())
+            written += len(X)
+        if X_files is None or written != n_rows:
+            raise ValueError(f"{csv_path}: expected {n_rows} feature rows, encoded {written}")
+        for f in files:
+            f.close()
+        with open(os.path.join(tmp, "columns.json"), "w") as f:
+            json.dump({"columns": columns, "dtypes": [str(d) for d in dtypes], "y_name": "processing_days"}, f)
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmp, path)
+    except BaseException:
+        for f in files:
+            f.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return meta
+
+
+def _open_npy(path, dtype, n_rows, files):
+    # .npy header for a (n_rows,) array whose data is appended afterwards
+    f = open(path, "wb")
+    files.append(f)
+    np.lib.format.write_array_header_1_0(
+        f, {"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)), "fortran_order": False, "shape": (n_rows,)}
+    )
+    return f
+
+
+def _mapped(path, name):
+    # Plain ndarray view of the map: same pages, no np.memmap subclass in pandas
+    return np.load(os.path.join(path, name), mmap_mode="r").view(np.ndarray)
+
+
+def load_features(path):
+    """
+    Memory-map one entry.
+
+    Returns:
+    --------
+    X : pd.DataFrame
+        Read-only columns backed by the .npy files (no copy)
+    y : pd.Series
+    meta : dict
+    """
+    with open(os.path.join(path, "columns.json")) as f:
+        layout = json.load(f)
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    index = pd.Index(_mapped(path, "index.npy"))
+    columns = {name: _mapped(path, f"X_{i}.npy") for i, name in enumerate(layout["columns"])}
+    X = pd.DataFrame(columns, index=index, copy=False)
+    y = pd.Series(_mapped(path, "y.npy"), index=index, name=layout["y_name"], copy=False)
+    return X, y, meta
+
+
+def load_or_build(csv_path, cache_dir=DEFAULT_CACHE_DIR, version=FE_VERSION):
+    """
+    Engineered features for csv_path, from the cache when possible.
+
+    Returns:
+    --------
+    X, y, meta : as build_training_features (X and y memory-mapped)
+    hit : bool
+        True when the entry was already cached
+    """
+    path = os.path.join(cache_dir, cache_key(csv_path, version))
+    if os.path.exists(os.path.join(path, "meta.json")):
+        return (*load_features(path), True)
+    build_features(csv_path, path)
+    return (*load_features(path), False)
@@ -0,0 +1,170 @@
+"""
+Feature engineering for the training milestones.
+Builds the model matrix X and target y that Milestone3 trains on from a
+visa application CSV: processing office, application month, season, the
+country / visa type average processing times, and one-hot encoding. The
+statistics behind the averages are returned with them, for
+preprocessing_info and online updates.
+
+build_training_features returns the whole matrix in memory;
+iter_training_features yields the same rows chunk by chunk, with the columns
+fixed up front from the ingestion statistics, so feature_cache.py can write
+any size of file to disk within one chunk of memory.
+
+The season comes from src/feature_encoder.py, the module that encodes
+serving requests, so training and serving share one definition of it; the
+test suite checks that FeatureEncoder rebuilds the training matrix
+bit-for-bit.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+from feature_encoder import season_labels
+from ingestion import TEXT_COLUMNS, TEXT_DTYPE, clean_chunks, ingest_visa_csv, scan_visa_csv
+
+# ADD PROCESSING OFFICE (based on country)
+OFFICE_MAP = {
+    "India": "New Delhi",
+    "United States": "Washington DC",
+    "United Kingdom": "London",
+    "Canada": "Ottawa",
+    "Australia": "Canberra",
+    "Germany": "Berlin",
+    "France": "Paris",
+    "Japan": "Tokyo",
+    "Brazil": "Brasilia",
+    "Italy": "Rome",
+    "China": "Beijing",
+    "Netherlands": "Amsterdam",
+    "Spain": "Madrid",
+    "Mexico": "Mexico City",
+    "South Korea": "Seoul",
+    "Unknown": "Unknown"
+}
+CATEGORICAL_COLUMNS = ["country", "visa_type", "season", "processing_office"]
+
+
+def engineer_features(df, stats, office_map=OFFICE_MAP):
+    """Add processing_office, application_month, season, country_avg and visa_avg to a cleaned frame."""
+    df["processing_office"] = df["country"].map(office_map).fillna("Unknown")
+
+    # Application month
+    df["application_month"] = df["application_date"].dt.month
+
+    # Season: Peak vs Off-Peak
+    df["season"] = season_labels(df["application_month"].to_numpy())
+
+    # Country / visa type average processing days; NaN -> overall mean
+    df["country_avg"] = df["country"].map(stats["country_avg"]).fillna(stats["mean_processing_days"])
+    df["visa_avg"] = df["visa_type"].map(stats["visa_avg"]).fillna(stats["mean_processing_days"])
+    return df
+
+
+def encode_features(df):
+    """One-hot encode (drop_first) and split into X / y, dropping rows without processing_days."""
+    df_encoded = pd.get_dummies(df, columns=CATEGORICAL_COLUMNS, drop_first=True)
+    df_ml = df_encoded.dropna(subset=["processing_days"])
+    X = df_ml.drop(columns=["processing_days", "application_date", "decision_date"])
+    y = df_ml["processing_days"]
+    # Fill any remaining NaN values in features with 0
+    return X.fillna(0), y
+
+
+def feature_columns(stats, scan, office_map=OFFICE_MAP):
+    """
+    Columns of X for a whole file, from scan_visa_csv() alone.
+
+    The same columns, in the same order, as encode_features() on the full
+    cleaned frame: the numeric features, then the drop_first dummies of every
+    category present anywhere in the file.
+    """
+    countries = sorted(stats["country_count"].index)
+    categories = {
+        "country": countries,
+        "visa_type": sorted(stats["visa_count"].index),
+        "season": sorted(set(season_labels(np.asarray(scan["application_months"], dtype=np.int64)))),
+        "processing_office": sorted({office_map.get(c, "Unknown") for c in countries}),
+    }
+    columns = ["application_month", "country_avg", "visa_avg"]
+    for col in CATEGORICAL_COLUMNS:
+        columns += [f"{col}_{value}" for value in categories[col][1:]]
+    return columns
+
+
+def encode_chunk(df, columns):
+    """encode_features() for one chunk of rows, with X fixed to columns."""
+    df_encoded = pd.get_dummies(df, columns=CATEGORICAL_COLUMNS)
+    df_ml = df_encoded.dropna(subset=["processing_days"])
+    X = df_ml.reindex(columns=columns, fill_value=False)
+    return X.fillna(0), df_ml["processing_days"]
+
+
+def iter_training_features(csv_path, chunk_size=None):
+    """
+    Stream csv_path through ingestion, feature engineering and encoding.
+
+    Returns:
+    --------
+    columns : list of str
+        Columns of X, as build_training_features returns them
+    n_rows : int
+        Total rows of X
+    y_dtype : np.dtype
+        dtype of y in build_training_features
+    meta : dict
+        As build_training_features
+    chunks : iterator of (X, y)
+        One encoded chunk at a time; only one is in memory at once
+    """
+    kwargs = {} if chunk_size is None else {"chunk_size": chunk_size}
+    stats, scan = scan_visa_csv(csv_path, **kwargs)
+    columns = feature_columns(stats, scan)
+
+    def chunks():
+        for chunk in clean_chunks(csv_path, scan, **kwargs):
+            for col in TEXT_COLUMNS:
+                chunk[col] = chunk[col].astype(TEXT_DTYPE)
+            yield encode_chunk(engineer_features(chunk, stats), columns)
+
+    return columns, stats["processing_days_count"], scan["days_dtype"], stats_meta(stats), chunks()
+
+
+def stats_meta(stats):
+    """Ingestion statistics as plain JSON-compatible values."""
+    return {
+        key: {k: _plain(v) for k, v in value.items()} if isinstance(value, pd.Series) else _plain(value)
+        for key, value in stats.items()
+    }
+
+
+def _plain(value):
+    if isinstance(value, (np.integer, np.floating)):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value
+
+
+def build_training_features(csv_path):
+    """
+    CSV -> model matrix, as Milestone3 trains on it.
+
+    Returns:
+    --------
+    X : pd.DataFrame
+    y : pd.Series
+    meta : dict
+        country_avg / visa_avg / mean_processing_days and the counts behind
+        them ('country_count', 'visa_count', 'processing_days_count'), as
+        plain JSON-compatible values.
+    """
+    df, stats = ingest_visa_csv(csv_path)
+    X, y = encode_features(engineer_features(df, stats))
+    return X, y, stats_meta(stats)
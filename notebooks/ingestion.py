@@ -0,0 +1,232 @@
+"""
+Chunked ingestion of visa application CSVs for the training milestones.
+Reads the CSV in chunks with compact dtypes, fills missing values, derives
+processing_days and accumulates the country / visa type statistics as it goes,
+so no step ever holds more than one raw chunk in memory. The result matches
+the in-memory steps of Milestone3.py exactly:
+
+    read_csv -> to_datetime -> fillna(mode) -> fillna("Unknown")
+    -> processing_days (negatives -> NaN) -> groupby(...).mean()
+
+Missing dates are filled with the mode of the whole file, which is only known
+after reading all of it, so scan_visa_csv() reads the file twice: once for the
+date counts and once for the group statistics. Neither pass keeps its chunks;
+the only state carried across chunks is the running sums and counts and the
+date value counts (one entry per distinct date). clean_chunks() then reads it a
+third time and yields cleaned chunks one by one, which is how the feature
+cache (feature_cache.py) builds the model matrix without ever holding the
+whole file. ingest_visa_csv() concatenates those chunks for callers that need
+the full frame (EDA, online updates).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from pandas.tseries.api import guess_datetime_format
+
+DATE_COLUMNS = ["application_date", "decision_date"]
+TEXT_COLUMNS = ["country", "visa_type"]
+# Text columns are read as categories (one code per row); ingest_visa_csv()
+# converts them to pandas' default string dtype once, after the concat
+READ_DTYPES = {"application_date": "category", "decision_date": "category", "country": "category", "visa_type": "category"}
+DEFAULT_CHUNK_SIZE = 500_000
+TEXT_DTYPE = pd.Series(["x"]).dtype
+
+
+def _days_dtype_without_negatives():
+    # Whether df.loc[no rows, col] = np.nan keeps an integer column depends on
+    # the pandas version; ask this one
+    probe = pd.DataFrame({"processing_days": np.zeros(1, dtype="int64")})
+    probe.loc[probe["processing_days"] < 0, "processing_days"] = np.nan
+    return probe["processing_days"].dtype
+
+
+def _paths(csv_path):
+    return [csv_path] if isinstance(csv_path, (str, os.PathLike)) else list(csv_path)
+
+
+def _chunks(csv_paths, chunk_size, usecols=None):
+    for path in csv_paths:
+        yield from pd.read_csv(path, usecols=usecols, dtype=READ_DTYPES, chunksize=chunk_size)
+
+
+def _date_formats(csv_paths, chunk_size):
+    # pd.to_datetime on a whole column guesses one format from its first
+    # non-null value; use the same format for every chunk
+    formats = {}
+    for chunk in _chunks(csv_paths, chunk_size, usecols=DATE_COLUMNS):
+        for col in DATE_COLUMNS:
+            if col not in formats:
+                values = chunk[col].dropna()
+                if len(values):
+                    formats[col] = guess_datetime_format(str(values.iloc[0]))
+        if len(formats) == len(DATE_COLUMNS):
+            break
+    return formats
+
+
+def _parse_dates(values, fmt):
+    # Dates repeat heavily, so parse each distinct string of the categorical
+    # column once and expand by code (-1, a missing value, becomes NaT)
+    cat = values.array
+    parsed = pd.to_datetime(cat.categories.astype(object), format=fmt)
+    return pd.Series(parsed.take(cat.codes, allow_fill=True, fill_value=pd.NaT), index=values.index, name=values.name)
+
+
+def _mode(counts, col):
+    if counts is None or counts.empty:
+        raise ValueError(f"Column {col} has no valid dates to fill missing values with")
+    # Series.mode() returns the smallest of the most frequent values first
+    return counts[counts == counts.max()].index.min()
+
+
+def _group_stats(sums, counts):
+    avg = sums / counts
+    return avg.where(counts > 0).sort_index()
+
+
+def _scan(csv_paths, chunk_size):
+    formats = _date_formats(csv_paths, chunk_size)
+
+    # Pass 1: date value counts for the fill modes
+    date_counts = {col: None for col in DATE_COLUMNS}
+    for chunk in _chunks(csv_paths, chunk_size, usecols=DATE_COLUMNS):
+        for col in DATE_COLUMNS:
+            vc = _parse_dates(chunk[col], formats.get(col)).value_counts()
+            date_counts[col] = vc if date_counts[col] is None else date_counts[col].add(vc, fill_value=0)
+    modes = {col: _mode(date_counts[col], col) for col in DATE_COLUMNS}
+
+    # Pass 2: processing_days group sums and counts
+    sums = {col: None for col in TEXT_COLUMNS}
+    counts = {col: None for col in TEXT_COLUMNS}
+    total_sum, total_count, any_negative, n_rows = 0.0, 0, False, 0
+    for chunk in _chunks(csv_paths, chunk_size):
+        chunk = _clean_chunk(chunk, formats, modes)
+        days = chunk["processing_days"]
+        any_negative = any_negative or days.count() < len(days)
+        for col in TEXT_COLUMNS:
+            agg = chunk.groupby(col, sort=False, observed=True)["processing_days"].agg(["sum", "count"])
+            sums[col] = agg["sum"] if sums[col] is None else sums[col].add(agg["sum"], fill_value=0)
+            counts[col] = agg["count"] if counts[col] is None else counts[col].add(agg["count"], fill_value=0)
+        total_sum += float(days.sum())
+        total_count += int(days.count())
+        n_rows += len(chunk)
+
+    for col in TEXT_COLUMNS:
+        if sums[col] is None:
+            sums[col] = counts[col] = pd.Series(dtype="float64")
+        # Categorical group keys -> plain string index, as groupby on strings gives
+        sums[col].index = sums[col].index.astype(TEXT_DTYPE)
+        counts[col].index = counts[col].index.astype(TEXT_DTYPE)
+        sums[col].index.name = counts[col].index.name = col
+    stats = {
+        "country_avg": _group_stats(sums["country"], counts["country"]).rename("processing_days"),
+        "visa_avg": _group_stats(sums["visa_type"], counts["visa_type"]).rename("processing_days"),
+        "mean_processing_days": total_sum / total_count if total_count else np.nan,
+        "country_count": counts["country"].sort_index().astype("int64"),
+        "visa_count": counts["visa_type"].sort_index().astype("int64"),
+        "processing_days_count": total_count,
+        "application_date_mode": modes["application_date"],
+        "decision_date_mode": modes["decision_date"],
+    }
+    application_months = sorted(set(date_counts["application_date"].index.month)) if n_rows else []
+    scan = {
+        "formats": formats,
+        "modes": modes,
+        "days_dtype": np.dtype("float64") if any_negative else _days_dtype_without_negatives(),
+        "n_rows": n_rows,
+        "application_months": application_months,
+    }
+    return stats, scan
+
+
+def _clean_chunk(chunk, formats, modes):
+    for col in DATE_COLUMNS:
+        chunk[col] = _parse_dates(chunk[col], formats.get(col)).fillna(modes[col])
+    for col in TEXT_COLUMNS:
+        values = chunk[col]
+        if "Unknown" not in values.cat.categories:
+            values = values.cat.add_categories("Unknown")
+        chunk[col] = values.fillna("Unknown")
+    days = (chunk["decision_date"] - chunk["application_date"]).dt.days.astype("float64")
+    days[days < 0] = np.nan
+    chunk["processing_days"] = days
+    return chunk
+
+
+def scan_visa_csv(csv_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Statistics of a visa application CSV, in two chunked passes.
+
+    Returns:
+    --------
+    stats : dict
+        As returned by ingest_visa_csv.
+    scan : dict
+        What clean_chunks() needs to clean the rows the same way (the date
+        formats and fill modes), the dtype processing_days has in
+        ingest_visa_csv's frame ('days_dtype', float64 when some are NaN),
+        'n_rows' and the 'application_months' present.
+    """
+    return _scan(_paths(csv_path), chunk_size)
+
+
+def clean_chunks(csv_path, scan, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the cleaned rows chunk by chunk, with processing_days.
+
+    country and visa_type stay categorical; the index runs on across chunks
+    (and files) as in ingest_visa_csv's frame. processing_days is float64,
+    NaN where the decision came before the application.
+    """
+    offset = 0
+    for chunk in _chunks(_paths(csv_path), chunk_size):
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield _clean_chunk(chunk, scan["formats"], scan["modes"])
+
+
+def ingest_visa_csv(csv_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Load and clean a visa application CSV in chunks.
+
+    The returned frame holds every row; to stay within one chunk of memory
+    use scan_visa_csv() and clean_chunks() instead.
+
+    Parameters:
+    -----------
+    csv_path : str or list of str
+        CSV with application_date, decision_date, country and visa_type;
+        a list of CSVs is read as if concatenated.
+    chunk_size : int
+        Rows per chunk; bounds the memory used while reading.
+
+    Returns:
+    --------
+    df : pd.DataFrame
+        Cleaned rows with processing_days, as Milestone3 builds them.
+    stats : dict
+        'country_avg' and 'visa_avg' (Series, as groupby(...).mean()),
+        'mean_processing_days', the non-missing processing_days counts behind
+        them ('country_count', 'visa_count', 'processing_days_count'), and the
+        'application_date_mode' / 'decision_date_mode' used to fill missing dates.
+    """
+    stats, scan = scan_visa_csv(csv_path, chunk_size)
+    parts = list(clean_chunks(csv_path, scan, chunk_size))
+    if not parts:
+        return pd.DataFrame(columns=DATE_COLUMNS + TEXT_COLUMNS), stats
+
+    columns = {}
+    for col in parts[0].columns:
+        if col in TEXT_COLUMNS:
+            # Concatenate the category codes, then convert to strings once
+            merged = union_categoricals([part[col].array for part in parts])
+            columns[col] = pd.Series(merged, copy=False).astype(TEXT_DTYPE)
+        else:
+            columns[col] = pd.concat([part[col] for part in parts], ignore_index=True)
+    del parts
+    df = pd.DataFrame(columns)
+    df["processing_days"] = df["processing_days"].astype(scan["days_dtype"])
+    return df, stats
@@ -0,0 +1,322 @@
+"""
+Incremental model update from newly decided applications.
+Instead of re-running all of Milestone3.py for every batch of decisions, this
+folds a delta CSV into the saved artifacts:
+
+- country_avg, visa_avg and mean_processing_days in preprocessing_info are
+  updated from the delta rows alone, using the processing_days counts saved
+  next to them ('country_count', 'visa_count', 'processing_days_count').
+- Random forest / gradient boosting models grow extra trees or boosting
+  stages fitted on the delta rows (warm_start). Linear regression is refitted
+  exactly from the X'X and X'y sums kept in preprocessing_info['linear_stats'].
+- --drift also retrains the same model on base CSV + delta and reports how far
+  the updated statistics and predictions are from that full retrain.
+
+The updated model, its float32 compiled copy, prediction table and
+preprocessing info are published together as a new version of the model
+registry (--registry, MODEL_REGISTRY as in Milestone3.py) before the working
+copies are replaced. The distilled student is not refitted here, so the new
+version has none; rerun Milestone3.py for SERVING_MODE=student.
+
+Artifacts saved before online updates have no counts or sums; pass --base-csv
+(the data the model was trained on) once to rebuild them.
+
+Usage:
+    python notebooks/online_update.py --delta new_decisions.csv
+        [--model visa_processing_model.pkl] [--prep preprocessing_info.pkl]
+        [--base-csv visa_dataset.csv] [--extra-estimators 10] [--drift]
+        [--registry model_registry]
+"""
+
+import argparse
+import copy
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+NOTEBOOKS_DIR = os.path.abspath(os.path.dirname(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(NOTEBOOKS_DIR, ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+from feature_encoder import FeatureEncoder
+from ingestion import ingest_visa_csv
+
+# Same artifact locations as Milestone3.py writes
+DEFAULT_MODEL = os.path.join(ROOT_DIR, "visa_processing_model.pkl")
+DEFAULT_PREP = os.path.join(ROOT_DIR, "preprocessing_info.pkl")
+DEFAULT_COMPILED = os.path.join(ROOT_DIR, "visa_processing_model.npz")
+DEFAULT_TABLE = os.path.join(ROOT_DIR, "prediction_table.npz")
+DEFAULT_BASE_CSV = os.path.join(ROOT_DIR, "visa_dataset.csv")
+DEFAULT_REGISTRY = os.environ.get("MODEL_REGISTRY", os.path.join(ROOT_DIR, "model_registry"))
+
+
+def load_delta(csv_path):
+    """
+    Decided applications from a delta CSV.
+
+    Rows missing either date cannot give a processing time and are dropped,
+    as are negative processing times; missing country / visa type become
+    'Unknown' as in Milestone3.
+    """
+    df = pd.read_csv(csv_path)
+    df = df.assign(
+        application_date=pd.to_datetime(df["application_date"]),
+        decision_date=pd.to_datetime(df["decision_date"]),
+        country=df["country"].fillna("Unknown"),
+        visa_type=df["visa_type"].fillna("Unknown"),
+    ).dropna(subset=["application_date", "decision_date"])
+    df["processing_days"] = (df["decision_date"] - df["application_date"]).dt.days
+    return df[df["processing_days"] >= 0].reset_index(drop=True)
+
+
+def encode_rows(prep, df):
+    """Model rows for a cleaned frame, encoded exactly as the API encodes requests."""
+    rows = df[["country", "visa_type", "application_date"]].to_dict("records")
+    X = FeatureEncoder(prep, dtype=np.float64).encode_many(rows)
+    return pd.DataFrame(X, columns=prep["feature_names"])
+
+
+def linear_sufficient_stats(X, y):
+    """X'X and X'y (with an intercept column) from which a linear model can be refitted."""
+    Xa = np.hstack([np.asarray(X, dtype=np.float64), np.ones((len(X), 1))])
+    y = np.asarray(y, dtype=np.float64)
+    return {"xtx": Xa.T @ Xa, "xty": Xa.T @ y, "n": len(y)}
+
+
+def add_base_counts(prep, base_csv):
+    """Rebuild the processing_days counts behind the saved averages from the training CSV."""
+    _, stats = ingest_visa_csv(base_csv)
+    return {
+        **prep,
+        "country_count": stats["country_count"].to_dict(),
+        "visa_count": stats["visa_count"].to_dict(),
+        "processing_days_count": stats["processing_days_count"],
+    }
+
+
+def add_base_linear_stats(prep, base_csv):
+    """Rebuild linear_stats from the training CSV, encoded with the saved averages."""
+    df, _ = ingest_visa_csv(base_csv)
+    df = df.dropna(subset=["processing_days"])
+    return {**prep, "linear_stats": linear_sufficient_stats(encode_rows(prep, df), df["processing_days"])}
+
+
+def _merge_group_avg(avg, count, delta_days, delta_keys):
+    avg, count = dict(avg), dict(count)
+    grouped = delta_days.groupby(delta_keys).agg(["sum", "count"])
+    for key, (days_sum, n) in grouped.iterrows():
+        old_n = int(count.get(key, 0))
+        # processing_days are whole days, so avg * count gives back the exact sum
+        total = float(np.rint(avg[key] * old_n)) if old_n else 0.0
+        count[key] = old_n + int(n)
+        avg[key] = (total + days_sum) / count[key]
+    return avg, count
+
+
+def update_stats(prep, delta):
+    """
+    Fold delta rows into country_avg, visa_avg and mean_processing_days.
+
+    Parameters:
+    -----------
+    prep : dict
+        preprocessing_info with 'country_count', 'visa_count' and
+        'processing_days_count'.
+    delta : pd.DataFrame
+        Rows from load_delta.
+
+    Returns:
+    --------
+    dict : Updated copy of prep
+    """
+    missing = [k for k in ("country_count", "visa_count", "processing_days_count") if k not in prep]
+    if missing:
+        raise ValueError(f"preprocessing_info has no {', '.join(missing)}; pass --base-csv to rebuild them")
+
+    days = delta["processing_days"].astype(np.float64)
+    country_avg, country_count = _merge_group_avg(prep["country_avg"], prep["country_count"], days, delta["country"])
+    visa_avg, visa_count = _merge_group_avg(prep["visa_avg"], prep["visa_count"], days, delta["visa_type"])
+    n = int(prep["processing_days_count"])
+    total = float(np.rint(prep["mean_processing_days"] * n)) + float(days.sum())
+    n += len(days)
+    return {
+        **prep,
+        "country_avg": country_avg,
+        "country_count": country_count,
+        "visa_avg": visa_avg,
+        "visa_count": visa_count,
+        "mean_processing_days": total / n if n else prep["mean_processing_days"],
+        "processing_days_count": n,
+    }
+
+
+def update_model(model, prep, X, y, extra_estimators=10):
+    """
+    Update a fitted model with delta rows.
+
+    Returns:
+    --------
+    model : Updated copy of the model
+    prep : prep, with linear_stats advanced for linear models
+    """
+    model = copy.deepcopy(model)
+    if hasattr(model, "warm_start") and hasattr(model, "n_estimators"):
+        model.set_params(warm_start=True, n_estimators=model.n_estimators + extra_estimators)
+        model.fit(X, y)
+        model.set_params(warm_start=False)
+        return model, prep
+
+    if hasattr(model, "coef_") and hasattr(model, "intercept_"):
+        if "linear_stats" not in prep:
+            raise ValueError("preprocessing_info has no linear_stats; pass --base-csv to rebuild them")
+        delta_stats = linear_sufficient_stats(X, y)
+        stats = {k: prep["linear_stats"][k] + delta_stats[k] for k in ("xtx", "xty", "n")}
+        coef = np.linalg.lstsq(stats["xtx"], stats["xty"], rcond=None)[0]
+        model.coef_, model.intercept_ = coef[:-1], float(coef[-1])
+        return model, {**prep, "linear_stats": stats}
+
+    raise ValueError(f"{type(model).__name__} cannot be updated incrementally; rerun Milestone3.py")
+
+
+def _max_abs_diff(a, b):
+    keys = set(a) | set(b)
+    diffs = [abs(a.get(k, np.nan) - b.get(k, np.nan)) for k in keys]
+    diffs = [d for d in diffs if not np.isnan(d)]
+    return float(max(diffs)) if diffs else 0.0
+
+
+def drift_report(original_model, updated_model, updated_prep, base_csv, delta_csv):
+    """
+    Compare an online update with a full retrain on base CSV + delta.
+
+    The retrain fits a clone of original_model (same hyperparameters) on every
+    row, encoded with averages recomputed from all the data.
+
+    Returns:
+    --------
+    dict : Statistic and prediction differences, MAE of both models on all
+        rows, and the retrain time
+    """
+    from sklearn.base import clone
+
+    start = time.perf_counter()
+    df, stats = ingest_visa_csv([base_csv, delta_csv])
+    full_prep = {
+        **updated_prep,
+        "country_avg": stats["country_avg"].to_dict(),
+        "visa_avg": stats["visa_avg"].to_dict(),
+        "mean_processing_days": stats["mean_processing_days"],
+    }
+    df = df.dropna(subset=["processing_days"])
+    y = df["processing_days"].to_numpy(dtype=np.float64)
+    X_full = encode_rows(full_prep, df)
+    retrained = clone(original_model).fit(X_full, y)
+    retrain_seconds = time.perf_counter() - start
+
+    pred_full = retrained.predict(X_full)
+    pred_updated = updated_model.predict(encode_rows(updated_prep, df))
+    diff = np.abs(pred_updated - pred_full)
+    return {
+        "rows": len(df),
+        "country_avg_max_abs_diff": _max_abs_diff(updated_prep["country_avg"], full_prep["country_avg"]),
+        "visa_avg_max_abs_diff": _max_abs_diff(updated_prep["visa_avg"], full_prep["visa_avg"]),
+        "mean_processing_days_abs_diff": abs(updated_prep["mean_processing_days"] - full_prep["mean_processing_days"]),
+        "prediction_mean_abs_diff": float(diff.mean()),
+        "prediction_max_abs_diff": float(diff.max()),
+        "updated_mae": float(np.abs(pred_updated - y).mean()),
+        "retrained_mae": float(np.abs(pred_full - y).mean()),
+        "retrain_seconds": round(retrain_seconds, 3),
+    }
+
+
+def main():
+    import joblib
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delta", required=True, help="CSV of newly decided applications")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--prep", default=DEFAULT_PREP)
+    parser.add_argument("--base-csv", help="Training CSV, to rebuild counts / linear_stats or for --drift")
+    parser.add_argument("--extra-estimators", type=int, default=10, help="Trees or boosting stages added per update")
+    parser.add_argument("--drift", action="store_true", help="Compare against a full retrain on base CSV + delta")
+    parser.add_argument("--compiled", default=DEFAULT_COMPILED, help="Refreshed when it exists")
+    parser.add_argument("--table", default=DEFAULT_TABLE, help="Refreshed when it exists")
+    parser.add_argument("--registry", default=DEFAULT_REGISTRY, help="Model registry the update is published to")
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    with open(args.prep, "rb") as f:
+        prep = pickle.load(f)
+
+    if args.base_csv and "processing_days_count" not in prep:
+        prep = add_base_counts(prep, args.base_csv)
+    if args.base_csv and hasattr(model, "coef_") and "linear_stats" not in prep:
+        prep = add_base_linear_stats(prep, args.base_csv)
+
+    start = time.perf_counter()
+    delta = load_delta(args.delta)
+    updated_prep = update_stats(prep, delta)
+    updated_model, updated_prep = update_model(
+        model, updated_prep, encode_rows(updated_prep, delta), delta["processing_days"].to_numpy(dtype=np.float64),
+        args.extra_estimators,
+    )
+    print(f"Updated {type(model).__name__} with {len(delta)} rows in {time.perf_counter() - start:.2f}s")
+
+    # Write the whole artifact set to a temp dir and publish it as one registry
+    # version, as Milestone3 does; the working copies are replaced only after
+    from lookup_table import build_lookup_table, save_lookup_table
+    from model_registry import ModelRegistry
+    from tree_engine import compile_model, save_compiled
+
+    with tempfile.TemporaryDirectory(prefix="online_update_") as tmp:
+        artifacts = {
+            "model": os.path.join(tmp, "model.pkl"),
+            "compiled": os.path.join(tmp, "model.npz"),
+            "table": os.path.join(tmp, "table.npz"),
+            "prep": os.path.join(tmp, "prep.pkl"),
+        }
+        joblib.dump(updated_model, artifacts["model"])
+        save_compiled(artifacts["compiled"], compile_model(updated_model, dtype=np.float32))
+        save_lookup_table(artifacts["table"], build_lookup_table(updated_model, updated_prep))
+        with open(artifacts["prep"], "wb") as f:
+            pickle.dump(updated_prep, f)
+
+        registry = ModelRegistry(args.registry)
+        parent = registry.current()
+        model_version = registry.publish(
+            artifacts,
+            metadata={
+                "model_type": updated_prep.get("model_type", type(updated_model).__name__),
+                "online_update": {
+                    "parent_version": parent,
+                    "delta_rows": int(len(delta)),
+                    "extra_estimators": args.extra_estimators,
+                },
+            },
+        )
+        print(f"Published model version {model_version} to: {registry.root}")
+
+        # Each working copy is swapped in whole (rename), never written in place
+        outputs = {"model": args.model, "prep": args.prep, "compiled": args.compiled, "table": args.table}
+        for kind, dst in outputs.items():
+            if kind in ("model", "prep") or os.path.exists(dst):
+                shutil.copyfile(artifacts[kind], dst + ".tmp")
+                os.replace(dst + ".tmp", dst)
+                print(f"{kind} saved to: {dst}")
+
+    if args.drift:
+        if not args.base_csv:
+            parser.error("--drift needs --base-csv")
+        print(json.dumps(drift_report(model, updated_model, updated_prep, args.base_csv, args.delta), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Resumable successive-halving hyperparameter search for Milestone3.
+Every candidate starts on a small budget (training rows or n_estimators);
+after each round only the best 1/factor of the candidates move on with
+factor times the budget. Each (parameters, budget, fold) fit is recorded in a
+SQLite store keyed by a hash of the training data, so an interrupted or
+repeated search on the same data skips every trial already done and resumes
+where it stopped. Fits run on an ExperimentRunner pool.
+
+    with TrialStore("tuning_trials.sqlite") as store:
+        search = successive_halving(runner, RandomForestRegressor(random_state=42), param_grid, store)
+    search.best_params_, search.best_estimator_, search.cv_results_
+"""
+
+import hashlib
+import json
+import math
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from experiments import GridSearchResult
+
+RESOURCES = ("n_samples", "n_estimators")
+
+
+def dataset_hash(X, y):
+    """Short hash of a training matrix and its targets."""
+    h = hashlib.sha1()
+    h.update(np.ascontiguousarray(X, dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(y, dtype=np.float64).tobytes())
+    return h.hexdigest()[:16]
+
+
+def estimator_key(estimator):
+    """Estimator class and constructor parameters, as stored with each trial."""
+    params = json.dumps(estimator.get_params(deep=False), sort_keys=True, default=str)
+    return f"{type(estimator).__name__}{params}"
+
+
+class TrialStore:
+    """
+    SQLite table of finished trials; one row per (data, estimator, params,
+    budget, fold split). The split is identified by the number of folds and
+    the random_state of the row shuffle.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS trials (
+            dataset TEXT NOT NULL,
+            estimator TEXT NOT NULL,
+            params TEXT NOT NULL,
+            resource TEXT NOT NULL,
+            budget INTEGER NOT NULL,
+            n_folds INTEGER NOT NULL,
+            random_state INTEGER NOT NULL,
+            fold INTEGER NOT NULL,
+            score REAL NOT NULL,
+            created REAL NOT NULL,
+            PRIMARY KEY (dataset, estimator, params, resource, budget, n_folds, random_state, fold)
+        )
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(self.SCHEMA)
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, key):
+        row = self.conn.execute(
+            "SELECT score FROM trials WHERE dataset=? AND estimator=? AND params=? AND resource=?"
+            " AND budget=? AND n_folds=? AND random_state=? AND fold=?",
+            key,
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key, score):
+        # Committed per trial so an interruption loses only the fits in flight
+        self.conn.execute("INSERT OR REPLACE INTO trials VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (*key, score, time.time()))
+        self.conn.commit()
+
+    def count(self, dataset=None):
+        if dataset is None:
+            return self.conn.execute("SELECT COUNT(*) FROM trials").fetchone()[0]
+        return self.conn.execute("SELECT COUNT(*) FROM trials WHERE dataset=?", (dataset,)).fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def _candidates(param_grid, resource):
+    from sklearn.model_selection import ParameterGrid
+
+    candidates = []
+    for params in ParameterGrid(param_grid):
+        if resource == "n_estimators":
+            # The budget sets n_estimators, so it is not searched
+            params = {k: v for k, v in params.items() if k != "n_estimators"}
+        if params not in candidates:
+            candidates.append(params)
+    return candidates
+
+
+def _rounds_needed(n_candidates, factor):
+    # Rounds until one candidate is left
+    return 1 + int(math.floor(math.log(n_candidates, factor) + 1e-9)) if n_candidates > 1 else 1
+
+
+def halving_schedule(n_candidates, max_resources, min_resources, factor):
+    """Budgets per round: min_resources * factor**i capped at max_resources, until one candidate or the cap is left."""
+    schedule, budget = [], min_resources
+    while len(schedule) < _rounds_needed(n_candidates, factor):
+        schedule.append(min(budget, max_resources))
+        if budget >= max_resources:
+            break
+        budget *= factor
+    return schedule
+
+
+def successive_halving(runner, estimator, param_grid, store, resource="n_samples", factor=3,
+                       min_resources=None, max_resources=None, cv=5, random_state=0):
+    """
+    Successive halving over param_grid, scored by negative MSE with KFold(cv).
+
+    Parameters:
+    -----------
+    runner : ExperimentRunner
+        Pool and shared training matrix.
+    estimator : sklearn estimator
+        Unfitted base estimator; candidates are clones with the grid parameters.
+    param_grid : dict
+        As for GridSearchCV.
+    store : TrialStore
+        Finished trials; looked up before fitting and written as fits finish.
+    resource : str
+        'n_samples' (rows of a fixed shuffle of the training set) or
+        'n_estimators' (replaces any n_estimators in the grid).
+    factor : int
+        Candidates kept per round is 1/factor; budget grows by factor.
+    min_resources, max_resources : int, optional
+        Budget of the first round and the cap; by default the cap is all
+        rows / the largest n_estimators in the grid, and the first round is
+        sized so the last round reaches the cap.
+    cv : int
+        KFold splits per trial.
+    random_state : int
+        Seed of the row shuffle behind the n_samples budgets; part of each
+        trial's key, with cv.
+
+    Returns:
+    --------
+    GridSearchResult
+        best_params_, best_score_ (last round), best_estimator_ (refitted on
+        all training rows at max_resources), cv_results_ (one row per
+        candidate per round), plus n_trials_run and n_trials_reused.
+    """
+    from sklearn.base import clone
+    from sklearn.metrics import mean_squared_error
+    from sklearn.model_selection import KFold
+
+    if resource not in RESOURCES:
+        raise ValueError(f"resource must be one of {RESOURCES}, got {resource!r}")
+
+    candidates = _candidates(param_grid, resource)
+    X_train, y_train = runner.train_arrays()
+    dataset = dataset_hash(X_train, y_train)
+    est_key = estimator_key(estimator)
+    n_train = len(runner.train_idx)
+
+    if max_resources is None:
+        if resource == "n_samples":
+            max_resources = n_train
+        else:
+            max_resources = max(param_grid.get("n_estimators", [estimator.get_params()["n_estimators"]]))
+    if min_resources is None:
+        n_rounds = _rounds_needed(len(candidates), factor)
+        floor = 2 * cv if resource == "n_samples" else 1
+        min_resources = max(floor, int(math.ceil(max_resources / factor ** (n_rounds - 1))))
+    schedule = halving_schedule(len(candidates), max_resources, min_resources, factor)
+
+    order = np.random.default_rng(random_state).permutation(n_train)
+    remaining = list(range(len(candidates)))
+    history, mean_scores, n_run, n_reused = [], {}, 0, 0
+    for round_idx, budget in enumerate(schedule):
+        budget = int(budget)
+        if resource == "n_samples":
+            rows = runner.train_idx[np.sort(order[:budget])]
+            extra = {}
+        else:
+            rows = runner.train_idx
+            extra = {"n_estimators": budget}
+        folds = list(KFold(cv).split(rows))
+
+        scores = {}
+        tasks, task_keys = [], []
+        for c in remaining:
+            params_json = json.dumps(candidates[c], sort_keys=True, default=str)
+            for fold, (tr, te) in enumerate(folds):
+                key = (dataset, est_key, params_json, resource, budget, cv, random_state, fold)
+                score = store.get(key)
+                if score is None:
+                    tasks.append((clone(estimator).set_params(**candidates[c], **extra), rows[tr], rows[te], False))
+                    task_keys.append((c, fold, key, rows[te]))
+                else:
+                    scores[c, fold] = score
+                    n_reused += 1
+
+        def record(i, result, task_keys=task_keys):
+            c, fold, key, test_rows = task_keys[i]
+            score = -mean_squared_error(y_train[test_rows], result[0])
+            store.put(key, score)
+            scores[c, fold] = score
+
+        runner.map(tasks, callback=record)
+        n_run += len(tasks)
+
+        mean_scores = {c: float(np.mean([scores[c, f] for f in range(cv)])) for c in remaining}
+        for c in remaining:
+            history.append({"iter": round_idx, "n_resources": budget, "params": candidates[c], "mean_test_score": mean_scores[c]})
+        # Keep the best 1/factor; ties keep grid order
+        ranked = sorted(remaining, key=lambda c: -mean_scores[c])
+        remaining = ranked[:max(1, int(math.ceil(len(remaining) / factor)))]
+
+    best = remaining[0]
+    best_params = dict(candidates[best])
+    if resource == "n_estimators":
+        best_params["n_estimators"] = int(max_resources)
+    refit = [(clone(estimator).set_params(**best_params), runner.train_idx, runner.train_idx[:0], True)]
+    best_estimator = runner.map(refit)[0][1]
+
+    result = GridSearchResult(best_params, mean_scores[best], best_estimator, pd.DataFrame(history))
+    result.n_trials_run = n_run
+    result.n_trials_reused = n_reused
+    return result
@@ -1,5 +1,8 @@
+import atexit
 import os
 import sys
+import threading
+from collections import OrderedDict
 
 # ===== CRITICAL: Disable OpenMP threading BEFORE any imports =====
 os.environ['OPENBLAS_NUM_THREADS'] = '1'
@@ -9,84 +12,120 @@ os.environ['NUMEXPR_NUM_THREADS'] = '1'
 os.environ['SKLEARN_THREADING_LAYER'] = 'sequential'
 os.environ['OPENBLAS'] = 'USE_OPENMP=0'
 
-# Ensure libgomp is not used
-if 'LD_PRELOAD' not in os.environ:
-    os.environ['LD_PRELOAD'] = '/usr/lib/x86_64-linux-gnu/libgomp.so.1'
-
-import pickle
-import joblib
 from datetime import datetime
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
-import pandas as pd
-import numpy as np
 import warnings
 
+from metrics import CONTENT_TYPE, PREDICTION_CACHE, REGISTRY, RequestTimer
+
+# Only light imports at module level: numpy, pandas and the model libraries
+# are imported on the first prediction, so /health answers immediately after
+# a cold start. See benchmarks/startup_profile.py for the import-time budget.
+
 # Suppress warnings
 warnings.filterwarnings('ignore')
 
-# Set numpy to single-threaded
-np.seterr(all='ignore')
-
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-MODEL_PATH = os.path.join(BASE_DIR, "visa_processing_model.pkl")
-PREPROCESS_PATH = os.path.join(BASE_DIR, "preprocessing_info.pkl")
+MODEL_PATH = os.environ.get("MODEL_PATH", os.path.join(BASE_DIR, "visa_processing_model.pkl"))
+COMPILED_MODEL_PATH = os.environ.get("COMPILED_MODEL_PATH", os.path.join(BASE_DIR, "visa_processing_model.npz"))
+STUDENT_MODEL_PATH = os.environ.get("STUDENT_MODEL_PATH", os.path.join(BASE_DIR, "visa_processing_student.npz"))
+PREPROCESS_PATH = os.environ.get("PREPROCESS_PATH", os.path.join(BASE_DIR, "preprocessing_info.pkl"))
+TABLE_PATH = os.environ.get("TABLE_PATH", os.path.join(BASE_DIR, "prediction_table.npz"))
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 100000))
+
+# "model" scores every request with the pickled model; "compiled" uses the
+# numpy-only model exported by Milestone3 (no scikit-learn at serve time);
+# "student" the small compiled model distilled from it (notebooks/distill.py);
+# "table" answers from the prediction table exported by Milestone3 and only
+# falls back to the model for categories outside its grid (MODEL_PATH is
+# loaded on the first such miss, so a table-only worker stays numpy-only).
+SERVING_MODE = os.environ.get("SERVING_MODE", "model")
+# Memory-map numpy arrays inside the pickled model (joblib mmap_mode="r")
+MMAP_ARTIFACTS = os.environ.get("MMAP_ARTIFACTS", "0") == "1"
+# Serve the active version of this model registry (model_registry.py)
+# instead of the files above; workers pick up activations and rollbacks
+# within REGISTRY_POLL_INTERVAL seconds, without a restart.
+MODEL_REGISTRY = os.environ.get("MODEL_REGISTRY")
+REGISTRY_POLL_INTERVAL = float(os.environ.get("REGISTRY_POLL_INTERVAL", 5))
+# Bearer token for POST /model/activate and /model/rollback (disabled when unset)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+# GET /predict: Cache-Control max-age in seconds, and how many distinct
+# (model version, inputs) answers each worker keeps in memory
+PREDICT_CACHE_MAX_AGE = int(os.environ.get("PREDICT_CACHE_MAX_AGE", 300))
+PREDICT_CACHE_SIZE = int(os.environ.get("PREDICT_CACHE_SIZE", 4096))
+# Per-stage request timings on /metrics and in a Server-Timing header
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+# Run this fraction of /predict requests under cProfile (0 = off: no hook is
+# installed). The merged stats are written to PROFILE_DIR as .prof files
+# every PROFILE_DUMP_INTERVAL seconds; see profiling.py.
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(BASE_DIR, "profiles"))
+PROFILE_DUMP_INTERVAL = float(os.environ.get("PROFILE_DUMP_INTERVAL", 60))
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend requests
 
 
-def load_artifacts():
-    if not os.path.exists(MODEL_PATH) or not os.path.exists(PREPROCESS_PATH):
-        raise FileNotFoundError("Model or preprocessing info not found.")
-    model = joblib.load(MODEL_PATH)
-    with open(PREPROCESS_PATH, "rb") as f:
-        prep = pickle.load(f)
-    return model, prep
+_live = None
+_live_lock = threading.Lock()
 
 
-def build_feature_vector(prep, country, visa_type, application_date_str, processing_office=None):
-    feature_names = prep["feature_names"]
-    row = {c: 0 for c in feature_names}
+def live_predictor():
+    """Process-wide LivePredictor over MODEL_REGISTRY."""
+    global _live
+    if _live is None:
+        with _live_lock:
+            if _live is None:
+                from model_registry import LivePredictor, ModelRegistry
+
+                _live = LivePredictor(
+                    ModelRegistry(MODEL_REGISTRY), SERVING_MODE, mmap=MMAP_ARTIFACTS, poll_interval=REGISTRY_POLL_INTERVAL
+                )
+    return _live
 
-    try:
-        app_date = pd.to_datetime(application_date_str)
-    except Exception:
-        app_date = pd.to_datetime("today")
 
-    application_month = int(app_date.month)
-    season = "Peak" if application_month in [1, 2, 12] else "Off-Peak"
+def load_predictor():
+    if MODEL_REGISTRY:
+        return live_predictor().get()
+    from predictor import get_predictor
 
-    if "application_month" in row:
-        row["application_month"] = application_month
-    if "country_avg" in row:
-        row["country_avg"] = float(prep.get("country_avg", {}).get(country, prep.get("mean_processing_days", 0)))
-    if "visa_avg" in row:
-        row["visa_avg"] = float(prep.get("visa_avg", {}).get(visa_type, prep.get("mean_processing_days", 0)))
+    model_path = {"compiled": COMPILED_MODEL_PATH, "student": STUDENT_MODEL_PATH}.get(SERVING_MODE, MODEL_PATH)
+    table_path = TABLE_PATH if SERVING_MODE == "table" else None
+    return get_predictor(model_path, PREPROCESS_PATH, table_path, mmap=MMAP_ARTIFACTS)
 
-    country_col = f"country_{country}"
-    if country_col in row:
-        row[country_col] = 1
 
-    visa_col = f"visa_type_{visa_type}"
-    if visa_col in row:
-        row[visa_col] = 1
+def request_timer():
+    """RequestTimer of the current request, or None when metrics are off."""
+    return g.get("timer")
 
-    season_col = f"season_{season}"
-    if season_col in row:
-        row[season_col] = 1
 
-    office_map = prep.get("office_map", {})
-    mapped_office = processing_office or office_map.get(country, "Unknown")
-    office_col = f"processing_office_{mapped_office}"
-    if office_col in row:
-        row[office_col] = 1
+@app.before_request
+def start_timer():
+    if METRICS_ENABLED:
+        g.timer = RequestTimer()
 
-    df = pd.DataFrame([row], columns=feature_names).fillna(0)
-    return df
+
+@app.after_request
+def record_timings(response):
+    timer = g.pop("timer", None)
+    if timer is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        timer.finish(route, request.method, response.status_code)
+        response.headers["Server-Timing"] = timer.server_timing()
+        # Let cross-origin pages (the frontend) read Server-Timing
+        response.headers["Timing-Allow-Origin"] = "*"
+    return response
+
+
+def load_artifacts():
+    predictor = load_predictor()
+    return predictor.model, predictor.prep
 
 
 def predict(model, prep, country, visa_type, application_date_str, processing_office=None):
+    from predictor import build_feature_vector
+
     X = build_feature_vector(prep, country, visa_type, application_date_str, processing_office)
     pred = model.predict(X)[0]
     pred = max(0.0, float(pred))
@@ -98,17 +137,87 @@ def health():
     return {"status": "ok", "message": "VisaAI Backend API is running"}, 200
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics_route():
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
+@app.route("/model", methods=["GET"])
+def model_route():
+    if not MODEL_REGISTRY:
+        return {"registry": False, "version": None}, 200
+    live = live_predictor()
+    registry = live.registry
+    try:
+        live.get()
+    except (FileNotFoundError, ValueError) as e:
+        return {"registry": True, "version": None, "error": str(e), "load_error": live.failed}, 503
+    return {
+        "registry": True,
+        "version": live.version,
+        "active": registry.current(),
+        "manifest": registry.manifest(live.version),
+        "versions": registry.versions(),
+        # Set while the active version in CURRENT could not be loaded
+        "load_error": live.failed,
+    }, 200
+
+
+def _admin_error():
+    if not MODEL_REGISTRY or not ADMIN_TOKEN:
+        return {"success": False, "error": "Model administration is not enabled"}, 404
+    if request.headers.get("Authorization") != f"Bearer {ADMIN_TOKEN}":
+        return {"success": False, "error": "Unauthorized"}, 401
+    return None
+
+
+@app.route("/model/activate", methods=["POST"])
+def model_activate_route():
+    error = _admin_error()
+    if error is not None:
+        return error
+    data = request.get_json(silent=True)
+    version = data.get("version") if isinstance(data, dict) else None
+    live = live_predictor()
+    try:
+        live.registry.activate(version)
+    except KeyError as e:
+        return {"success": False, "error": str(e.args[0])}, 404
+    # Swap this worker now; the others follow on their next poll
+    live.swap_to(version)
+    return {"success": True, "version": version}, 200
+
+
+@app.route("/model/rollback", methods=["POST"])
+def model_rollback_route():
+    error = _admin_error()
+    if error is not None:
+        return error
+    live = live_predictor()
+    try:
+        version = live.registry.rollback()
+    except ValueError as e:
+        return {"success": False, "error": str(e)}, 409
+    live.swap_to(version)
+    return {"success": True, "version": version}, 200
+
+
 @app.route("/predict", methods=["POST"])
 def predict_route():
     try:
+        timer = request_timer()
         data = request.get_json()
         country = data.get("country", "Unknown")
         visa_type = data.get("visa_type", "Unknown")
         application_date = data.get("application_date", datetime.today().strftime("%Y-%m-%d"))
         processing_office = data.get("processing_office", None)
+        if timer is not None:
+            timer.mark("parse")
         
-        model, prep = load_artifacts()
-        days = predict(model, prep, country, visa_type, application_date, processing_office)
+        predictor = load_predictor()
+        if timer is not None:
+            timer.mark("fetch")
+        days = predictor.predict_one(country, visa_type, application_date, processing_office, timer=timer)
         
         return {
             "success": True,
@@ -121,6 +230,163 @@ def predict_route():
         return {"success": False, "error": str(e)}, 500
 
 
+_answers = OrderedDict()
+_answers_lock = threading.Lock()
+
+
+def _cacheable(response, etag):
+    # Weak: the ETag is keyed on the month, but the body echoes the raw date
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = f"public, max-age={PREDICT_CACHE_MAX_AGE}"
+    return response
+
+
+@app.route("/predict", methods=["GET"])
+def predict_get_route():
+    """
+    Cacheable prediction: GET /predict?country=&visa_type=&application_date=[&processing_office=]
+
+    Responses carry an ETag from Predictor.etag (model version + normalized
+    inputs) and Cache-Control. If-None-Match is answered with 304 and repeats
+    come from an in-memory LRU keyed by the ETag, so a repeat query never
+    reaches the model.
+    """
+    from feature_encoder import parse_month
+
+    timer = request_timer()
+    args = request.args
+    country = args.get("country", "Unknown").strip()
+    visa_type = args.get("visa_type", "Unknown").strip()
+    application_date = args.get("application_date", "").strip()
+    processing_office = args.get("processing_office", "").strip() or None
+    # Unlike POST, a missing or bad date is an error: falling back to today
+    # would make a cached answer depend on the day it was computed
+    if not application_date or parse_month(application_date) is None:
+        return {"success": False, "error": f"Invalid application_date: {application_date!r}"}, 400
+    if timer is not None:
+        timer.mark("parse")
+
+    try:
+        predictor = load_predictor()
+        etag = predictor.etag(country, visa_type, application_date, processing_office)
+        if timer is not None:
+            timer.mark("fetch")
+
+        # If-None-Match uses weak comparison (RFC 9110)
+        if request.if_none_match.contains_weak(etag):
+            PREDICTION_CACHE.inc("not_modified")
+            return _cacheable(Response(status=304), etag)
+
+        with _answers_lock:
+            days = _answers.get(etag)
+            if days is not None:
+                _answers.move_to_end(etag)
+        if days is None:
+            PREDICTION_CACHE.inc("miss")
+            days = predictor.predict_one(country, visa_type, application_date, processing_office, timer=timer)
+            with _answers_lock:
+                _answers[etag] = days
+                while len(_answers) > PREDICT_CACHE_SIZE:
+                    _answers.popitem(last=False)
+        else:
+            PREDICTION_CACHE.inc("hit")
+            if timer is not None:
+                timer.mark("cache")
+    except Exception as e:
+        return {"success": False, "error": str(e)}, 500
+
+    return _cacheable(jsonify({
+        "success": True,
+        "country": country,
+        "visa_type": visa_type,
+        "application_date": application_date,
+        "estimated_days": days
+    }), etag)
+
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch_route():
+    timer = request_timer()
+    data = request.get_json(silent=True)
+    applications = data.get("applications") if isinstance(data, dict) else None
+    if timer is not None:
+        timer.mark("parse")
+    if not isinstance(applications, list):
+        return {"success": False, "error": "Body must be a JSON object with an 'applications' list"}, 400
+    if len(applications) > MAX_BATCH_SIZE:
+        return {"success": False, "error": f"Batch too large: {len(applications)} > {MAX_BATCH_SIZE}"}, 413
+
+    try:
+        predictor = load_predictor()
+        if timer is not None:
+            timer.mark("fetch")
+        results = predictor.predict_batch(applications, timer=timer)
+    except Exception as e:
+        return {"success": False, "error": str(e)}, 500
+
+    return {
+        "success": True,
+        "count": len(results),
+        "failed": sum(not r["success"] for r in results),
+        "results": results
+    }, 200
+
+
+@app.route("/predict/sweep", methods=["POST"])
+def predict_sweep_route():
+    timer = request_timer()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return {"success": False, "error": "Body must be a JSON object"}, 400
+    country = data.get("country", "Unknown")
+    visa_type = data.get("visa_type", "Unknown")
+    application_date = data.get("application_date", datetime.today().strftime("%Y-%m-%d"))
+    processing_office = data.get("processing_office", None)
+    vary = data.get("vary", ["month"])
+    if isinstance(vary, str):
+        vary = [vary]
+    if timer is not None:
+        timer.mark("parse")
+
+    try:
+        predictor = load_predictor()
+        if timer is not None:
+            timer.mark("fetch")
+        results = predictor.sweep(country, visa_type, application_date, processing_office, vary)
+        if timer is not None:
+            timer.mark("predict")
+    except ValueError as e:
+        return {"success": False, "error": str(e)}, 400
+    except Exception as e:
+        return {"success": False, "error": str(e)}, 500
+
+    return {
+        "success": True,
+        "country": country,
+        "visa_type": visa_type,
+        "vary": sorted(set(vary)),
+        "best": results[0] if results else None,
+        "results": results
+    }, 200
+
+
+def install_profiler(sample_rate=PROFILE_SAMPLE_RATE, out_dir=PROFILE_DIR, dump_interval=PROFILE_DUMP_INTERVAL):
+    """Profile a sample of /predict requests (POST and GET); returns the SampledProfiler, or None when sample_rate is 0."""
+    if sample_rate <= 0:
+        return None
+    from profiling import SampledProfiler
+
+    profiler = SampledProfiler(sample_rate, out_dir, dump_interval)
+    for endpoint in ("predict_route", "predict_get_route"):
+        app.view_functions[endpoint] = profiler.wrap(app.view_functions[endpoint])
+    # Flush the last partial window when the worker exits
+    atexit.register(profiler.dump)
+    return profiler
+
+
+PROFILER = install_profiler()
+
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port, debug=False)
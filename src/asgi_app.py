@@ -0,0 +1,123 @@
+"""
+Async (ASGI) variant of the VisaAI backend API.
+Exposes the same /health, /predict and /predict/batch contract as api.py with
+FastAPI and pydantic request models. Scoring runs on a bounded thread pool so
+a slow batch never blocks the event loop.
+
+Run with:  uvicorn asgi_app:app --host 0.0.0.0 --port $PORT
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, List, Optional
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+MODEL_PATH = os.environ.get("MODEL_PATH", os.path.join(BASE_DIR, "visa_processing_model.pkl"))
+COMPILED_MODEL_PATH = os.environ.get("COMPILED_MODEL_PATH", os.path.join(BASE_DIR, "visa_processing_model.npz"))
+STUDENT_MODEL_PATH = os.environ.get("STUDENT_MODEL_PATH", os.path.join(BASE_DIR, "visa_processing_student.npz"))
+PREPROCESS_PATH = os.environ.get("PREPROCESS_PATH", os.path.join(BASE_DIR, "preprocessing_info.pkl"))
+TABLE_PATH = os.environ.get("TABLE_PATH", os.path.join(BASE_DIR, "prediction_table.npz"))
+SERVING_MODE = os.environ.get("SERVING_MODE", "model")
+# Memory-map numpy arrays inside the pickled model (joblib mmap_mode="r")
+MMAP_ARTIFACTS = os.environ.get("MMAP_ARTIFACTS", "0") == "1"
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 100000))
+
+# Scoring threads, and how many scoring jobs may wait for one of them.
+# Requests beyond that wait on the event loop without holding a thread.
+SCORING_THREADS = int(os.environ.get("SCORING_THREADS", 4))
+MAX_PENDING_JOBS = int(os.environ.get("MAX_PENDING_JOBS", 64))
+
+app = FastAPI(title="VisaAI Backend API")
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+
+_executor = ThreadPoolExecutor(max_workers=SCORING_THREADS, thread_name_prefix="scoring")
+_slots = None
+
+
+def _today():
+    return datetime.today().strftime("%Y-%m-%d")
+
+
+class PredictRequest(BaseModel):
+    country: str = "Unknown"
+    visa_type: str = "Unknown"
+    application_date: str = Field(default_factory=_today)
+    processing_office: Optional[str] = None
+
+
+class BatchRequest(BaseModel):
+    # Rows stay loosely typed so one malformed row gets its own error entry
+    applications: List[Any]
+
+
+def load_predictor():
+    # Imported on first use so /health is up before numpy and the model load
+    from predictor import get_predictor
+
+    model_path = {"compiled": COMPILED_MODEL_PATH, "student": STUDENT_MODEL_PATH}.get(SERVING_MODE, MODEL_PATH)
+    table_path = TABLE_PATH if SERVING_MODE == "table" else None
+    return get_predictor(model_path, PREPROCESS_PATH, table_path, mmap=MMAP_ARTIFACTS)
+
+
+async def run_scoring(func, *args):
+    """Run a CPU-bound call on the scoring pool, with at most MAX_PENDING_JOBS queued."""
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(MAX_PENDING_JOBS)
+    async with _slots:
+        return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "message": "VisaAI Backend API is running"}
+
+
+def _score_one(body):
+    return load_predictor().predict_one(body.country, body.visa_type, body.application_date, body.processing_office)
+
+
+@app.post("/predict")
+async def predict_route(body: PredictRequest):
+    try:
+        days = await run_scoring(_score_one, body)
+    except Exception as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+    return {
+        "success": True,
+        "country": body.country,
+        "visa_type": body.visa_type,
+        "application_date": body.application_date,
+        "estimated_days": days
+    }
+
+
+def _score_batch(applications):
+    results = load_predictor().predict_batch(applications)
+    return {
+        "success": True,
+        "count": len(results),
+        "failed": sum(not r["success"] for r in results),
+        "results": results
+    }
+
+
+@app.post("/predict/batch")
+async def predict_batch_route(body: BatchRequest):
+    if len(body.applications) > MAX_BATCH_SIZE:
+        return JSONResponse(
+            {"success": False, "error": f"Batch too large: {len(body.applications)} > {MAX_BATCH_SIZE}"},
+            status_code=413,
+        )
+    try:
+        return await run_scoring(_score_batch, body.applications)
+    except Exception as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
@@ -0,0 +1,259 @@
+"""
+Feature transforms shared by training and serving.
+Turns (country, visa_type, application_date, processing_office) inputs into
+model rows directly in numpy, using column indices resolved once from
+preprocessing_info instead of building a dict and a DataFrame per call.
+
+Batches are encoded column-wise: the season is an np.isin mask over the
+month column, and each categorical is mapped once to integer column codes
+(-1 when the category has no column) which are scattered into the block in a
+single fancy-indexing assignment. Training (notebooks/features.py) takes its
+season column from season_labels.
+"""
+
+import threading
+from datetime import date, datetime
+from functools import lru_cache
+
+import numpy as np
+
+PEAK_MONTHS = (1, 2, 12)
+SEASONS = np.array(["Off-Peak", "Peak"], dtype=object)
+# Below this many rows the fixed cost of the column-wise numpy calls (~25 us)
+# outweighs the per-row loop, so encode_many fills small batches row by row
+COLUMNWISE_MIN_ROWS = 8
+
+
+@lru_cache(maxsize=4096)
+def parse_month(date_str):
+    """Month of a date string, or None when it cannot be parsed (cached per string)."""
+    # Fast path for ISO dates, pandas for everything else it understands
+    try:
+        return date.fromisoformat(date_str).month
+    except (TypeError, ValueError):
+        pass
+    try:
+        import pandas as pd
+
+        return int(pd.to_datetime(date_str).month)
+    except Exception:
+        return None
+
+
+def application_month(application_date):
+    """Month of an application date; unparseable dates fall back to today, as in build_feature_vector."""
+    if isinstance(application_date, (datetime, date)):
+        return application_date.month
+    month = parse_month(str(application_date)) if application_date is not None else None
+    return month if month is not None else date.today().month
+
+
+def season_for_month(month):
+    return "Peak" if month in PEAK_MONTHS else "Off-Peak"
+
+
+def peak_mask(months):
+    """Boolean array, True where the month is in the peak season."""
+    return np.isin(months, PEAK_MONTHS)
+
+
+def season_labels(months):
+    """Vectorized season_for_month: 'Peak' / 'Off-Peak' label per month."""
+    return SEASONS[peak_mask(months).view(np.int8)]
+
+
+def category_codes(values, mapping, n=None):
+    """Integer code per value from mapping (category -> code), -1 when unmapped."""
+    if n is None:
+        n = len(values)
+    return np.fromiter((mapping.get(v, -1) for v in values), dtype=np.intp, count=n)
+
+
+class FeatureEncoder:
+    """
+    Column layout of preprocessing_info['feature_names'] compiled to integer indices.
+
+    Unknown categories simply leave their one-hot columns at zero and fall back
+    to mean_processing_days for the averages, matching build_feature_vector.
+    """
+
+    def __init__(self, prep, dtype=np.float32):
+        self.feature_names = list(prep["feature_names"])
+        self.n_features = len(self.feature_names)
+        self.dtype = dtype
+        index = {name: i for i, name in enumerate(self.feature_names)}
+
+        self.month_idx = index.get("application_month", -1)
+        self.country_avg_idx = index.get("country_avg", -1)
+        self.visa_avg_idx = index.get("visa_avg", -1)
+
+        self.default_avg = float(prep.get("mean_processing_days", 0))
+        self.country_avg = {k: float(v) for k, v in prep.get("country_avg", {}).items()}
+        self.visa_avg = {k: float(v) for k, v in prep.get("visa_avg", {}).items()}
+        self.office_map = dict(prep.get("office_map", {}))
+        self.known_offices = frozenset(self.office_map.values())
+
+        self.country_idx = self._one_hot(index, "country_")
+        self.visa_idx = self._one_hot(index, "visa_type_")
+        self.season_idx = self._one_hot(index, "season_")
+        self.office_idx = self._one_hot(index, "processing_office_")
+        # Season column for month 1..12 (index 0 unused), -1 when it was dropped
+        months = np.arange(13)
+        self.season_cols = np.where(
+            peak_mask(months), self.season_idx.get("Peak", -1), self.season_idx.get("Off-Peak", -1)
+        )
+
+        self._local = threading.local()
+
+    @staticmethod
+    def _one_hot(index, prefix):
+        return {name[len(prefix):]: i for name, i in index.items() if name.startswith(prefix)}
+
+    def resolve_office(self, country, processing_office=None):
+        return processing_office or self.office_map.get(country, "Unknown")
+
+    def unknown_counts(self, countries, visa_types, offices):
+        """
+        How many inputs were unseen in training, per kind.
+
+        Unknown countries and visa types are encoded with mean_processing_days
+        as their average; unknown offices get no one-hot column.
+
+        Returns:
+        --------
+        dict : {'country': n, 'visa_type': n, 'office': n}
+        """
+        return {
+            "country": sum(c not in self.country_avg for c in countries),
+            "visa_type": sum(v not in self.visa_avg for v in visa_types),
+            "office": sum(o not in self.known_offices for o in offices),
+        }
+
+    def _fill(self, row, country, visa_type, month, processing_office):
+        if self.month_idx >= 0:
+            row[self.month_idx] = month
+        if self.country_avg_idx >= 0:
+            row[self.country_avg_idx] = self.country_avg.get(country, self.default_avg)
+        if self.visa_avg_idx >= 0:
+            row[self.visa_avg_idx] = self.visa_avg.get(visa_type, self.default_avg)
+
+        office = self.resolve_office(country, processing_office)
+        for mapping, key in (
+            (self.country_idx, country),
+            (self.visa_idx, visa_type),
+            (self.season_idx, season_for_month(month)),
+            (self.office_idx, office),
+        ):
+            i = mapping.get(key)
+            if i is not None:
+                row[i] = 1
+
+    def encode_one(self, country, visa_type, application_date, processing_office=None):
+        """
+        Encode one application into a (1, n_features) array.
+
+        The array is a per-thread buffer reused by the next call on the same
+        thread, so score it (or copy it) before encoding again.
+        """
+        buf = getattr(self._local, "row", None)
+        if buf is None:
+            buf = self._local.row = np.zeros((1, self.n_features), dtype=self.dtype)
+        else:
+            buf.fill(0)
+        self._fill(buf[0], country, visa_type, application_month(application_date), processing_office)
+        return buf
+
+    def encode_many(self, rows, out=None):
+        """
+        Encode an iterable of application dicts into an (N, n_features) block.
+
+        Parameters:
+        -----------
+        rows : sequence of dict
+            Each dict holds 'country', 'visa_type', 'application_date' and
+            optionally 'processing_office'.
+        out : np.ndarray, optional
+            Preallocated block with at least N rows; it is zeroed and filled.
+
+        Returns:
+        --------
+        np.ndarray : Feature block, one row per input in order
+        """
+        rows = list(rows)
+        if len(rows) < COLUMNWISE_MIN_ROWS:
+            return self._encode_rows(rows, out)
+        countries = [r.get("country", "Unknown") for r in rows]
+        return self.encode_columns(
+            countries,
+            [r.get("visa_type", "Unknown") for r in rows],
+            np.fromiter((application_month(r.get("application_date")) for r in rows), dtype=np.intp, count=len(rows)),
+            [self.resolve_office(c, r.get("processing_office")) for c, r in zip(countries, rows)],
+            out=out,
+        )
+
+    def _encode_rows(self, rows, out=None):
+        if out is None:
+            X = np.zeros((len(rows), self.n_features), dtype=self.dtype)
+        else:
+            X = out[:len(rows)]
+            X.fill(0)
+        for i, r in enumerate(rows):
+            self._fill(
+                X[i],
+                r.get("country", "Unknown"),
+                r.get("visa_type", "Unknown"),
+                application_month(r.get("application_date")),
+                r.get("processing_office"),
+            )
+        return X
+
+    def encode_columns(self, countries, visa_types, months, offices=None, out=None):
+        """
+        Encode column arrays (one entry per application) into an (N, n_features) block.
+
+        Parameters:
+        -----------
+        countries, visa_types : sequence of str
+        months : array-like of int
+            Application months, 1-12.
+        offices : sequence of str, optional
+            Processing offices; defaults to office_map[country] or 'Unknown'.
+        out : np.ndarray, optional
+            Preallocated block with at least N rows; it is zeroed and filled.
+
+        Returns:
+        --------
+        np.ndarray : Feature block, identical row for row to encode_one
+        """
+        months = np.asarray(months, dtype=np.intp)
+        n = len(months)
+        if offices is None:
+            offices = [self.resolve_office(c) for c in countries]
+        if out is None:
+            X = np.zeros((n, self.n_features), dtype=self.dtype)
+        else:
+            X = out[:n]
+            X.fill(0)
+        if n == 0:
+            return X
+
+        if self.month_idx >= 0:
+            X[:, self.month_idx] = months
+        if self.country_avg_idx >= 0:
+            X[:, self.country_avg_idx] = np.fromiter(
+                (self.country_avg.get(c, self.default_avg) for c in countries), dtype=np.float64, count=n
+            )
+        if self.visa_avg_idx >= 0:
+            X[:, self.visa_avg_idx] = np.fromiter(
+                (self.visa_avg.get(v, self.default_avg) for v in visa_types), dtype=np.float64, count=n
+            )
+
+        # One code per (row, categorical); a single scatter sets every one-hot
+        cols = np.empty((n, 4), dtype=np.intp)
+        cols[:, 0] = category_codes(countries, self.country_idx, n)
+        cols[:, 1] = category_codes(visa_types, self.visa_idx, n)
+        cols[:, 2] = self.season_cols[months]
+        cols[:, 3] = category_codes(offices, self.office_idx, n)
+        hit = cols >= 0
+        X[np.nonzero(hit)[0], cols[hit]] = 1
+        return X
@@ -0,0 +1,44 @@
+"""
+Gunicorn settings for the Flask API with model artifacts shared across workers.
+
+    gunicorn -c gunicorn.conf.py
+
+The app is imported and the predictor loaded once in the master process,
+before any worker is forked. Workers then share those pages copy-on-write
+instead of each unpickling its own copy of the model. Objects loaded in the
+master are moved out of the garbage collector's view (gc.freeze) so that
+collections in the workers do not write to, and so un-share, their pages.
+
+Set PRELOAD_MODEL=0 to go back to one private copy per worker, and
+MMAP_ARTIFACTS=1 to memory-map numpy arrays in the pickled model as well.
+Use benchmarks/worker_memory.py to compare unique memory per worker.
+"""
+
+import gc
+import os
+
+wsgi_app = "api:app"
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+
+PRELOAD_MODEL = os.environ.get("PRELOAD_MODEL", "1") == "1"
+preload_app = PRELOAD_MODEL
+
+
+def when_ready(server):
+    if not PRELOAD_MODEL:
+        return
+    import api
+
+    try:
+        predictor = api.load_predictor()
+    except FileNotFoundError as e:
+        server.log.warning("Model not preloaded, workers will load it on demand: %s", e)
+        return
+    gc.collect()
+    gc.freeze()
+    server.log.info(
+        "Preloaded %s artifacts before fork in %.0f ms",
+        api.SERVING_MODE,
+        sum(predictor.load_times_ms.values()),
+    )
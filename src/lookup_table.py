@@ -0,0 +1,130 @@
+"""
+Dense prediction table for visa processing days.
+The model only sees a finite input domain (country, visa type, application
+month and processing office), so its predictions can be computed once for the
+whole grid and served by array lookup without calling the model.
+"""
+
+import hashlib
+import itertools
+
+import numpy as np
+
+from feature_encoder import FeatureEncoder, application_month
+
+MONTHS = np.arange(1, 13)
+
+
+def feature_signature(feature_names):
+    """Short hash of the feature layout, used to reject tables built for other preprocessing info."""
+    return hashlib.sha1("\n".join(feature_names).encode("utf-8")).hexdigest()[:16]
+
+
+def domain_rows(prep):
+    """
+    Every (country, visa_type, month, office) input the model can tell apart.
+
+    Returns:
+    --------
+    countries, visa_types, offices : sorted lists of the grid axes
+    rows : list of dict
+        One application per grid cell, in C x V x 12 x O order
+    """
+    office_map = prep.get("office_map", {})
+    countries = sorted(office_map)
+    visa_types = sorted(prep.get("visa_avg", {}))
+    offices = sorted(set(office_map.values()))
+    rows = [
+        {"country": c, "visa_type": v, "application_date": f"2000-{m:02d}-01", "processing_office": o}
+        for c, v, m, o in itertools.product(countries, visa_types, MONTHS, offices)
+    ]
+    return countries, visa_types, offices, rows
+
+
+def build_lookup_table(model, prep):
+    """
+    Evaluate model over every (country, visa_type, month, office) combination.
+
+    Parameters:
+    -----------
+    model : fitted estimator
+        Model trained on prep['feature_names'].
+    prep : dict
+        Preprocessing info saved by Milestone3.
+
+    Returns:
+    --------
+    dict : 'table' (float32 array of shape C x V x 12 x O) plus the category
+        arrays indexing its axes and the feature signature
+    """
+    countries, visa_types, offices, rows = domain_rows(prep)
+    X = FeatureEncoder(prep).encode_many(rows)
+    table = np.asarray(model.predict(X), dtype=np.float32) if len(X) else np.zeros(0, dtype=np.float32)
+    return {
+        "table": table.reshape(len(countries), len(visa_types), len(MONTHS), len(offices)),
+        "countries": np.array(countries, dtype=str),
+        "visa_types": np.array(visa_types, dtype=str),
+        "offices": np.array(offices, dtype=str),
+        "signature": np.array(feature_signature(prep["feature_names"])),
+    }
+
+
+def save_lookup_table(path, arrays):
+    np.savez(path, **arrays)
+
+
+class LookupTable:
+    """Read-only prediction grid with index maps for each axis."""
+
+    def __init__(self, table, countries, visa_types, offices, signature=None):
+        self.table = table
+        self.country_idx = {c: i for i, c in enumerate(countries)}
+        self.visa_idx = {v: i for i, v in enumerate(visa_types)}
+        self.office_idx = {o: i for i, o in enumerate(offices)}
+        self.signature = signature
+
+    @classmethod
+    def load(cls, path, prep=None):
+        with np.load(path, allow_pickle=False) as data:
+            lookup = cls(
+                data["table"],
+                data["countries"].tolist(),
+                data["visa_types"].tolist(),
+                data["offices"].tolist(),
+                str(data["signature"]) if "signature" in data else None,
+            )
+        if prep is not None and lookup.signature != feature_signature(prep["feature_names"]):
+            raise ValueError(f"Prediction table {path} was built for different preprocessing info. Re-run Milestone3.py.")
+        return lookup
+
+    def _index(self, country, visa_type, month, office):
+        ci = self.country_idx.get(country)
+        vi = self.visa_idx.get(visa_type)
+        oi = self.office_idx.get(office)
+        if ci is None or vi is None or oi is None:
+            return None
+        return ci, vi, month - 1, oi
+
+    def lookup(self, country, visa_type, application_date, office):
+        """Raw model prediction for one input, or None when a category is not in the grid."""
+        idx = self._index(country, visa_type, application_month(application_date), office)
+        return None if idx is None else float(self.table[idx])
+
+    def lookup_many(self, keys):
+        """
+        Look up (country, visa_type, application_date, office) tuples.
+
+        Returns:
+        --------
+        np.ndarray : float64 predictions with NaN where the grid has no entry
+        """
+        out = np.full(len(keys), np.nan)
+        hits, positions = [], []
+        for i, (country, visa_type, application_date, office) in enumerate(keys):
+            idx = self._index(country, visa_type, application_month(application_date), office)
+            if idx is not None:
+                hits.append(idx)
+                positions.append(i)
+        if hits:
+            out[positions] = self.table[tuple(np.array(hits).T)]
+        return out
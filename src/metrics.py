@@ -0,0 +1,212 @@
+"""
+Request metrics for the VisaAI backend in the Prometheus text format.
+Dependency-free histograms and counters, plus a per-request RequestTimer that
+splits a request into contiguous stages (parse, fetch, features, predict,
+serialize, ...) by taking one perf_counter() reading at each stage boundary.
+
+    timer = RequestTimer()
+    ...
+    timer.mark("parse")
+    ...
+    timer.finish(route, method, status)   # observe into REGISTRY
+    response.headers["Server-Timing"] = timer.server_timing()
+
+REGISTRY.render() produces the /metrics body. Values are per process: under
+gunicorn every worker keeps its own series and a scrape reads one worker.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; the low end resolves the sub-millisecond stages (feature building)
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}_total{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last slot is +Inf), sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def count(self, *labels):
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, n in zip((*self.buckets, float("inf")), counts):
+                cumulative += n
+                le = (("le", _format_value(bound)),)
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+REQUEST_SECONDS = REGISTRY.histogram(
+    "visa_api_request_seconds", "End-to-end request latency in seconds.", ("route", "method", "status")
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "visa_api_stage_seconds", "Time spent per request stage in seconds.", ("route", "method", "stage")
+)
+ERRORS = REGISTRY.counter("visa_api_errors", "Responses with a 4xx/5xx status.", ("route", "method", "status"))
+FALLBACKS = REGISTRY.counter(
+    "visa_api_fallbacks",
+    "Inputs scored through a fallback: an unknown country / visa_type / processing_office "
+    "(mean average, no one-hot) or a prediction-table miss answered by the model.",
+    ("kind",),
+)
+
+PREDICTION_CACHE = REGISTRY.counter(
+    "visa_api_prediction_cache",
+    "GET /predict outcomes: not_modified (304), hit (answered from memory) or miss (model call).",
+    ("result",),
+)
+
+
+class RequestTimer:
+    """
+    Stage timings and fallback counts of one request.
+
+    mark(stage) closes the stage that started at the previous mark (or at
+    construction), so the stages add up to the request time without any
+    nesting or context managers on the hot path.
+    """
+
+    __slots__ = ("start", "last", "stages", "fallbacks")
+
+    def __init__(self):
+        self.start = self.last = time.perf_counter()
+        self.stages = []
+        self.fallbacks = {}
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.stages.append((stage, now - self.last))
+        self.last = now
+
+    def count(self, kind, n=1):
+        if n:
+            self.fallbacks[kind] = self.fallbacks.get(kind, 0) + n
+
+    def count_all(self, counts):
+        for kind, n in counts.items():
+            self.count(kind, n)
+
+    def finish(self, route, method, status, final_stage="serialize"):
+        """
+        Close final_stage, observe everything into REGISTRY; returns the total seconds.
+        method keeps routes serving several methods (GET /predict answers from its
+        cache, POST /predict calls the model) in separate series.
+        """
+        self.mark(final_stage)
+        total = self.last - self.start
+        status = str(status)
+        REQUEST_SECONDS.observe(total, route, method, status)
+        for stage, seconds in self.stages:
+            STAGE_SECONDS.observe(seconds, route, method, stage)
+        if status[0] in "45":
+            ERRORS.inc(route, method, status)
+        for kind, n in self.fallbacks.items():
+            FALLBACKS.inc(kind, amount=n)
+        return total
+
+    def server_timing(self):
+        """Server-Timing header value, durations in milliseconds."""
+        parts = [f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in self.stages]
+        parts.append(f"total;dur={(self.last - self.start) * 1000:.3f}")
+        return ", ".join(parts)
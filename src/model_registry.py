@@ -0,0 +1,369 @@
+"""
+Versioned model registry with atomic activation, hot swap and rollback.
+Every training run publishes its artifacts as one immutable version
+directory; servers follow a CURRENT pointer and swap their in-memory
+Predictor when it moves, without a restart.
+
+Layout:
+    <root>/versions/<version>/
+        model.pkl, model.npz, student.npz, prediction_table.npz, preprocessing_info.pkl
+        manifest.json      version, created_at, sha256 / size per file, metadata
+    <root>/CURRENT         {"version": ..., "history": [previously active, ...]}
+
+publish() copies the artifacts into a temporary directory, writes the
+manifest last and renames the directory into place, so a version is either
+complete or absent and a model can never be paired with another run's
+feature_names. activate() and rollback() rewrite CURRENT through os.replace.
+
+LivePredictor serves the active version in one process. It re-reads CURRENT
+(a few hundred bytes) at most every poll_interval seconds; when the version changed it loads and
+warms the new Predictor on a background thread while requests keep using the
+old one, then swaps the reference. The previously active Predictor stays in
+memory, so a rollback swaps back immediately. Loads are serialized, so
+concurrent first requests load a version once. A version that fails to
+verify or load is recorded in LivePredictor.failed and logged, and is not
+retried until CURRENT points elsewhere.
+
+    registry = ModelRegistry("model_registry")
+    version = registry.publish({"model": "model.pkl", "prep": "preprocessing_info.pkl"})
+    live = LivePredictor(registry)
+    live.get().predict_one("India", "Student", "2024-06-15")
+    registry.rollback()
+"""
+
+import hashlib
+import json
+import logging
+import os
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None
+
+# Artifact kind -> file name inside a version directory
+ARTIFACT_FILES = {
+    "model": "model.pkl",
+    "compiled": "model.npz",
+    "student": "student.npz",
+    "table": "prediction_table.npz",
+    "prep": "preprocessing_info.pkl",
+}
+MANIFEST = "manifest.json"
+# Niceness of the thread that loads a new version next to live traffic
+LOADER_NICENESS = 10
+
+
+def _sha256(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _write_json_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(prefix=".tmp_", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class ModelRegistry:
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.versions_dir = os.path.join(self.root, "versions")
+        self.current_path = os.path.join(self.root, "CURRENT")
+
+    # ----- versions -----
+
+    def versions(self):
+        """Published versions, oldest first."""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(
+            v for v in os.listdir(self.versions_dir)
+            if not v.startswith(".") and os.path.exists(os.path.join(self.versions_dir, v, MANIFEST))
+        )
+
+    def manifest(self, version):
+        if not isinstance(version, str) or version.startswith(".") or os.path.basename(version) != version:
+            raise KeyError(f"Unknown model version: {version}")
+        path = os.path.join(self.versions_dir, version, MANIFEST)
+        if not os.path.exists(path):
+            raise KeyError(f"Unknown model version: {version}")
+        with open(path) as f:
+            return json.load(f)
+
+    def path(self, version, kind):
+        """Path of one artifact of version, or None when it was not published."""
+        name = ARTIFACT_FILES[kind]
+        return os.path.join(self.versions_dir, version, name) if name in self.manifest(version)["files"] else None
+
+    def verify(self, version):
+        """Raise ValueError when a file of version no longer matches its manifest."""
+        for name, info in self.manifest(version)["files"].items():
+            if _sha256(os.path.join(self.versions_dir, version, name)) != info["sha256"]:
+                raise ValueError(f"Model version {version}: {name} does not match its manifest")
+
+    def publish(self, artifacts, metadata=None, activate=True):
+        """
+        Copy one training run's artifacts into a new immutable version.
+
+        Parameters:
+        -----------
+        artifacts : dict
+            Artifact kind ('model', 'compiled', 'student', 'table', 'prep') -> file
+            path. 'prep' and one of 'model' / 'compiled' are required.
+        metadata : dict, optional
+            JSON-serializable extras stored in the manifest (metrics, ...).
+        activate : bool
+            Make the new version the active one.
+
+        Returns:
+        --------
+        str : The new version id (<UTC timestamp>-<random hex>, sortable)
+        """
+        unknown = set(artifacts) - set(ARTIFACT_FILES)
+        if unknown:
+            raise ValueError(f"Unknown artifact kinds: {sorted(unknown)}")
+        if "prep" not in artifacts or not ({"model", "compiled"} & set(artifacts)):
+            raise ValueError("A version needs 'prep' and a 'model' or 'compiled' artifact")
+
+        os.makedirs(self.versions_dir, exist_ok=True)
+        version = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime()) + "-" + secrets.token_hex(3)
+        tmp = tempfile.mkdtemp(prefix=".tmp_", dir=self.versions_dir)
+        try:
+            files = {}
+            for kind, src in artifacts.items():
+                name = ARTIFACT_FILES[kind]
+                dst = os.path.join(tmp, name)
+                shutil.copyfile(src, dst)
+                os.chmod(dst, 0o444)
+                files[name] = {"sha256": _sha256(dst), "size": os.path.getsize(dst)}
+            manifest = {
+                "version": version,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "files": files,
+                "metadata": metadata or {},
+            }
+            with open(os.path.join(tmp, MANIFEST), "w") as f:
+                json.dump(manifest, f, indent=2)
+            os.chmod(tmp, 0o755)  # mkdtemp creates it owner-only
+            os.rename(tmp, os.path.join(self.versions_dir, version))
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        if activate:
+            self.activate(version)
+        return version
+
+    # ----- active version -----
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.root, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.root, ".lock"), "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def state(self):
+        """{'version': active version or None, 'history': previously active versions, oldest first}"""
+        try:
+            with open(self.current_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"version": None, "history": []}
+
+    def current(self):
+        return self.state()["version"]
+
+    def activate(self, version):
+        """Point CURRENT at version; the version it replaces becomes the rollback target."""
+        self.manifest(version)
+        with self._locked():
+            state = self.state()
+            if state["version"] == version:
+                return version
+            history = state["history"] + ([state["version"]] if state["version"] else [])
+            _write_json_atomic(self.current_path, {"version": version, "history": history})
+        return version
+
+    def rollback(self):
+        """Re-activate the previously active version; returns it."""
+        with self._locked():
+            state = self.state()
+            if not state["history"]:
+                raise ValueError("No previous model version to roll back to")
+            version = state["history"][-1]
+            _write_json_atomic(self.current_path, {"version": version, "history": state["history"][:-1]})
+        return version
+
+
+class LivePredictor:
+    """
+    The registry's active version as a Predictor, swapped in place when it changes.
+
+    Parameters:
+    -----------
+    registry : ModelRegistry
+    mode : str
+        'model', 'compiled', 'student' or 'table', as SERVING_MODE in api.py.
+    mmap : bool
+        Memory-map numpy arrays in the pickled model.
+    poll_interval : float
+        Seconds between checks of CURRENT from get().
+    keep : int
+        Loaded versions kept in memory (the active one included).
+    """
+
+    def __init__(self, registry, mode="model", mmap=False, poll_interval=5.0, keep=2):
+        self.registry = registry
+        self.mode = mode
+        self.mmap = mmap
+        self.poll_interval = poll_interval
+        self.keep = keep
+        self._active = None  # (version, Predictor), replaced as a whole
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+        # Held while loading; reentrant because get() loads through swap_to()
+        self._load_lock = threading.RLock()
+        self._loader = None
+        self._next_poll = 0.0
+        # {'version', 'error'} of the last version that failed to load, or None
+        self.failed = None
+
+    @property
+    def version(self):
+        active = self._active
+        return active[0] if active is not None else None
+
+    def get(self):
+        """Predictor of the active version; loads it on first use, otherwise never blocks."""
+        now = time.monotonic()
+        if now >= self._next_poll:
+            self._next_poll = now + self.poll_interval
+            self._poll()
+        active = self._active
+        if active is None:
+            with self._load_lock:
+                active = self._active
+                if active is None:
+                    version = self.registry.current()
+                    if version is None:
+                        raise FileNotFoundError(f"No active model version in {self.registry.root}")
+                    failed = self.failed
+                    if failed is not None and failed["version"] == version:
+                        raise ValueError(f"Model version {version} failed to load: {failed['error']}")
+                    return self.swap_to(version)
+        return active[1]
+
+    def _poll(self):
+        if self._active is None:
+            return
+        try:
+            version = self.registry.current()
+        except (OSError, ValueError):
+            return
+        failed = self.failed
+        if failed is not None and version != failed["version"]:
+            # CURRENT moved on; the failed version gets a retry if it comes back
+            self.failed = failed = None
+        if version is not None and version != self.version and failed is None:
+            self.swap_in_background(version)
+
+    def swap_in_background(self, version):
+        with self._lock:
+            if self._loader is not None and self._loader.is_alive():
+                # A load is already running; the next poll retries if it was another version
+                return self._loader
+            self._loader = threading.Thread(target=self._background_swap, args=(version,), name="model-swap", daemon=True)
+            self._loader.start()
+            return self._loader
+
+    def _background_swap(self, version):
+        # Yield the CPU to request threads while loading (per-thread nice on Linux)
+        if hasattr(os, "setpriority") and hasattr(threading, "get_native_id"):
+            try:
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), LOADER_NICENESS)
+            except OSError:
+                pass
+        try:
+            self.swap_to(version)
+        except Exception:
+            pass  # recorded in self.failed and logged by swap_to
+
+    def wait(self, timeout=None):
+        """Wait for a background swap to finish."""
+        loader = self._loader
+        if loader is not None:
+            loader.join(timeout)
+
+    def _load(self, version):
+        from predictor import Predictor
+
+        self.registry.verify(version)
+        model_kind = self.mode if self.mode in ("compiled", "student") else "model"
+        model_path = self.registry.path(version, model_kind)
+        if model_path is None:
+            raise FileNotFoundError(f"Model version {version} has no '{model_kind}' artifact")
+        predictor = Predictor.from_files(
+            model_path,
+            self.registry.path(version, "prep"),
+            self.registry.path(version, "table") if self.mode == "table" else None,
+            mmap=self.mmap,
+        )
+        predictor.version = version
+        # Warm up so the first real request after the swap pays no lazy init;
+        # known categories, so table mode does not load its fallback model
+        prep = predictor.prep
+        predictor.predict_one(next(iter(prep["country_avg"]), "Unknown"), next(iter(prep["visa_avg"]), "Unknown"), "2000-01-01")
+        return predictor
+
+    def swap_to(self, version):
+        """Load (or reuse) version and make it active; returns its Predictor."""
+        predictor = self._loaded.get(version)
+        if predictor is None:
+            with self._load_lock:
+                predictor = self._loaded.get(version)
+                if predictor is None:
+                    try:
+                        predictor = self._load(version)
+                    except Exception as e:
+                        self.failed = {"version": version, "error": f"{type(e).__name__}: {e}"}
+                        logger.error("Model version %s failed to load: %s", version, self.failed["error"])
+                        raise
+                    if self.failed is not None and self.failed["version"] == version:
+                        self.failed = None
+                    # Visible to threads waiting on the load lock for the same version
+                    with self._lock:
+                        self._loaded[version] = predictor
+        with self._lock:
+            self._loaded[version] = predictor
+            self._loaded.move_to_end(version)
+            while len(self._loaded) > self.keep:
+                self._loaded.popitem(last=False)
+            self._active = (version, predictor)
+        return predictor
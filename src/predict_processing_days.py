@@ -4,31 +4,19 @@ This script loads the trained model and makes predictions for website integratio
 """
 
 import os
-import numpy as np
 import pandas as pd
-import joblib
-import pickle
-from datetime import datetime
+
+from feature_encoder import season_for_month
+from predictor import get_predictor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(BASE_DIR, "visa_processing_model.pkl")
+PREPROCESSING_PATH = os.path.join(BASE_DIR, "preprocessing_info.pkl")
 
 def load_model_and_preprocessing():
-    """Load the trained model and preprocessing information."""
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    model_path = os.path.join(base_dir, "visa_processing_model.pkl")
-    preprocessing_path = os.path.join(base_dir, "preprocessing_info.pkl")
-    
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(f"Model file not found: {model_path}. Please run Milestone3.py first.")
-    
-    if not os.path.exists(preprocessing_path):
-        raise FileNotFoundError(f"Preprocessing file not found: {preprocessing_path}. Please run Milestone3.py first.")
-    
-    model = joblib.load(model_path)
-    
-    with open(preprocessing_path, 'rb') as f:
-        preprocessing_info = pickle.load(f)
-    
-    return model, preprocessing_info
+    """Load the trained model and preprocessing information (cached per process)."""
+    predictor = get_predictor(MODEL_PATH, PREPROCESSING_PATH)
+    return predictor.model, predictor.prep
 
 def predict_processing_days(application_date, country, visa_type):
     """
@@ -48,7 +36,8 @@ def predict_processing_days(application_date, country, visa_type):
     dict : Dictionary containing prediction and details
     """
     # Load model and preprocessing info
-    model, prep_info = load_model_and_preprocessing()
+    predictor = get_predictor(MODEL_PATH, PREPROCESSING_PATH)
+    prep_info = predictor.prep
     
     # Convert application_date to datetime
     if isinstance(application_date, str):
@@ -57,47 +46,13 @@ def predict_processing_days(application_date, country, visa_type):
         app_date = application_date
     
     # Extract features
-    application_month = app_date.month
-    season = "Peak" if application_month in [1, 2, 12] else "Off-Peak"
+    season = season_for_month(app_date.month)
     
     # Get processing office
-    office_map = prep_info['office_map']
-    processing_office = office_map.get(country, "Unknown")
-    
-    # Get country and visa averages
-    country_avg = prep_info['country_avg'].get(country, prep_info['mean_processing_days'])
-    visa_avg = prep_info['visa_avg'].get(visa_type, prep_info['mean_processing_days'])
-    
-    # Create feature vector
-    feature_names = prep_info['feature_names']
-    feature_dict = {name: 0 for name in feature_names}
-    
-    # Set numeric features
-    feature_dict['application_month'] = application_month
-    feature_dict['country_avg'] = country_avg
-    feature_dict['visa_avg'] = visa_avg
-    
-    # Set categorical features (one-hot encoding)
-    country_col = f"country_{country}"
-    visa_col = f"visa_type_{visa_type}"
-    season_col = f"season_{season}"
-    office_col = f"processing_office_{processing_office}"
-    
-    if country_col in feature_dict:
-        feature_dict[country_col] = 1
-    if visa_col in feature_dict:
-        feature_dict[visa_col] = 1
-    if season_col in feature_dict:
-        feature_dict[season_col] = 1
-    if office_col in feature_dict:
-        feature_dict[office_col] = 1
-    
-    # Convert to DataFrame with correct column order
-    feature_df = pd.DataFrame([feature_dict])[feature_names]
+    processing_office = predictor.encoder.resolve_office(country)
     
-    # Make prediction
-    prediction = model.predict(feature_df)[0]
-    prediction = max(0, round(prediction, 1))  # Ensure non-negative and round to 1 decimal
+    # Make prediction (non-negative, rounded to 1 decimal)
+    prediction = predictor.predict_one(country, visa_type, app_date, processing_office)
     
     return {
         'predicted_days': prediction,
@@ -0,0 +1,378 @@
+"""
+Shared predictor for visa processing days.
+Loads the trained model and preprocessing info once per process and reuses
+them for every prediction made by the Flask API, the Milestone4 app and
+predict_processing_days().
+"""
+
+import hashlib
+import itertools
+import os
+import pickle
+import threading
+import time
+import warnings
+from datetime import date
+
+import numpy as np
+
+from feature_encoder import FeatureEncoder, application_month, parse_month
+from lookup_table import LookupTable
+from tree_engine import load_compiled
+
+# Models are fitted on a DataFrame; the encoder hands them plain arrays.
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+MODEL_PATH = os.path.join(BASE_DIR, "visa_processing_model.pkl")
+PREPROCESS_PATH = os.path.join(BASE_DIR, "preprocessing_info.pkl")
+
+SWEEP_DIMENSIONS = ("month", "office", "visa_type")
+
+_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+# float64 encoders for build_feature_vector: id(prep) -> (prep, encoder)
+_ENCODERS = {}
+_MAX_ENCODERS = 8
+
+
+def _float64_encoder(prep):
+    cached = _ENCODERS.get(id(prep))
+    # The prep reference guards against a reused id of a freed dict
+    if cached is not None and cached[0] is prep:
+        return cached[1]
+    encoder = FeatureEncoder(prep, dtype=np.float64)
+    with _CACHE_LOCK:
+        if len(_ENCODERS) >= _MAX_ENCODERS:
+            _ENCODERS.clear()
+        _ENCODERS[id(prep)] = (prep, encoder)
+    return encoder
+
+
+def build_feature_vector(prep, country, visa_type, application_date_str, processing_office=None):
+    """One application as a single-row DataFrame in feature_names order (float64)."""
+    import pandas as pd
+
+    X = _float64_encoder(prep).encode_one(country, visa_type, application_date_str, processing_office)
+    return pd.DataFrame(X.copy(), columns=prep["feature_names"])
+
+
+def artifact_fingerprint(*paths):
+    """Short id of artifact files from their path, size and mtime (no need to read them)."""
+    h = hashlib.sha1()
+    for path in paths:
+        if path is not None:
+            st = os.stat(path)
+            h.update(f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()[:12]
+
+
+def validate_application(row):
+    """Return an error message for a malformed batch row, or None when it can be scored."""
+    if not isinstance(row, dict):
+        return "Each application must be a JSON object"
+    for field in ("country", "visa_type", "application_date"):
+        if row.get(field) is None:
+            return f"Missing field: {field}"
+    for field in ("country", "visa_type", "application_date", "processing_office"):
+        value = row.get(field)
+        if value is not None and not isinstance(value, str):
+            return f"Field {field} must be a string"
+    if parse_month(row["application_date"]) is None:
+        return f"Invalid application_date: {row['application_date']}"
+    return None
+
+
+def _clip_and_round(pred):
+    # sanity: clip negatives and round to 1 decimal
+    return round(max(0.0, float(pred)), 1)
+
+
+class Predictor:
+    """
+    Immutable bundle of a fitted model and its preprocessing info.
+
+    The model and the preprocessing dict are only read after construction,
+    so a single instance can be shared by concurrent request threads. When a
+    prediction table is attached, inputs inside its grid are answered from the
+    table and only unseen categories reach the model. Passing model=None with
+    a model_loader defers loading the model until the first such miss.
+    """
+
+    def __init__(self, model, prep, table=None, version=None, model_loader=None):
+        if model is None and model_loader is None:
+            raise ValueError("Predictor needs a model or a model_loader")
+        self._model = model
+        self._model_loader = model_loader
+        self._model_lock = threading.Lock()
+        self.prep = prep
+        self.table = table
+        # Identifies the artifacts behind every prediction (HTTP ETags)
+        self.version = version
+        self.feature_names = list(prep["feature_names"])
+        self.encoder = FeatureEncoder(prep)
+        self.load_times_ms = {}
+
+    @property
+    def model(self):
+        model = self._model
+        if model is None:
+            with self._model_lock:
+                if self._model is None:
+                    start = time.perf_counter()
+                    self._model = self._model_loader()
+                    self.load_times_ms["model"] = (time.perf_counter() - start) * 1000
+                model = self._model
+        return model
+
+    @classmethod
+    def from_files(cls, model_path=MODEL_PATH, preprocess_path=PREPROCESS_PATH, table_path=None, mmap=False):
+        """
+        Load a Predictor from artifact files.
+
+        With mmap=True the numpy arrays stored in a joblib-pickled model are
+        memory-mapped read-only instead of copied onto the heap, so processes
+        loading the same file share those pages through the page cache.
+        With a table_path, a pickled model is only loaded on the first table
+        miss, so requests inside the table's grid never import scikit-learn.
+        """
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model file not found: {model_path}. Please run Milestone3.py first.")
+        if not os.path.exists(preprocess_path):
+            raise FileNotFoundError(f"Preprocessing file not found: {preprocess_path}. Please run Milestone3.py first.")
+        if table_path is not None and not os.path.exists(table_path):
+            raise FileNotFoundError(f"Prediction table not found: {table_path}. Please run Milestone3.py first.")
+        load_times_ms = {}
+
+        def load_model():
+            # .npz models are compiled by tree_engine and load without scikit-learn
+            if model_path.endswith(".npz"):
+                return load_compiled(model_path)
+            import joblib
+
+            return joblib.load(model_path, mmap_mode="r" if mmap else None)
+
+        model = None
+        if table_path is None or model_path.endswith(".npz"):
+            start = time.perf_counter()
+            model = load_model()
+            load_times_ms["model"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with open(preprocess_path, "rb") as f:
+            prep = pickle.load(f)
+        load_times_ms["preprocessing_info"] = (time.perf_counter() - start) * 1000
+
+        table = None
+        if table_path is not None:
+            start = time.perf_counter()
+            table = LookupTable.load(table_path, prep)
+            load_times_ms["table"] = (time.perf_counter() - start) * 1000
+
+        predictor = cls(model, prep, table, artifact_fingerprint(model_path, preprocess_path, table_path), load_model)
+        predictor.load_times_ms = load_times_ms
+        return predictor
+
+    def etag(self, country, visa_type, application_date, processing_office=None):
+        """
+        Strong ETag (unquoted) of the prediction for these inputs, or None
+        when application_date cannot be parsed.
+
+        A prediction depends only on the artifacts (self.version, table or
+        model) and the normalized inputs, where the date counts through its
+        month alone, so equal tags always mean equal estimated days.
+        """
+        month = parse_month(str(application_date))
+        if month is None:
+            return None
+        office = self.encoder.resolve_office(country, processing_office)
+        key = "\x1f".join(map(str, (self.version, self.table is not None, country, visa_type, month, office)))
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+
+    def predict_one(self, country, visa_type, application_date, processing_office=None, timer=None):
+        """
+        Predict processing days for one application.
+
+        timer is an optional metrics.RequestTimer; when given, the 'table',
+        'features' and 'predict' stages are marked on it and unknown inputs
+        and table misses are counted as fallbacks.
+        """
+        office = self.encoder.resolve_office(country, processing_office)
+        if timer is not None:
+            encoder = self.encoder
+            if country not in encoder.country_avg:
+                timer.count("country")
+            if visa_type not in encoder.visa_avg:
+                timer.count("visa_type")
+            if office not in encoder.known_offices:
+                timer.count("office")
+        if self.table is not None:
+            pred = self.table.lookup(country, visa_type, application_date, office)
+            if timer is not None:
+                timer.mark("table")
+            if pred is not None:
+                return _clip_and_round(pred)
+            if timer is not None:
+                timer.count("table_miss")
+        X = self.encoder.encode_one(country, visa_type, application_date, processing_office)
+        if timer is not None:
+            timer.mark("features")
+        pred = self.model.predict(X)[0]
+        if timer is not None:
+            timer.mark("predict")
+        return _clip_and_round(pred)
+
+    def predict_many(self, rows, timer=None):
+        """
+        Predict processing days for several applications with one model call.
+
+        Parameters:
+        -----------
+        rows : iterable of dict
+            Each dict holds 'country', 'visa_type', 'application_date' and
+            optionally 'processing_office'.
+        timer : metrics.RequestTimer, optional
+            Marked and counted as in predict_one.
+
+        Returns:
+        --------
+        list of float : Predicted days, in the same order as rows
+        """
+        rows = list(rows)
+        if not rows:
+            return []
+        if timer is not None:
+            countries = [r.get("country", "Unknown") for r in rows]
+            timer.count_all(self.encoder.unknown_counts(
+                countries,
+                [r.get("visa_type", "Unknown") for r in rows],
+                [self.encoder.resolve_office(c, r.get("processing_office")) for c, r in zip(countries, rows)],
+            ))
+        if self.table is None:
+            X = self.encoder.encode_many(rows)
+            if timer is not None:
+                timer.mark("features")
+            preds = self.model.predict(X)
+            if timer is not None:
+                timer.mark("predict")
+        else:
+            preds = self.table.lookup_many([
+                (
+                    r.get("country", "Unknown"),
+                    r.get("visa_type", "Unknown"),
+                    r.get("application_date"),
+                    self.encoder.resolve_office(r.get("country", "Unknown"), r.get("processing_office")),
+                )
+                for r in rows
+            ])
+            if timer is not None:
+                timer.mark("table")
+            misses = np.flatnonzero(np.isnan(preds))
+            if len(misses):
+                X = self.encoder.encode_many([rows[i] for i in misses])
+                if timer is not None:
+                    timer.count("table_miss", len(misses))
+                    timer.mark("features")
+                preds[misses] = self.model.predict(X)
+                if timer is not None:
+                    timer.mark("predict")
+        return [_clip_and_round(p) for p in preds]
+
+    def predict_batch(self, applications, timer=None):
+        """
+        Validate and score raw batch rows; invalid rows get an error entry.
+        timer (metrics.RequestTimer, optional) gets a 'validate' stage and
+        the predict_many stages.
+
+        Returns:
+        --------
+        list of dict : One result per application, in input order, with
+            'index', 'success' and either 'estimated_days' or 'error'
+        """
+        errors = [validate_application(row) for row in applications]
+        valid = [row for row, error in zip(applications, errors) if error is None]
+        if timer is not None:
+            timer.mark("validate")
+        days = iter(self.predict_many(valid, timer))
+
+        results = []
+        for i, error in enumerate(errors):
+            if error is None:
+                results.append({"index": i, "success": True, "estimated_days": next(days)})
+            else:
+                results.append({"index": i, "success": False, "error": error})
+        return results
+
+    def sweep(self, country, visa_type, application_date, processing_office=None, vary=("month",)):
+        """
+        Score every combination of the varied inputs in one model call.
+
+        Parameters:
+        -----------
+        vary : iterable of str
+            Any of 'month' (1-12), 'office' (every office in office_map) and
+            'visa_type' (every visa type seen in training). Inputs that are
+            not varied keep the given value.
+
+        Returns:
+        --------
+        list of dict : One entry per combination, fastest first, with
+            'application_month', 'processing_office', 'visa_type',
+            'estimated_days' and 'rank'
+        """
+        vary = set(vary)
+        unknown = vary.difference(SWEEP_DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Cannot vary {sorted(unknown)}; choose from {list(SWEEP_DIMENSIONS)}")
+
+        months = range(1, 13) if "month" in vary else [application_month(application_date)]
+        offices = (
+            sorted(set(self.encoder.office_map.values()))
+            if "office" in vary
+            else [self.encoder.resolve_office(country, processing_office)]
+        )
+        visa_types = sorted(self.encoder.visa_avg) if "visa_type" in vary else [visa_type]
+
+        rows = [
+            {"country": country, "visa_type": v, "application_date": date(2000, m, 1), "processing_office": o}
+            for m, o, v in itertools.product(months, offices, visa_types)
+        ]
+        days = self.predict_many(rows)
+        results = [
+            {
+                "application_month": r["application_date"].month,
+                "processing_office": r["processing_office"],
+                "visa_type": r["visa_type"],
+                "estimated_days": d,
+            }
+            for r, d in zip(rows, days)
+        ]
+        results.sort(key=lambda r: r["estimated_days"])
+        for rank, r in enumerate(results, start=1):
+            r["rank"] = rank
+        return results
+
+
+def get_predictor(model_path=MODEL_PATH, preprocess_path=PREPROCESS_PATH, table_path=None, mmap=False):
+    """Return the process-wide Predictor for the given artifacts, loading it on first use."""
+    key = (
+        os.path.abspath(model_path),
+        os.path.abspath(preprocess_path),
+        os.path.abspath(table_path) if table_path is not None else None,
+        mmap,
+    )
+    predictor = _CACHE.get(key)
+    if predictor is None:
+        with _CACHE_LOCK:
+            predictor = _CACHE.get(key)
+            if predictor is None:
+                predictor = Predictor.from_files(*key)
+                _CACHE[key] = predictor
+    return predictor
+
+
+def clear_cache():
+    """Drop all cached predictors so the next call reloads from disk."""
+    with _CACHE_LOCK:
+        _CACHE.clear()
+        _ENCODERS.clear()
@@ -0,0 +1,95 @@
+"""
+Sampled in-process profiling for production requests.
+SampledProfiler.wrap(view) runs a random sample_rate fraction of calls under
+cProfile and merges their stats in memory; every dump_interval seconds (on the
+next sampled call) the merged window is written to out_dir as a pstats file
+and a new window starts. The files open in any standard viewer:
+
+    python -m pstats profiles/predict-1234-20240615-120000-0.prof
+    snakeviz profiles/predict-1234-20240615-120000-0.prof
+
+Only one call is profiled at a time per process (cProfile cannot run two
+profilers at once on Python 3.12+); calls sampled while another is being
+profiled simply run unprofiled. Unsampled calls cost one random() draw, and
+api.py does not install the wrapper at all when profiling is off.
+"""
+
+import cProfile
+import os
+import pstats
+import random
+import threading
+import time
+from functools import wraps
+
+
+class SampledProfiler:
+    """
+    Parameters:
+    -----------
+    sample_rate : float
+        Fraction of calls to profile, 0-1.
+    out_dir : str
+        Directory for the .prof files (created on first dump).
+    dump_interval : float
+        Seconds between dumps of the aggregated stats.
+    prefix : str
+        File name prefix; files are <prefix>-<pid>-<YYYYmmdd-HHMMSS>-<n>.prof.
+    """
+
+    def __init__(self, sample_rate, out_dir, dump_interval=60.0, prefix="predict", seed=None):
+        self.sample_rate = float(sample_rate)
+        self.out_dir = out_dir
+        self.dump_interval = float(dump_interval)
+        self.prefix = prefix
+        self.samples = 0
+        self.dumps = 0
+        self._rng = random.Random(seed)
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+        self._stats = None
+        self._window_start = time.monotonic()
+
+    def wrap(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if self._rng.random() >= self.sample_rate or not self._busy.acquire(blocking=False):
+                return func(*args, **kwargs)
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(func, *args, **kwargs)
+            finally:
+                self._busy.release()
+                self.add(profile)
+
+        return wrapper
+
+    def add(self, profile):
+        """Merge one finished profile; dumps the window when dump_interval has passed."""
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+            self.samples += 1
+            if time.monotonic() - self._window_start >= self.dump_interval:
+                self._dump_locked()
+
+    def dump(self):
+        """Write the current window now; returns the file path, or None when nothing was sampled."""
+        with self._lock:
+            return self._dump_locked()
+
+    def _dump_locked(self):
+        stats, self._stats = self._stats, None
+        self._window_start = time.monotonic()
+        if stats is None:
+            return None
+        os.makedirs(self.out_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self.out_dir, f"{self.prefix}-{os.getpid()}-{stamp}-{self.dumps}.prof")
+        self.dumps += 1
+        tmp = path + ".tmp"
+        stats.dump_stats(tmp)
+        os.replace(tmp, path)
+        return path
@@ -0,0 +1,191 @@
+"""
+Pure-numpy inference for the models Milestone3 can select.
+compile_model() flattens a fitted RandomForestRegressor / GradientBoostingRegressor
+(or the LinearRegression baseline) into contiguous arrays, and CompiledModel
+scores whole batches with numpy only. Compiled models are saved as .npz files,
+so a serving process can load and use them without importing scikit-learn.
+"""
+
+import numpy as np
+
+# Rows x trees index matrices are walked in chunks of at most this many cells
+_MAX_CELLS = 1 << 22
+# Batches at least this large are de-duplicated first; the one-hot input
+# domain is small, so big batches repeat the same rows many times
+_DEDUP_MIN_ROWS = 256
+
+
+class CompiledModel:
+    """
+    Fitted model flattened into numpy arrays.
+
+    Trees are stored as one node table shared by every tree: per node a
+    feature index, a threshold, left/right child indices and a leaf value.
+    Leaves point to themselves (and are flagged in is_leaf); a batch is walked
+    level by level, advancing only the (row, tree) cells not yet on a leaf.
+    The prediction is
+
+        base + scale * sum(leaf values over trees)
+
+    which covers forest averaging (scale = 1 / n_trees) and boosting
+    (scale = learning_rate). Linear models keep coef/intercept instead.
+    """
+
+    def __init__(self, kind, arrays):
+        self.kind = kind
+        self.arrays = arrays
+        for name, value in arrays.items():
+            setattr(self, name, value)
+        if kind == "trees":
+            self.n_trees = len(self.roots)
+            self.base = float(self.base)
+            self.scale = float(self.scale)
+            self.max_depth = int(self.max_depth)
+            self.is_leaf = self.left == np.arange(len(self.left))
+
+    @property
+    def n_features_in_(self):
+        return int(self.arrays["n_features"])
+
+    def predict(self, X):
+        """Predict a (n, n_features) batch; returns float64 predictions."""
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.kind == "linear":
+            return X.astype(np.float64, copy=False) @ self.coef + float(self.intercept)
+
+        # Trees split on float32 features, exactly like scikit-learn
+        X = X.astype(np.float32, copy=False)
+        if len(X) >= _DEDUP_MIN_ROWS:
+            # Compare rows as raw bytes, much cheaper than np.unique(axis=0)
+            X = np.ascontiguousarray(X)
+            keys = X.view(np.dtype((np.void, X.itemsize * X.shape[1]))).ravel()
+            _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+            if len(first) <= len(X) // 2:
+                return self._predict_rows(X[first])[inverse.ravel()]
+        return self._predict_rows(X)
+
+    def _predict_rows(self, X):
+        out = np.empty(len(X), dtype=np.float64)
+        step = max(1, _MAX_CELLS // max(1, self.n_trees))
+        for start in range(0, len(X), step):
+            out[start:start + step] = self._predict_chunk(X[start:start + step])
+        return out
+
+    def _predict_chunk(self, X):
+        # One cell per (row, tree), row-major; only cells not yet on a leaf move
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        node = np.tile(self.roots, n_rows)
+        row_offset = np.repeat(np.arange(n_rows) * n_features, self.n_trees)
+        active = np.flatnonzero(~self.is_leaf[node])
+        while active.size:
+            current = node[active]
+            x = flat_X[row_offset[active] + self.feature[current]]
+            go_left = (x <= self.threshold[current]) | (np.isnan(x) & self.missing_left[current])
+            current = np.where(go_left, self.left[current], self.right[current])
+            node[active] = current
+            active = active[~self.is_leaf[current]]
+        leaf_values = self.value[node].reshape(n_rows, self.n_trees)
+        return self.base + self.scale * leaf_values.sum(axis=1, dtype=np.float64)
+
+
+def _float32_thresholds(threshold):
+    # x <= t for float32 x must keep its meaning after rounding t to float32,
+    # so round thresholds down rather than to nearest
+    t32 = threshold.astype(np.float32)
+    up = t32.astype(np.float64) > threshold
+    t32[up] = np.nextafter(t32[up], np.float32(-np.inf))
+    return t32
+
+
+def _flatten_trees(trees, dtype):
+    feature, threshold, left, right, value, missing_left, roots = [], [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for tree in trees:
+        t = tree.tree_
+        n = t.node_count
+        own = np.arange(offset, offset + n, dtype=np.int32)
+        is_leaf = t.children_left == -1
+
+        roots.append(offset)
+        feature.append(np.where(is_leaf, 0, t.feature).astype(np.int32))
+        threshold.append(np.where(is_leaf, np.inf, t.threshold))
+        left.append(np.where(is_leaf, own, t.children_left + offset).astype(np.int32))
+        right.append(np.where(is_leaf, own, t.children_right + offset).astype(np.int32))
+        value.append(t.value[:, 0, 0])
+        mgl = getattr(t, "missing_go_to_left", None)
+        missing_left.append(np.zeros(n, dtype=bool) if mgl is None else (np.asarray(mgl) != 0) & ~is_leaf)
+        max_depth = max(max_depth, int(t.max_depth))
+        offset += n
+
+    threshold = np.concatenate(threshold)
+    return {
+        "feature": np.concatenate(feature),
+        "threshold": _float32_thresholds(threshold) if dtype == np.float32 else threshold,
+        "left": np.concatenate(left),
+        "right": np.concatenate(right),
+        "value": np.concatenate(value).astype(dtype),
+        "missing_left": np.concatenate(missing_left),
+        "roots": np.array(roots, dtype=np.int32),
+        "max_depth": np.array(max_depth),
+    }
+
+
+def compile_model(model, dtype=np.float64):
+    """
+    Flatten a fitted model into a CompiledModel.
+
+    Parameters:
+    -----------
+    model : RandomForestRegressor, GradientBoostingRegressor or LinearRegression
+        Fitted single-output regressor.
+    dtype : np.float64 or np.float32
+        Storage type for thresholds and leaf values. float32 halves the size;
+        split decisions stay exact, leaf values are rounded.
+
+    Returns:
+    --------
+    CompiledModel : numpy-only equivalent of model.predict
+    """
+    n_features = np.array(model.n_features_in_)
+    name = type(model).__name__
+
+    if hasattr(model, "coef_"):
+        return CompiledModel("linear", {
+            "coef": np.ravel(model.coef_).astype(np.float64),
+            "intercept": np.array(float(np.ravel(model.intercept_)[0])),
+            "n_features": n_features,
+        })
+
+    if name in ("RandomForestRegressor", "ExtraTreesRegressor"):
+        trees = model.estimators_
+        base, scale = 0.0, 1.0 / len(trees)
+    elif name == "GradientBoostingRegressor":
+        trees = [stage[0] for stage in model.estimators_]
+        if model.init_ == "zero":
+            base = 0.0
+        else:
+            base = float(np.ravel(model.init_.predict(np.zeros((1, model.n_features_in_))))[0])
+        scale = model.learning_rate
+    elif name == "DecisionTreeRegressor":
+        trees = [model]
+        base, scale = 0.0, 1.0
+    else:
+        raise TypeError(f"Cannot compile model of type {name}")
+
+    arrays = _flatten_trees(trees, dtype)
+    arrays.update(base=np.array(base), scale=np.array(scale), n_features=n_features)
+    return CompiledModel("trees", arrays)
+
+
+def save_compiled(path, compiled):
+    np.savez(path, kind=np.array(compiled.kind), **compiled.arrays)
+
+
+def load_compiled(path):
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files if name != "kind"}
+        return CompiledModel(str(data["kind"]), arrays)
@@ -0,0 +1,13 @@
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+BENCHMARKS_DIR = os.path.join(ROOT_DIR, "benchmarks")
+NOTEBOOKS_DIR = os.path.join(ROOT_DIR, "notebooks")
+for path in (SRC_DIR, BENCHMARKS_DIR, NOTEBOOKS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+MODEL_PATH = os.path.join(ROOT_DIR, "models", "visa_processing_model.pkl")
+PREPROCESS_PATH = os.path.join(ROOT_DIR, "data", "preprocessing_info.pkl")
@@ -0,0 +1,130 @@
+"""Tests for the Flask API in src/api.py"""
+import pytest
+
+import api
+from conftest import MODEL_PATH, PREPROCESS_PATH
+from lookup_table import build_lookup_table, save_lookup_table
+from predictor import get_predictor
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(api, "MODEL_PATH", MODEL_PATH)
+    monkeypatch.setattr(api, "PREPROCESS_PATH", PREPROCESS_PATH)
+    return api.app.test_client()
+
+
+def test_predict(client):
+    resp = client.post("/predict", json={"country": "India", "visa_type": "Student", "application_date": "2024-06-15"})
+    assert resp.status_code == 200
+    assert resp.json["success"] is True
+    assert resp.json["estimated_days"] == get_predictor(MODEL_PATH, PREPROCESS_PATH).predict_one("India", "Student", "2024-06-15")
+
+
+def test_predict_batch_keeps_order_and_reports_row_errors(client):
+    applications = [
+        {"country": "India", "visa_type": "Student", "application_date": "2024-09-02"},
+        {"country": "Germany", "visa_type": "Tourist"},
+        "not an object",
+        {"country": "United Kingdom", "visa_type": "Work", "application_date": "2024-13-45"},
+        {"country": "United Kingdom", "visa_type": "Work", "application_date": "2024-04-29", "processing_office": "London"},
+    ]
+    resp = client.post("/predict/batch", json={"applications": applications})
+    assert resp.status_code == 200
+    results = resp.json["results"]
+    assert [r["index"] for r in results] == list(range(len(applications)))
+    assert [r["success"] for r in results] == [True, False, False, False, True]
+    assert resp.json["failed"] == 3
+
+    predictor = get_predictor(MODEL_PATH, PREPROCESS_PATH)
+    assert results[0]["estimated_days"] == predictor.predict_one("India", "Student", "2024-09-02")
+    assert results[4]["estimated_days"] == predictor.predict_one("United Kingdom", "Work", "2024-04-29", "London")
+
+
+def test_predict_batch_rejects_bad_bodies(client, monkeypatch):
+    assert client.post("/predict/batch", json=[1, 2]).status_code == 400
+    monkeypatch.setattr(api, "MAX_BATCH_SIZE", 2)
+    row = {"country": "India", "visa_type": "Student", "application_date": "2024-09-02"}
+    assert client.post("/predict/batch", json={"applications": [row] * 3}).status_code == 413
+
+
+def test_predict_table_mode(client, monkeypatch, tmp_path):
+    predictor = get_predictor(MODEL_PATH, PREPROCESS_PATH)
+    table_path = str(tmp_path / "prediction_table.npz")
+    save_lookup_table(table_path, build_lookup_table(predictor.model, predictor.prep))
+    monkeypatch.setattr(api, "TABLE_PATH", table_path)
+    monkeypatch.setattr(api, "SERVING_MODE", "table")
+
+    served = api.load_predictor()
+    assert served.table is not None
+    resp = client.post("/predict", json={"country": "India", "visa_type": "Student", "application_date": "2024-06-15"})
+    assert resp.status_code == 200
+    assert abs(resp.json["estimated_days"] - predictor.predict_one("India", "Student", "2024-06-15")) <= 0.1 + 1e-6
+
+    # The pickled fallback model is only loaded by the first table miss
+    assert served._model is None and "model" not in served.load_times_ms
+    resp = client.post("/predict", json={"country": "Atlantis", "visa_type": "Student", "application_date": "2024-06-15"})
+    assert resp.json["estimated_days"] == predictor.predict_one("Atlantis", "Student", "2024-06-15")
+    assert served._model is not None and "model" in served.load_times_ms
+
+
+def test_predict_sweep_ranks_every_combination(client):
+    predictor = get_predictor(MODEL_PATH, PREPROCESS_PATH)
+    resp = client.post("/predict/sweep", json={"country": "India", "visa_type": "Student", "vary": ["month", "office"]})
+    assert resp.status_code == 200
+    results = resp.json["results"]
+    n_offices = len(set(predictor.prep["office_map"].values()))
+    assert len(results) == 12 * n_offices
+    assert [r["rank"] for r in results] == list(range(1, len(results) + 1))
+    assert results == sorted(results, key=lambda r: r["estimated_days"])
+    assert resp.json["best"] == results[0]
+
+    for r in results[:5]:
+        date_str = f"2024-{r['application_month']:02d}-15"
+        assert r["estimated_days"] == predictor.predict_one("India", "Student", date_str, r["processing_office"])
+
+
+def test_predict_sweep_rejects_unknown_dimension(client):
+    resp = client.post("/predict/sweep", json={"country": "India", "visa_type": "Student", "vary": ["year"]})
+    assert resp.status_code == 400
+
+
+def test_get_predict_is_cacheable(client, monkeypatch):
+    calls = []
+    predictor = get_predictor(MODEL_PATH, PREPROCESS_PATH)
+    original = predictor.predict_one
+    monkeypatch.setattr(predictor, "predict_one", lambda *a, **k: calls.append(a) or original(*a, **k))
+    monkeypatch.setattr(api, "_answers", type(api._answers)())
+
+    query = {"country": "India", "visa_type": "Student", "application_date": "2024-06-15"}
+    first = client.get("/predict", query_string=query)
+    assert first.status_code == 200
+    assert first.json["estimated_days"] == original("India", "Student", "2024-06-15")
+    etag = first.headers["ETag"]
+    # Weak: equivalent (same month) rather than byte-identical bodies share it
+    assert etag.startswith('W/"')
+    assert first.headers["Cache-Control"].startswith("public, max-age=")
+
+    # Conditional repeat: 304 without a body; another day of the same month shares the answer
+    assert client.get("/predict", query_string=query, headers={"If-None-Match": etag}).status_code == 304
+    same_month = client.get("/predict", query_string={**query, "application_date": "2024-06-30"})
+    assert same_month.headers["ETag"] == etag
+    assert same_month.json["application_date"] == "2024-06-30"
+    assert len(calls) == 1
+
+    other = client.get("/predict", query_string={**query, "application_date": "2024-12-15"})
+    assert other.headers["ETag"] != etag and len(calls) == 2
+
+    monkeypatch.setattr(predictor, "version", "retrained")
+    assert client.get("/predict", query_string=query, headers={"If-None-Match": etag}).status_code == 200
+    assert client.get("/predict", query_string={**query, "application_date": "nope"}).status_code == 400
+
+
+def test_get_predict_errors_are_json(client, monkeypatch):
+    def broken():
+        raise FileNotFoundError("model missing")
+
+    monkeypatch.setattr(api, "load_predictor", broken)
+    resp = client.get("/predict", query_string={"country": "India", "visa_type": "Student", "application_date": "2024-06-15"})
+    assert resp.status_code == 500
+    assert resp.json == {"success": False, "error": "model missing"}
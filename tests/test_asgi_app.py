@@ -0,0 +1,43 @@
+"""Tests for the ASGI variant of the API in src/asgi_app.py"""
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+
+import asgi_app
+from conftest import MODEL_PATH, PREPROCESS_PATH
+from predictor import get_predictor
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(asgi_app, "MODEL_PATH", MODEL_PATH)
+    monkeypatch.setattr(asgi_app, "PREPROCESS_PATH", PREPROCESS_PATH)
+    return TestClient(asgi_app.app)
+
+
+def test_health(client):
+    assert client.get("/health").json()["status"] == "ok"
+
+
+def test_predict_matches_flask_contract(client):
+    resp = client.post("/predict", json={"country": "India", "visa_type": "Student", "application_date": "2024-06-15"})
+    assert resp.status_code == 200
+    assert resp.json() == {
+        "success": True,
+        "country": "India",
+        "visa_type": "Student",
+        "application_date": "2024-06-15",
+        "estimated_days": get_predictor(MODEL_PATH, PREPROCESS_PATH).predict_one("India", "Student", "2024-06-15"),
+    }
+
+
+def test_predict_batch(client):
+    applications = [
+        {"country": "India", "visa_type": "Student", "application_date": "2024-09-02"},
+        {"country": "Germany", "visa_type": "Tourist", "application_date": "bad"},
+    ]
+    resp = client.post("/predict/batch", json={"applications": applications})
+    assert resp.status_code == 200
+    assert [r["success"] for r in resp.json()["results"]] == [True, False]
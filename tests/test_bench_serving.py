@@ -0,0 +1,21 @@
+"""Tests for the serving benchmark helpers in benchmarks/bench_serving.py"""
+from bench_serving import compare_to_baseline, sample_requests, time_stage
+
+
+def test_time_stage_reports_percentiles():
+    stats = time_stage(lambda: sum(range(100)), repeat=20, rows=100)
+    assert stats["p50_ms"] <= stats["p99_ms"]
+    assert stats["rows_per_sec"] > 0
+
+
+def test_compare_flags_regressions():
+    baseline = {"modes": {"model": {"predict_one": {"p50_ms": 1.0}, "encode_one": {"p50_ms": 1.0}}}}
+    results = {"modes": {"model": {"predict_one": {"p50_ms": 1.1}, "encode_one": {"p50_ms": 2.0}, "new_stage": {"p50_ms": 5.0}}}}
+    rows = {r["stage"]: r for r in compare_to_baseline(results, baseline, tolerance=0.25)}
+    assert set(rows) == {"predict_one", "encode_one"}
+    assert not rows["predict_one"]["regressed"]
+    assert rows["encode_one"]["regressed"]
+
+
+def test_sample_requests_are_reproducible():
+    assert sample_requests(5, seed=1) == sample_requests(5, seed=1)
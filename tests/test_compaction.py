@@ -0,0 +1,82 @@
+"""Tests for post-training model compaction in notebooks/compaction.py"""
+import os
+
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.model_selection import train_test_split
+
+from compaction import compact_model, node_count, prune_tree
+from conftest import ROOT_DIR
+from features import build_training_features
+from tree_engine import compile_model
+
+
+@pytest.fixture(scope="module")
+def split():
+    X, y, _ = build_training_features(os.path.join(ROOT_DIR, "visa_dataset.csv"))
+    X_train, X_test, y_train, y_test = train_test_split(X.to_numpy(np.float64), y.to_numpy(np.float64), test_size=0.3, random_state=42)
+    return X_train, X_test, y_train, y_test
+
+
+def test_zero_gain_keeps_predictions(split):
+    X_train, X_test, y_train, y_test = split
+    forest = RandomForestRegressor(n_estimators=10, random_state=42).fit(X_train, y_train)
+    compact, report = compact_model(forest, X_test, y_test, min_gain=0.0)
+    assert compact is not forest
+    assert report["nodes_after"] <= report["nodes_before"]
+    assert np.allclose(compact.predict(X_test), forest.predict(X_test))
+
+
+def test_pruned_tree_is_consistent(split):
+    X_train, X_test, y_train, y_test = split
+    model = GradientBoostingRegressor(n_estimators=20, max_depth=6, random_state=42).fit(X_train, y_train)
+    tree = model.estimators_[0][0]
+    before = tree.tree_.node_count
+    assert prune_tree(tree, 1e9) == 1 and tree.tree_.max_depth == 0
+    assert tree.predict(X_test[:3]) == pytest.approx([tree.tree_.value[0, 0, 0]] * 3)
+    assert before > 1
+
+    # Every pruned model still compiles to the same numbers, in float32 too
+    compact, _ = compact_model(model, X_test, y_test, min_gain=1e-2)
+    compiled = compile_model(compact, dtype=np.float32)
+    assert np.allclose(compiled.predict(X_test), compact.predict(X_test), atol=1e-3)
+
+
+def test_budgets_are_enforced(split):
+    X_train, X_test, y_train, y_test = split
+    forest = RandomForestRegressor(n_estimators=10, random_state=42).fit(X_train, y_train)
+    compact, report = compact_model(forest, X_test, y_test, max_nodes=300, max_bytes=200_000)
+    assert node_count(compact) <= 300 and report["nodes_after"] == node_count(compact)
+    assert report["pickle_bytes_after"] <= 200_000
+    assert report["min_gain"] > 0 and report["note"] is None
+    assert report["mae_delta"] == pytest.approx(report["mae_after"] - report["mae_before"])
+
+    with pytest.raises(ValueError):
+        compact_model(forest, X_test, y_test, max_nodes=5)
+
+
+def test_linear_model_is_returned_unchanged(split):
+    X_train, X_test, y_train, y_test = split
+    model = LinearRegression().fit(X_train, y_train)
+    compact, report = compact_model(model, X_test, y_test, max_nodes=1)
+    assert compact is model and report["mae_delta"] == 0
+    assert report["note"] == "LinearRegression has no trees"
+    # Sizes are measured in the same dtype, so nothing pruned means no change
+    assert report["compiled_bytes_after"] == report["compiled_bytes_before"]
+
+
+@pytest.mark.parametrize("model", [
+    GradientBoostingRegressor(loss="absolute_error", n_estimators=20, max_depth=5, random_state=42),
+    GradientBoostingRegressor(loss="huber", n_estimators=20, max_depth=5, random_state=42),
+    RandomForestRegressor(n_estimators=5, criterion="poisson", random_state=42),
+], ids=["absolute_error", "huber", "poisson"])
+def test_non_squared_error_trees_are_not_pruned(split, model):
+    # Their node values are not leaf values, so collapsing a node would change predictions
+    X_train, X_test, y_train, y_test = split
+    model.fit(X_train, y_train)
+    compact, report = compact_model(model, X_test, y_test, min_gain=0.05, max_nodes=10)
+    assert compact is model
+    assert report["nodes_after"] == report["nodes_before"] and report["mae_delta"] == 0
+    assert report["note"] is not None
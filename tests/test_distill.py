@@ -0,0 +1,55 @@
+"""Tests for model distillation in notebooks/distill.py"""
+import os
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import train_test_split
+
+from conftest import ROOT_DIR
+from distill import distill
+from features import OFFICE_MAP, build_training_features
+from model_registry import LivePredictor, ModelRegistry
+from predictor import Predictor
+from tree_engine import save_compiled
+
+
+@pytest.fixture(scope="module")
+def run():
+    X, y, meta = build_training_features(os.path.join(ROOT_DIR, "visa_dataset.csv"))
+    prep = {"feature_names": list(X.columns), "office_map": OFFICE_MAP, **meta}
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
+    teacher = RandomForestRegressor(n_estimators=20, min_samples_leaf=5, random_state=42).fit(X_train, y_train)
+    student, report = distill(teacher, prep, X_train, y_train, X_test, y_test, max_gap=0.1)
+    return prep, X_test, y_test, student, report
+
+
+def test_student_is_smaller_and_within_the_gap(run):
+    prep, X_test, y_test, student, report = run
+
+    assert report["Model"][0].startswith("Teacher")
+    assert report["MAE vs teacher (test)"][0] == pytest.approx(0, abs=1e-9)
+    assert report["Chosen"].sum() == 1
+    chosen = report[report["Chosen"]].iloc[0]
+    # Selected on the validation slice; the test gap is only reported
+    assert chosen["Val gap"] <= 0.1
+    assert chosen["Size KB"] < report["Size KB"][0]
+    # The returned student is the chosen row
+    pred = student.predict(np.asarray(X_test, dtype=np.float64))
+    assert mean_absolute_error(y_test, pred) == pytest.approx(chosen["MAE"])
+
+
+def test_student_serves_from_the_registry(run, tmp_path):
+    prep, _, _, student, _ = run
+    save_compiled(str(tmp_path / "student.npz"), student)
+    with open(tmp_path / "prep.pkl", "wb") as f:
+        pickle.dump(prep, f)
+
+    direct = Predictor.from_files(str(tmp_path / "student.npz"), str(tmp_path / "prep.pkl"))
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    registry.publish({"compiled": str(tmp_path / "student.npz"), "student": str(tmp_path / "student.npz"),
+                      "prep": str(tmp_path / "prep.pkl")})
+    live = LivePredictor(registry, mode="student").get()
+    assert live.predict_one("India", "Student", "2024-06-15") == direct.predict_one("India", "Student", "2024-06-15")
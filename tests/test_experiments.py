@@ -0,0 +1,72 @@
+"""ExperimentRunner in notebooks/experiments.py against sequential scikit-learn"""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import GridSearchCV, train_test_split
+
+from experiments import ExperimentRunner
+
+
+@pytest.fixture(scope="module")
+def split():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(400, 6)), columns=[f"f{i}" for i in range(6)])
+    X["flag"] = rng.random(400) < 0.3
+    y = X["f0"] * 3 + X["f1"] ** 2 + X["flag"] * 5 + rng.normal(size=400)
+    return train_test_split(X, y, test_size=0.3, random_state=42)
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_compare_matches_sequential_fits(split, n_jobs):
+    X_train, X_test, y_train, y_test = split
+    experiments = [
+        ("Linear Regression", LinearRegression()),
+        ("Random Forest", RandomForestRegressor(n_estimators=20, random_state=42)),
+        ("Gradient Boosting", GradientBoostingRegressor(n_estimators=20, random_state=42)),
+    ]
+    with ExperimentRunner(X_train, y_train, X_test, y_test, n_jobs=n_jobs) as runner:
+        comparison_df, fitted = runner.compare(experiments)
+
+    assert list(comparison_df.columns) == ["Model", "MAE", "RMSE", "R² Score"]
+    for name, est in experiments:
+        expected = est.fit(X_train, y_train).predict(X_test)
+        model, y_pred = fitted[name]
+        np.testing.assert_allclose(y_pred, expected, rtol=1e-10)
+        assert list(model.feature_names_in_) == list(X_train.columns)
+        row = comparison_df.set_index("Model").loc[name]
+        assert row["MAE"] == pytest.approx(mean_absolute_error(y_test, expected))
+
+
+def test_grid_search_matches_gridsearchcv(split):
+    X_train, _, y_train, _ = split
+    grid = {"n_estimators": [5, 10], "max_depth": [2, None]}
+    expected = GridSearchCV(
+        RandomForestRegressor(random_state=42), grid, cv=3, scoring="neg_mean_squared_error"
+    ).fit(X_train, y_train)
+
+    with ExperimentRunner(X_train, y_train, n_jobs=2) as runner:
+        search = runner.grid_search(RandomForestRegressor(random_state=42), grid, cv=3)
+
+    assert search.best_params_ == expected.best_params_
+    np.testing.assert_allclose(search.cv_results_["mean_test_score"], expected.cv_results_["mean_test_score"])
+    np.testing.assert_allclose(
+        search.best_estimator_.predict(X_train), expected.best_estimator_.predict(X_train)
+    )
+
+
+@pytest.mark.parametrize("estimator", [
+    RandomForestRegressor(random_state=42),
+    GradientBoostingRegressor(random_state=42),
+], ids=["random_forest", "gradient_boosting"])
+def test_n_estimators_reuse_gives_identical_cv_table(split, estimator):
+    X_train, _, y_train, _ = split
+    grid = {"n_estimators": [5, 10, 20], "max_depth": [2, 4]}
+    with ExperimentRunner(X_train, y_train, n_jobs=2) as runner:
+        staged = runner.grid_search(estimator, grid, cv=3)
+        separate = runner.grid_search(estimator, grid, cv=3, reuse_n_estimators=False)
+
+    pd.testing.assert_frame_equal(staged.cv_results_, separate.cv_results_, check_exact=True)
+    assert staged.best_params_ == separate.best_params_
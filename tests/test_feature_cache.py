@@ -0,0 +1,96 @@
+"""Feature engineering (notebooks/features.py) and its on-disk cache"""
+import os
+import shutil
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ROOT_DIR
+from feature_cache import build_features, cache_key, load_features, load_or_build
+from features import OFFICE_MAP, build_training_features
+from synth_data import VisaDataModel, write_dataset
+from test_ingestion import in_memory_pipeline
+
+DATASET = os.path.join(ROOT_DIR, "visa_dataset.csv")
+
+
+def milestone3_features(csv_path):
+    # The inline Milestone3 steps before they moved to features.py
+    df = in_memory_pipeline(csv_path)
+    df["processing_office"] = df["country"].map(OFFICE_MAP).fillna("Unknown")
+    df["application_month"] = df["application_date"].dt.month
+    df["season"] = df["application_month"].apply(lambda x: "Peak" if x in [1, 2, 12] else "Off-Peak")
+    df["country_avg"] = df["country"].map(df.groupby("country")["processing_days"].mean())
+    df["country_avg"] = df["country_avg"].fillna(df["processing_days"].mean())
+    df["visa_avg"] = df["visa_type"].map(df.groupby("visa_type")["processing_days"].mean())
+    df["visa_avg"] = df["visa_avg"].fillna(df["processing_days"].mean())
+    df_encoded = pd.get_dummies(df, columns=["country", "visa_type", "season", "processing_office"], drop_first=True)
+    df_ml = df_encoded.dropna(subset=["processing_days"])
+    X = df_ml.drop(columns=["processing_days", "application_date", "decision_date"]).fillna(0)
+    return X, df_ml["processing_days"]
+
+
+def test_features_match_milestone3():
+    X_expected, y_expected = milestone3_features(DATASET)
+    X, y, meta = build_training_features(DATASET)
+    pd.testing.assert_frame_equal(X, X_expected)
+    pd.testing.assert_series_equal(y, y_expected)
+    assert meta["processing_days_count"] == len(y)
+
+
+def test_cache_hit_is_identical_and_memory_mapped(tmp_path):
+    X, y, meta, hit = load_or_build(DATASET, cache_dir=str(tmp_path))
+    assert not hit
+    X2, y2, meta2, hit2 = load_or_build(DATASET, cache_dir=str(tmp_path))
+    assert hit2
+
+    pd.testing.assert_frame_equal(X2, X)
+    pd.testing.assert_series_equal(y2, y)
+    assert meta2 == meta
+    # The column is a read-only view onto the memory-mapped .npy file
+    col = X2["country_avg"].to_numpy()
+    assert not col.flags.writeable
+    while col is not None and not isinstance(col, np.memmap):
+        col = col.base
+    assert col is not None
+
+
+def test_key_follows_data_and_version(tmp_path):
+    copy = str(tmp_path / "copy.csv")
+    shutil.copy(DATASET, copy)
+    assert cache_key(copy) == cache_key(DATASET)
+    assert cache_key(DATASET, version="other") != cache_key(DATASET)
+
+    with open(copy, "a") as f:
+        f.write("2024-01-02,2024-02-01,India,Student\n")
+    assert cache_key(copy) != cache_key(DATASET)
+
+
+@pytest.mark.parametrize("chunk_size", [613, 1_000_000])
+def test_streamed_entry_matches_in_memory_features(chunk_size, tmp_path):
+    # Missing values exercise the date fills, "Unknown" categories and negative days
+    csv_path = write_dataset(str(tmp_path / "synth.csv"), 5000, seed=3, missing_rate=0.05, model=VisaDataModel())
+    X_expected, y_expected, meta_expected = build_training_features(csv_path)
+    meta = build_features(csv_path, str(tmp_path / "entry"), chunk_size=chunk_size)
+    X, y, meta_loaded = load_features(str(tmp_path / "entry"))
+
+    pd.testing.assert_frame_equal(X, X_expected)
+    pd.testing.assert_series_equal(y, y_expected)
+    assert meta == meta_loaded == meta_expected
+
+
+def test_streamed_build_memory_stays_flat(tmp_path):
+    model = VisaDataModel()
+    peaks = []
+    for n in (20_000, 40_000):
+        csv_path = write_dataset(str(tmp_path / f"synth_{n}.csv"), n, seed=1, missing_rate=0.02, model=model)
+        tracemalloc.start()
+        try:
+            build_features(csv_path, str(tmp_path / f"entry_{n}"), chunk_size=2000)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    # Twice the rows, about the same peak: only one chunk is ever held
+    assert peaks[1] < peaks[0] * 1.25
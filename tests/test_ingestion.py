@@ -0,0 +1,45 @@
+"""Chunked ingestion in notebooks/ingestion.py must match the in-memory Milestone3 steps"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ROOT_DIR
+from ingestion import ingest_visa_csv
+from synth_data import VisaDataModel, write_dataset
+
+
+def in_memory_pipeline(csv_path):
+    # Same steps as notebooks/Milestone3.py before chunked ingestion
+    df = pd.read_csv(csv_path)
+    df["application_date"] = pd.to_datetime(df["application_date"])
+    df["decision_date"] = pd.to_datetime(df["decision_date"])
+    df["application_date"] = df["application_date"].fillna(df["application_date"].mode()[0])
+    df["decision_date"] = df["decision_date"].fillna(df["decision_date"].mode()[0])
+    df["country"] = df["country"].fillna("Unknown")
+    df["visa_type"] = df["visa_type"].fillna("Unknown")
+    df["processing_days"] = (df["decision_date"] - df["application_date"]).dt.days
+    df.loc[df["processing_days"] < 0, "processing_days"] = np.nan
+    return df
+
+
+def assert_matches(csv_path, chunk_size):
+    expected = in_memory_pipeline(csv_path)
+    df, stats = ingest_visa_csv(csv_path, chunk_size=chunk_size)
+
+    pd.testing.assert_frame_equal(df, expected)
+    pd.testing.assert_series_equal(stats["country_avg"], expected.groupby("country")["processing_days"].mean())
+    pd.testing.assert_series_equal(stats["visa_avg"], expected.groupby("visa_type")["processing_days"].mean())
+    assert stats["mean_processing_days"] == expected["processing_days"].mean()
+
+
+@pytest.mark.parametrize("chunk_size", [97, 1000, 1_000_000])
+def test_matches_in_memory_pipeline(chunk_size):
+    assert_matches(os.path.join(ROOT_DIR, "visa_dataset.csv"), chunk_size)
+
+
+@pytest.mark.parametrize("missing_rate", [0.0, 0.05])
+def test_matches_on_synthetic_data(missing_rate, tmp_path):
+    path = write_dataset(str(tmp_path / "synth.csv"), 5000, seed=7, missing_rate=missing_rate, model=VisaDataModel())
+    assert_matches(path, chunk_size=613)
@@ -0,0 +1,54 @@
+"""Tests for the load generator in benchmarks/load_test.py"""
+import threading
+
+import numpy as np
+import pytest
+from werkzeug.serving import make_server
+
+import api
+from conftest import MODEL_PATH, PREPROCESS_PATH
+from load_test import arrival_times, encode_request, max_rate_within, request_mix, run_step
+
+
+def test_arrivals_follow_the_target_rate():
+    times = arrival_times(200, 20, seed=3)
+    assert np.all(np.diff(times) >= 0) and times[-1] < 20
+    assert len(times) / 20 == pytest.approx(200, rel=0.05)
+    assert np.array_equal(times, arrival_times(200, 20, seed=3))
+
+
+def test_request_mix_and_encodings():
+    mix = request_mix(50, seed=1)
+    assert mix == request_mix(50, seed=1)
+    assert all({"country", "visa_type", "application_date"} <= set(p) for p in mix)
+
+    payload = {"country": "India", "visa_type": "Student", "application_date": "2024-06-15"}
+    assert encode_request(payload, "json")[2] == b'{"country": "India", "visa_type": "Student", "application_date": "2024-06-15"}'
+    assert encode_request(payload, "form")[2] == b"country=India&visa_type=Student&application_date=2024-06-15"
+    verb, path, body, _ = encode_request(payload, "json", method="get")
+    assert (verb, body) == ("GET", None) and path.startswith("/predict?country=India")
+
+
+def test_max_rate_within_slo():
+    curve = [
+        {"achieved_rps": 50.0, "p99_ms": 5.0, "errors": 0},
+        {"achieved_rps": 180.0, "p99_ms": 40.0, "errors": 0},
+        {"achieved_rps": 300.0, "p99_ms": 900.0, "errors": 0},
+    ]
+    assert max_rate_within(curve, 50) == 180.0
+    assert max_rate_within(curve, 1) is None
+
+
+def test_run_step_against_local_server(monkeypatch):
+    monkeypatch.setattr(api, "MODEL_PATH", MODEL_PATH)
+    monkeypatch.setattr(api, "PREPROCESS_PATH", PREPROCESS_PATH)
+    server = make_server("127.0.0.1", 0, api.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        step = run_step(f"http://127.0.0.1:{server.port}", 40, 0.5, request_mix(20), "json", concurrency=2)
+    finally:
+        server.shutdown()
+    assert step["errors"] == 0
+    assert step["sent"] > 5
+    assert 0 < step["p50_ms"] <= step["p99_ms"]
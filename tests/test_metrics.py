@@ -0,0 +1,93 @@
+"""Tests for the Prometheus metrics in src/metrics.py and their use in src/api.py"""
+import pytest
+
+import api
+import metrics
+from conftest import MODEL_PATH, PREPROCESS_PATH
+from metrics import Histogram, Registry, RequestTimer
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(api, "MODEL_PATH", MODEL_PATH)
+    monkeypatch.setattr(api, "PREPROCESS_PATH", PREPROCESS_PATH)
+    return api.app.test_client()
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    registry = Registry()
+    h = registry.histogram("t_seconds", "help", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        h.observe(value, 'a"b')
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP t_seconds help", "# TYPE t_seconds histogram"]
+    assert lines[2:] == [
+        't_seconds_bucket{route="a\\"b",le="0.1"} 2',
+        't_seconds_bucket{route="a\\"b",le="1.0"} 3',
+        't_seconds_bucket{route="a\\"b",le="+Inf"} 4',
+        't_seconds_sum{route="a\\"b"} 3.65',
+        't_seconds_count{route="a\\"b"} 4',
+    ]
+    with pytest.raises(ValueError):
+        registry.register(Histogram("t_seconds", "again"))
+
+
+def test_request_timer_stages_add_up():
+    timer = RequestTimer()
+    timer.mark("parse")
+    timer.mark("predict")
+    total = timer.finish("/test", "GET", 200)
+    assert [stage for stage, _ in timer.stages] == ["parse", "predict", "serialize"]
+    assert sum(seconds for _, seconds in timer.stages) == pytest.approx(total)
+    assert timer.server_timing().split(", ")[-1].startswith("total;dur=")
+
+
+def test_predict_records_stages_header_and_fallbacks(client):
+    stages = metrics.STAGE_SECONDS
+    before = {s: stages.count("/predict", "POST", s) for s in ("parse", "fetch", "features", "predict", "serialize")}
+    fallbacks = metrics.FALLBACKS.value("country")
+
+    resp = client.post("/predict", json={"country": "Atlantis", "visa_type": "Student", "application_date": "2024-06-15"})
+    assert resp.status_code == 200
+    timing = [part.split(";")[0] for part in resp.headers["Server-Timing"].split(", ")]
+    assert timing == ["parse", "fetch", "features", "predict", "serialize", "total"]
+    assert resp.headers["Timing-Allow-Origin"] == "*"
+    assert all(stages.count("/predict", "POST", s) == n + 1 for s, n in before.items())
+    assert metrics.FALLBACKS.value("country") == fallbacks + 1
+
+    body = client.get("/metrics")
+    assert body.status_code == 200
+    assert body.content_type.startswith("text/plain; version=0.0.4")
+    assert 'visa_api_stage_seconds_count{route="/predict",method="POST",stage="predict"}' in body.text
+
+
+def test_get_and_post_predict_are_separate_series(client, monkeypatch):
+    monkeypatch.setattr(api, "_answers", type(api._answers)())
+    latency, stages = metrics.REQUEST_SECONDS, metrics.STAGE_SECONDS
+    query = {"country": "India", "visa_type": "Student", "application_date": "2024-06-15"}
+    post_before = latency.count("/predict", "POST", "200")
+    get_before = {status: latency.count("/predict", "GET", status) for status in ("200", "304")}
+    cache_before = stages.count("/predict", "GET", "cache")
+
+    client.post("/predict", json=query)
+    first = client.get("/predict", query_string=query)
+    client.get("/predict", query_string={**query, "application_date": "2024-06-20"})
+    client.get("/predict", query_string=query, headers={"If-None-Match": first.headers["ETag"]})
+
+    # Cache hits and 304s never land in the POST (model call) series
+    assert latency.count("/predict", "POST", "200") == post_before + 1
+    assert latency.count("/predict", "GET", "200") == get_before["200"] + 2
+    assert latency.count("/predict", "GET", "304") == get_before["304"] + 1
+    assert stages.count("/predict", "GET", "cache") == cache_before + 1
+    assert stages.count("/predict", "POST", "cache") == 0
+
+
+def test_errors_are_counted_and_metrics_can_be_disabled(client, monkeypatch):
+    errors = metrics.ERRORS.value("/predict/batch", "POST", "400")
+    assert client.post("/predict/batch", json=[1]).status_code == 400
+    assert metrics.ERRORS.value("/predict/batch", "POST", "400") == errors + 1
+
+    monkeypatch.setattr(api, "METRICS_ENABLED", False)
+    resp = client.post("/predict/batch", json=[1])
+    assert "Server-Timing" not in resp.headers
+    assert metrics.ERRORS.value("/predict/batch", "POST", "400") == errors + 1
@@ -0,0 +1,194 @@
+"""Tests for the versioned model registry and hot swapping in src/model_registry.py"""
+import json
+import os
+import threading
+import time
+
+import joblib
+import pytest
+
+import api
+from conftest import MODEL_PATH, PREPROCESS_PATH
+from model_registry import LivePredictor, ModelRegistry
+
+ROW = ("India", "Student", "2024-06-15")
+
+
+def publish_pair(registry, tmp_path, bias=0.0, activate=True):
+    """Publish the fixture model, optionally shifted by bias days, as a new version."""
+    model = joblib.load(MODEL_PATH)
+    model.intercept_ = model.intercept_ + bias
+    model_path = tmp_path / f"model_{bias}.pkl"
+    joblib.dump(model, model_path)
+    return registry.publish({"model": str(model_path), "prep": PREPROCESS_PATH}, {"bias": bias}, activate=activate)
+
+
+def test_publish_is_immutable_and_rollback_follows_history(tmp_path):
+    registry = ModelRegistry(tmp_path / "registry")
+    v1 = publish_pair(registry, tmp_path)
+    v2 = publish_pair(registry, tmp_path, bias=10.0)
+    assert registry.versions() == sorted([v1, v2])
+    assert registry.current() == v2
+
+    manifest = registry.manifest(v2)
+    assert manifest["metadata"] == {"bias": 10.0}
+    assert set(manifest["files"]) == {"model.pkl", "preprocessing_info.pkl"}
+    assert registry.path(v2, "table") is None
+    registry.verify(v2)
+    assert not os.access(registry.path(v2, "model"), os.W_OK) or os.geteuid() == 0
+
+    assert registry.rollback() == v1
+    assert registry.state() == {"version": v1, "history": []}
+    with pytest.raises(ValueError):
+        registry.rollback()
+    registry.activate(v2)
+    assert registry.state()["history"] == [v1]
+
+    with pytest.raises(KeyError):
+        registry.activate("../versions")
+    with pytest.raises(ValueError):
+        registry.publish({"model": MODEL_PATH})
+
+
+def test_verify_detects_modified_files(tmp_path):
+    registry = ModelRegistry(tmp_path / "registry")
+    version = publish_pair(registry, tmp_path)
+    corrupt(registry, version)
+    with pytest.raises(ValueError):
+        registry.verify(version)
+
+
+@pytest.mark.filterwarnings("ignore:X does not have valid feature names")
+def test_live_predictor_swaps_without_blocking_requests(tmp_path):
+    registry = ModelRegistry(tmp_path / "registry")
+    v1 = publish_pair(registry, tmp_path)
+    live = LivePredictor(registry, poll_interval=0)
+    base = live.get().predict_one(*ROW)
+    assert live.version == v1
+
+    v2 = publish_pair(registry, tmp_path, bias=10.0, activate=False)
+    results, stop = [], threading.Event()
+
+    def traffic():
+        while not stop.is_set():
+            results.append(live.get().predict_one(*ROW))
+
+    threads = [threading.Thread(target=traffic) for _ in range(4)]
+    for t in threads:
+        t.start()
+    registry.activate(v2)
+    while live.version != v2:
+        live.get()
+        live.wait()
+    stop.set()
+    for t in threads:
+        t.join()
+
+    # Every request was answered by one complete version or the other
+    assert set(results) <= {base, round(base + 10.0, 1)}
+    assert live.get().predict_one(*ROW) == round(base + 10.0, 1)
+
+    # Rollback reuses the predictor still held in memory
+    old = live._loaded[v1]
+    registry.rollback()
+    live.get()
+    live.wait()
+    assert live.version == v1 and live.get() is old
+
+
+def corrupt(registry, version):
+    path = registry.path(version, "model")
+    os.chmod(path, 0o644)
+    with open(path, "ab") as f:
+        f.write(b"\0")
+
+
+@pytest.mark.filterwarnings("ignore:X does not have valid feature names")
+def test_concurrent_first_requests_load_once(tmp_path):
+    registry = ModelRegistry(tmp_path / "registry")
+    publish_pair(registry, tmp_path)
+    live = LivePredictor(registry)
+    loads, original = [], live._load
+
+    def slow_load(version):
+        loads.append(version)
+        time.sleep(0.05)
+        return original(version)
+
+    live._load = slow_load
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(live.get())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(loads) == 1
+    assert len(results) == 8 and all(p is results[0] for p in results)
+
+
+@pytest.mark.filterwarnings("ignore:X does not have valid feature names")
+def test_failed_version_is_recorded_and_not_retried(tmp_path):
+    registry = ModelRegistry(tmp_path / "registry")
+    v1 = publish_pair(registry, tmp_path)
+    live = LivePredictor(registry, poll_interval=0)
+    live.get()
+    loads, original = [], live._load
+    live._load = lambda version: loads.append(version) or original(version)
+
+    v2 = publish_pair(registry, tmp_path, bias=10.0)
+    corrupt(registry, v2)
+    for _ in range(5):
+        assert live.get() is not None
+        live.wait()
+    # One attempt; requests keep the previous version
+    assert loads == [v2] and live.version == v1
+    assert live.failed["version"] == v2 and "does not match its manifest" in live.failed["error"]
+
+    v3 = publish_pair(registry, tmp_path, bias=20.0)
+    live.get()
+    live.wait()
+    assert live.version == v3 and live.failed is None
+
+
+@pytest.fixture
+def registry_client(monkeypatch, tmp_path):
+    registry = ModelRegistry(tmp_path / "registry")
+    monkeypatch.setattr(api, "MODEL_REGISTRY", registry.root)
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(api, "_live", None)
+    return registry, api.app.test_client()
+
+
+def test_api_serves_registry_and_rolls_back(registry_client, tmp_path):
+    registry, client = registry_client
+    v1 = publish_pair(registry, tmp_path)
+    v2 = publish_pair(registry, tmp_path, bias=10.0)
+    body = {"country": ROW[0], "visa_type": ROW[1], "application_date": ROW[2]}
+
+    assert client.get("/model").json["version"] == v2
+    new_days = client.post("/predict", json=body).json["estimated_days"]
+
+    assert client.post("/model/rollback").status_code == 401
+    auth = {"Authorization": "Bearer secret"}
+    resp = client.post("/model/rollback", headers=auth)
+    assert resp.json == {"success": True, "version": v1}
+    assert client.get("/model").json["version"] == v1
+    assert client.post("/predict", json=body).json["estimated_days"] == round(new_days - 10.0, 1)
+    assert client.post("/model/rollback", headers=auth).status_code == 409
+
+    assert client.post("/model/activate", headers=auth, json={"version": "nope"}).status_code == 404
+    assert client.post("/model/activate", headers=auth, json={"version": v2}).json["version"] == v2
+    assert json.loads(open(registry.current_path).read())["version"] == v2
+
+
+def test_api_reports_a_version_that_fails_to_load(registry_client, tmp_path):
+    registry, client = registry_client
+    version = publish_pair(registry, tmp_path)
+    corrupt(registry, version)
+
+    for _ in range(2):
+        resp = client.get("/model")
+        assert resp.status_code == 503
+        assert resp.json["load_error"]["version"] == version
+    body = {"country": ROW[0], "visa_type": ROW[1], "application_date": ROW[2]}
+    assert client.post("/predict", json=body).json["success"] is False
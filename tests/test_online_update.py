@@ -0,0 +1,126 @@
+"""Incremental updates in notebooks/online_update.py against full recomputation"""
+import os
+import pickle
+import sys
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.linear_model import LinearRegression
+
+from conftest import PREPROCESS_PATH
+from ingestion import ingest_visa_csv
+from online_update import (
+    drift_report,
+    encode_rows,
+    linear_sufficient_stats,
+    load_delta,
+    main,
+    update_model,
+    update_stats,
+)
+from model_registry import ModelRegistry
+from synth_data import VisaDataModel, write_dataset
+from tree_engine import load_compiled
+
+
+@pytest.fixture(scope="module")
+def datasets(tmp_path_factory):
+    out = tmp_path_factory.mktemp("online")
+    model = VisaDataModel()
+    base = write_dataset(str(out / "base.csv"), 3000, seed=1, model=model)
+    delta = write_dataset(str(out / "delta.csv"), 400, seed=2, model=model)
+    return base, delta
+
+
+@pytest.fixture(scope="module")
+def base_prep(datasets):
+    with open(PREPROCESS_PATH, "rb") as f:
+        prep = pickle.load(f)
+    _, stats = ingest_visa_csv(datasets[0])
+    return {
+        **prep,
+        "country_avg": stats["country_avg"].to_dict(),
+        "visa_avg": stats["visa_avg"].to_dict(),
+        "mean_processing_days": stats["mean_processing_days"],
+        "country_count": stats["country_count"].to_dict(),
+        "visa_count": stats["visa_count"].to_dict(),
+        "processing_days_count": stats["processing_days_count"],
+    }
+
+
+def test_stats_match_full_recompute(datasets, base_prep):
+    updated = update_stats(base_prep, load_delta(datasets[1]))
+    _, full = ingest_visa_csv(list(datasets))
+
+    assert updated["country_avg"] == full["country_avg"].to_dict()
+    assert updated["visa_avg"] == full["visa_avg"].to_dict()
+    assert updated["mean_processing_days"] == pytest.approx(full["mean_processing_days"], abs=1e-12)
+    assert updated["processing_days_count"] == full["processing_days_count"]
+
+
+def test_missing_counts_raise(base_prep, datasets):
+    prep = {k: v for k, v in base_prep.items() if k != "country_count"}
+    with pytest.raises(ValueError, match="--base-csv"):
+        update_stats(prep, load_delta(datasets[1]))
+
+
+def test_linear_update_matches_refit(datasets, base_prep):
+    base_df, _ = ingest_visa_csv(datasets[0])
+    delta = load_delta(datasets[1])
+    X_base, y_base = encode_rows(base_prep, base_df), base_df["processing_days"].to_numpy(float)
+    X_delta, y_delta = encode_rows(base_prep, delta), delta["processing_days"].to_numpy(float)
+
+    model = LinearRegression().fit(X_base, y_base)
+    prep = {**base_prep, "linear_stats": linear_sufficient_stats(X_base, y_base)}
+    updated, prep = update_model(model, prep, X_delta, y_delta)
+
+    refit = LinearRegression().fit(np.vstack([X_base, X_delta]), np.concatenate([y_base, y_delta]))
+    np.testing.assert_allclose(updated.predict(X_base), refit.predict(X_base.to_numpy()), atol=1e-6)
+    assert prep["linear_stats"]["n"] == len(y_base) + len(y_delta)
+
+
+def test_boosting_warm_start_and_drift(datasets, base_prep):
+    base_df, _ = ingest_visa_csv(datasets[0])
+    model = GradientBoostingRegressor(n_estimators=20, max_depth=3, random_state=0)
+    model.fit(encode_rows(base_prep, base_df), base_df["processing_days"])
+
+    delta = load_delta(datasets[1])
+    prep = update_stats(base_prep, delta)
+    updated, _ = update_model(model, prep, encode_rows(prep, delta), delta["processing_days"], extra_estimators=5)
+    assert updated.n_estimators_ == 25 and model.n_estimators_ == 20
+
+    report = drift_report(model, updated, prep, *datasets)
+    assert report["rows"] == 3400
+    assert report["country_avg_max_abs_diff"] == 0.0
+    assert np.isfinite(report["prediction_mean_abs_diff"])
+
+
+def test_main_publishes_one_registry_version(datasets, base_prep, tmp_path, monkeypatch):
+    base_df, _ = ingest_visa_csv(datasets[0])
+    model = GradientBoostingRegressor(n_estimators=10, max_depth=3, random_state=0)
+    model.fit(encode_rows(base_prep, base_df), base_df["processing_days"])
+    model_path, prep_path = str(tmp_path / "model.pkl"), str(tmp_path / "prep.pkl")
+    joblib.dump(model, model_path)
+    with open(prep_path, "wb") as f:
+        pickle.dump(base_prep, f)
+
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    monkeypatch.setattr(sys, "argv", [
+        "online_update.py", "--delta", datasets[1], "--model", model_path, "--prep", prep_path,
+        "--extra-estimators", "3", "--registry", registry.root,
+        "--compiled", str(tmp_path / "model.npz"), "--table", str(tmp_path / "table.npz"),
+    ])
+    main()
+
+    version = registry.current()
+    assert registry.versions() == [version]
+    registry.verify(version)
+    assert registry.manifest(version)["metadata"]["online_update"]["delta_rows"] == len(load_delta(datasets[1]))
+    assert joblib.load(registry.path(version, "model")).n_estimators_ == 13
+    assert load_compiled(registry.path(version, "compiled")).value.dtype == np.float32
+    # Working copies match the published version; absent optional ones stay absent
+    with open(model_path, "rb") as a, open(registry.path(version, "model"), "rb") as b:
+        assert a.read() == b.read()
+    assert not os.path.exists(tmp_path / "model.npz")
@@ -0,0 +1,134 @@
+"""Tests for the shared Predictor and its per-process artifact cache"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import MODEL_PATH, PREPROCESS_PATH, ROOT_DIR
+from feature_encoder import FeatureEncoder
+from features import encode_features, engineer_features
+from ingestion import ingest_visa_csv
+from lookup_table import LookupTable, build_lookup_table, save_lookup_table
+from predictor import build_feature_vector, clear_cache, get_predictor
+
+SAMPLES = [
+    {"country": "India", "visa_type": "Student", "application_date": "2024-09-02", "processing_office": "New Delhi"},
+    {"country": "United Kingdom", "visa_type": "Work", "application_date": "2024-04-29"},
+    {"country": "Germany", "visa_type": "Tourist", "application_date": "2023-11-27"},
+    {"country": "Atlantis", "visa_type": "Unknown", "application_date": "2024-12-15"},
+]
+
+
+def test_artifacts_loaded_once_per_process():
+    clear_cache()
+    first = get_predictor(MODEL_PATH, PREPROCESS_PATH)
+    assert get_predictor(MODEL_PATH, PREPROCESS_PATH) is first
+
+
+def test_predict_one_matches_feature_vector_path():
+    predictor = get_predictor(MODEL_PATH, PREPROCESS_PATH)
+    for s in SAMPLES:
+        X = build_feature_vector(predictor.prep, s["country"], s["visa_type"], s["application_date"], s.get("processing_office"))
+        expected = max(0.0, float(predictor.model.predict(X)[0]))
+        # float32 encoding may move the last rounded digit by one step at most
+        assert abs(predictor.predict_one(s["country"], s["visa_type"], s["application_date"], s.get("processing_office")) - expected) <= 0.05 + 1e-6
+
+
+def test_predict_many_preserves_order():
+    predictor = get_predictor(MODEL_PATH, PREPROCESS_PATH)
+    expected = [predictor.predict_one(s["country"], s["visa_type"], s["application_date"], s.get("processing_office")) for s in SAMPLES]
+    assert predictor.predict_many(SAMPLES) == expected
+    assert predictor.predict_many([]) == []
+
+
+def test_concurrent_first_use_shares_one_predictor():
+    clear_cache()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        predictors = list(pool.map(lambda _: get_predictor(MODEL_PATH, PREPROCESS_PATH), range(32)))
+    assert all(p is predictors[0] for p in predictors)
+
+
+def test_encoder_matches_build_feature_vector():
+    predictor = get_predictor(MODEL_PATH, PREPROCESS_PATH)
+    encoder = FeatureEncoder(predictor.prep)
+    block = encoder.encode_many(SAMPLES)
+    for i, s in enumerate(SAMPLES):
+        expected = build_feature_vector(predictor.prep, s["country"], s["visa_type"], s["application_date"], s.get("processing_office"))
+        expected = expected.to_numpy(dtype=np.float32)[0]
+        np.testing.assert_array_equal(encoder.encode_one(s["country"], s["visa_type"], s["application_date"], s.get("processing_office"))[0], expected)
+        np.testing.assert_array_equal(block[i], expected)
+
+
+def test_build_feature_vector_reuses_one_encoder_per_prep(monkeypatch):
+    import predictor as predictor_module
+
+    prep = get_predictor(MODEL_PATH, PREPROCESS_PATH).prep
+    built = []
+    monkeypatch.setattr(predictor_module, "FeatureEncoder", lambda *a, **k: built.append(a) or FeatureEncoder(*a, **k))
+    monkeypatch.setattr(predictor_module, "_ENCODERS", {})
+    first = build_feature_vector(prep, "India", "Student", "2024-06-15")
+    second = build_feature_vector(prep, "India", "Student", "2024-06-15")
+    assert len(built) == 1
+    # Each call returns its own frame, not a view of the shared buffer
+    pd.testing.assert_frame_equal(first, second)
+    assert not np.shares_memory(first.to_numpy(), second.to_numpy())
+
+    build_feature_vector(dict(prep), "India", "Student", "2024-06-15")
+    assert len(built) == 2
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_encoder_rebuilds_training_matrix(dtype):
+    prep = get_predictor(MODEL_PATH, PREPROCESS_PATH).prep
+    df, stats = ingest_visa_csv(os.path.join(ROOT_DIR, "visa_dataset.csv"))
+    X, _ = encode_features(engineer_features(df, stats))
+    assert list(X.columns) == prep["feature_names"]
+    rows = df.loc[X.index]
+    expected = X.to_numpy(dtype=dtype)
+
+    encoder = FeatureEncoder(prep, dtype=dtype)
+    block = encoder.encode_columns(
+        rows["country"].tolist(), rows["visa_type"].tolist(), rows["application_date"].dt.month.to_numpy()
+    )
+    np.testing.assert_array_equal(block, expected)
+
+    requests = [
+        {"country": r.country, "visa_type": r.visa_type, "application_date": r.application_date.strftime("%Y-%m-%d")}
+        for r in rows.itertuples()
+    ]
+    # Batches on both sides of the row-by-row / column-wise cutoff
+    for size in (1, 7, 8, 100, len(requests)):
+        np.testing.assert_array_equal(encoder.encode_many(requests[:size]), expected[:size])
+
+
+def test_encoder_unparseable_date_falls_back_to_today():
+    predictor = get_predictor(MODEL_PATH, PREPROCESS_PATH)
+    encoder = FeatureEncoder(predictor.prep)
+    row = encoder.encode_one("India", "Student", "not-a-date")[0]
+    assert row[encoder.month_idx] == date.today().month
+
+
+def test_lookup_table_matches_model(tmp_path):
+    predictor = get_predictor(MODEL_PATH, PREPROCESS_PATH)
+    table_path = str(tmp_path / "prediction_table.npz")
+    save_lookup_table(table_path, build_lookup_table(predictor.model, predictor.prep))
+
+    tabled = get_predictor(MODEL_PATH, PREPROCESS_PATH, table_path)
+    assert tabled.table is not None
+    for s in SAMPLES:
+        args = (s["country"], s["visa_type"], s["application_date"], s.get("processing_office"))
+        assert abs(tabled.predict_one(*args) - predictor.predict_one(*args)) <= 0.1 + 1e-6
+    # "Atlantis" is outside the grid and must fall back to the model
+    assert tabled.predict_many(SAMPLES)[3] == predictor.predict_one("Atlantis", "Unknown", "2024-12-15")
+
+
+def test_lookup_table_rejects_other_feature_layout(tmp_path):
+    predictor = get_predictor(MODEL_PATH, PREPROCESS_PATH)
+    table_path = str(tmp_path / "prediction_table.npz")
+    save_lookup_table(table_path, build_lookup_table(predictor.model, predictor.prep))
+    other = dict(predictor.prep, feature_names=predictor.feature_names[:-1])
+    with pytest.raises(ValueError):
+        LookupTable.load(table_path, other)
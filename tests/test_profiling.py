@@ -0,0 +1,61 @@
+"""Tests for the sampled request profiler in src/profiling.py"""
+import os
+import pstats
+
+import pytest
+
+import api
+from conftest import MODEL_PATH, PREPROCESS_PATH
+from predictor import get_predictor
+from profiling import SampledProfiler
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(api, "MODEL_PATH", MODEL_PATH)
+    monkeypatch.setattr(api, "PREPROCESS_PATH", PREPROCESS_PATH)
+    # install_profiler replaces the view functions; put them back afterwards
+    for endpoint in ("predict_route", "predict_get_route"):
+        monkeypatch.setitem(api.app.view_functions, endpoint, api.app.view_functions[endpoint])
+    monkeypatch.setattr(api, "_answers", type(api._answers)())
+    return api.app.test_client()
+
+
+def test_disabled_profiler_installs_nothing(client):
+    assert api.install_profiler(0) is None
+    assert api.app.view_functions["predict_route"] is api.predict_route
+    assert api.app.view_functions["predict_get_route"] is api.predict_get_route
+
+
+def test_sampled_predict_requests_are_dumped(client, tmp_path):
+    # Load the model before profiling starts
+    get_predictor(MODEL_PATH, PREPROCESS_PATH)
+    profiler = api.install_profiler(1.0, str(tmp_path), dump_interval=3600)
+    body = {"country": "India", "visa_type": "Student", "application_date": "2024-06-15"}
+    for _ in range(3):
+        assert client.post("/predict", json=body).status_code == 200
+    assert client.get("/predict", query_string=body).status_code == 200
+    assert profiler.samples == 4
+    assert os.listdir(tmp_path) == []
+
+    path = profiler.dump()
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+    stats = pstats.Stats(path)
+    calls = {func[2]: stat[1] for func, stat in stats.stats.items()}
+    assert calls["predict_one"] == 4
+    assert calls["predict_get_route"] == 1
+    assert profiler.dump() is None
+
+
+def test_sample_rate_and_one_profile_at_a_time(tmp_path):
+    profiler = SampledProfiler(0.25, str(tmp_path), dump_interval=0, seed=0)
+    square = profiler.wrap(lambda x: x * x)
+    assert [square(i) for i in range(400)] == [i * i for i in range(400)]
+    assert 60 <= profiler.samples <= 140
+    assert len(os.listdir(tmp_path)) == profiler.samples == profiler.dumps
+
+    # A call made while another is being profiled runs unprofiled
+    nested = SampledProfiler(1.0, str(tmp_path), dump_interval=3600)
+    fact = nested.wrap(lambda n: 1 if n <= 1 else n * fact(n - 1))
+    assert fact(5) == 120
+    assert nested.samples == 1
@@ -0,0 +1,9 @@
+"""Cold-start regression check for the serving process"""
+from startup_profile import DEFAULT_BUDGET_MS, check_budget, profile_startup
+
+
+def test_health_is_ready_within_budget():
+    result = profile_startup("model")
+    assert result["heavy_before_health"] == []
+    assert check_budget(result, DEFAULT_BUDGET_MS) == []
+    assert set(result["steps_ms"]) >= {"import_api", "first_health", "first_predict", "load_model", "load_preprocessing_info"}
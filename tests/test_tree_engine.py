@@ -0,0 +1,55 @@
+"""Parity tests for the numpy-only model engine in src/tree_engine.py"""
+import os
+
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+
+from conftest import ROOT_DIR
+from features import build_training_features
+from tree_engine import compile_model, load_compiled, save_compiled
+
+
+@pytest.fixture(scope="module")
+def training_data():
+    # The matrix Milestone3.py trains on (features.py)
+    X, y, _ = build_training_features(os.path.join(ROOT_DIR, "visa_dataset.csv"))
+    return X.astype(float), y
+
+
+@pytest.mark.parametrize("model", [
+    RandomForestRegressor(n_estimators=30, max_depth=None, random_state=42),
+    GradientBoostingRegressor(n_estimators=50, max_depth=5, learning_rate=0.1, random_state=42),
+    LinearRegression(),
+], ids=["random_forest", "gradient_boosting", "linear"])
+def test_compiled_matches_sklearn(model, training_data, tmp_path):
+    X, y = training_data
+    model.fit(X, y)
+    expected = model.predict(X)
+
+    compiled = compile_model(model)
+    np.testing.assert_allclose(compiled.predict(X.to_numpy()), expected, rtol=1e-9, atol=1e-9)
+
+    path = str(tmp_path / "model.npz")
+    save_compiled(path, compiled)
+    np.testing.assert_allclose(load_compiled(path).predict(X.to_numpy()), expected, rtol=1e-9, atol=1e-9)
+
+
+def test_float32_keeps_split_decisions(training_data):
+    X, y = training_data
+    model = RandomForestRegressor(n_estimators=30, random_state=0).fit(X, y)
+    compiled = compile_model(model, dtype=np.float32)
+    assert compiled.threshold.dtype == np.float32
+    # Only the leaf values are rounded, so errors stay at float32 precision
+    np.testing.assert_allclose(compiled.predict(X.to_numpy()), model.predict(X), rtol=1e-5)
+
+
+def test_chunked_batches(training_data, monkeypatch):
+    import tree_engine
+
+    X, y = training_data
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    monkeypatch.setattr(tree_engine, "_MAX_CELLS", 64)
+    monkeypatch.setattr(tree_engine, "_DEDUP_MIN_ROWS", 10 ** 9)
+    np.testing.assert_allclose(compile_model(model).predict(X.to_numpy()), model.predict(X), rtol=1e-9)
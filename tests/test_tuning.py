@@ -0,0 +1,97 @@
+"""Successive halving and the trial store in notebooks/tuning.py"""
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from experiments import ExperimentRunner
+from tuning import TrialStore, halving_schedule, successive_halving
+
+
+@pytest.fixture(scope="module")
+def train():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(300, 5)), columns=[f"f{i}" for i in range(5)])
+    y = X["f0"] * 3 + X["f1"] ** 2 + rng.normal(size=300)
+    return X, y
+
+
+GRID = {"n_estimators": [5, 10], "max_depth": [2, 4, None], "min_samples_split": [2, 10]}
+
+
+def test_schedule():
+    assert halving_schedule(12, 300, 34, 3) == [34, 102, 300]
+    assert halving_schedule(12, 300, 300, 3) == [300]
+
+
+@pytest.mark.parametrize("resource", ["n_samples", "n_estimators"])
+def test_second_run_reuses_every_trial(train, tmp_path, resource):
+    X, y = train
+    store = TrialStore(str(tmp_path / "trials.sqlite"))
+    with ExperimentRunner(X, y, n_jobs=1) as runner:
+        first = successive_halving(runner, RandomForestRegressor(random_state=0), GRID, store, resource=resource, cv=3)
+        second = successive_halving(runner, RandomForestRegressor(random_state=0), GRID, store, resource=resource, cv=3)
+
+    assert first.n_trials_run > 0 and first.n_trials_reused == 0
+    assert second.n_trials_run == 0 and second.n_trials_reused == first.n_trials_run
+    assert store.count() == first.n_trials_run
+    assert second.best_params_ == first.best_params_
+    pd.testing.assert_frame_equal(second.cv_results_, first.cv_results_)
+    if resource == "n_estimators":
+        assert first.best_params_["n_estimators"] == 10
+        assert first.cv_results_["n_resources"].max() == 10
+
+
+def test_resumes_after_interruption(train, tmp_path):
+    X, y = train
+    path = str(tmp_path / "trials.sqlite")
+    with ExperimentRunner(X, y, n_jobs=1) as runner:
+        full = successive_halving(runner, RandomForestRegressor(random_state=0), GRID, TrialStore(str(tmp_path / "full.sqlite")), cv=3)
+
+        store = TrialStore(path)
+        original_map = runner.map
+
+        def interrupted_map(tasks, callback=None):
+            # Let the first 10 fits finish, then fail like a killed run
+            def limited(i, result):
+                if i >= 10:
+                    raise KeyboardInterrupt
+                callback(i, result)
+            return original_map(tasks, callback=limited)
+
+        runner.map = interrupted_map
+        with pytest.raises(KeyboardInterrupt):
+            successive_halving(runner, RandomForestRegressor(random_state=0), GRID, store, cv=3)
+        runner.map = original_map
+        assert store.count() == 10
+
+        resumed = successive_halving(runner, RandomForestRegressor(random_state=0), GRID, store, cv=3)
+
+    assert resumed.n_trials_reused == 10
+    assert resumed.n_trials_run == full.n_trials_run - 10
+    assert resumed.best_params_ == full.best_params_
+
+
+def test_other_data_gets_fresh_trials(train, tmp_path):
+    X, y = train
+    store = TrialStore(str(tmp_path / "trials.sqlite"))
+    with ExperimentRunner(X, y, n_jobs=1) as runner:
+        successive_halving(runner, RandomForestRegressor(random_state=0), GRID, store, cv=3)
+    with ExperimentRunner(X, y + 1, n_jobs=1) as runner:
+        other = successive_halving(runner, RandomForestRegressor(random_state=0), GRID, store, cv=3)
+    assert other.n_trials_reused == 0
+
+
+def test_other_shuffle_gets_fresh_trials(train, tmp_path):
+    X, y = train
+    with TrialStore(str(tmp_path / "trials.sqlite")) as store, ExperimentRunner(X, y, n_jobs=1) as runner:
+        first = successive_halving(runner, RandomForestRegressor(random_state=0), GRID, store, cv=3)
+        other = successive_halving(runner, RandomForestRegressor(random_state=0), GRID, store, cv=3, random_state=1)
+        again = successive_halving(runner, RandomForestRegressor(random_state=0), GRID, store, cv=3)
+    assert other.n_trials_reused == 0
+    assert again.n_trials_run == 0 and again.n_trials_reused == first.n_trials_run
+    with pytest.raises(sqlite3.ProgrammingError):
+        store.count()
+